@@ -0,0 +1,133 @@
+#!/usr/bin/python3
+
+# NAME
+#   Image batch - converts many images at once
+#
+# SYNOPSIS
+#   ./image-batch.py -t <tool> -i <directory|glob|manifest> -o <directory>
+#
+# DESCRIPTION
+#   This script runs one of the converters (wave, pf, pp or midi) on every
+#   image of a directory, a glob pattern or a manifest file with one input
+#   (and optionally an output path) per line. The images are spread over a
+#   pool of worker processes which keep the converter loaded between images.
+#   Outputs newer than their input are skipped unless --force is given. At
+#   the end the throughput of the whole batch is printed.
+#
+# EXAMPLE:
+#   ./image-batch.py -t wave -i "frames/*.jpg" -o renders -w 8
+#
+# OPTIONS
+#   -t|--tool              the converter: wave, pf, pp or midi
+#   -i|--input             directory, glob pattern or manifest file
+#   -o|--output-dir        where the outputs are written
+#   -w|--workers           number of worker processes, defaults to 1
+#   -s|--sample-rate       wave: the length of one row
+#   -f|--ignore-frequency  wave: frequencies till this will be ignored
+#   -b|--ignore-background midi: dark pixel will be ignored
+#   --force                convert up to date images as well
+#
+# LEGAL NOTE
+#   Written and maintained by Laura Herzog (laura-herzog@outlook.com)
+#   Permission to copy and modify is granted under the AGPL license
+#   Project Information: https://github.com/lauraherzog/universum-tonal/
+
+import getopt, sys, os.path, time
+from tonal.batch import tools, collectInputs, convertImage
+from tonal.parallel import orderedMap
+
+def main():
+  try:
+    opts, args = getopt.getopt(sys.argv[1:], "ht:i:o:w:s:f:b", ["help", "tool=", "input=", "output-dir=", "workers=", "sample-rate=", "ignore-frequency=", "ignore-background", "force"])
+  except getopt.GetoptError as err:
+    help()
+    sys.exit(2)
+
+  tool = None
+  source = None
+  outputDirectory = "."
+  workers = 1
+  options = {}
+
+  for operator, argument in opts:
+    if operator in ("-h", "--help"):
+      help()
+      sys.exit()
+    elif operator in ("-t", "--tool"):
+      tool = argument
+      checkTool(tool)
+    elif operator in ("-i", "--input"):
+      source = argument
+    elif operator in ("-o", "--output-dir"):
+      outputDirectory = argument
+    elif operator in ("-w", "--workers"):
+      workers = int(argument)
+    elif operator in ("-s", "--sample-rate"):
+      options["sampleRate"] = int(argument)
+    elif operator in ("-f", "--ignore-frequency"):
+      options["lowestFrequency"] = float(argument)
+    elif operator in ("-b", "--ignore-background"):
+      options["ignoreBackground"] = True
+    elif operator == "--force":
+      options["force"] = True
+    else:
+      assert False, "unhandled option"
+
+  if tool is None or source is None:
+    printError("A tool and an input are required")
+
+  try:
+    pairs = collectInputs(source, outputDirectory, tool)
+  except (OSError, ValueError) as error:
+    printError(error)
+  if len(pairs) == 0:
+    printError("No images found")
+
+  print("Converting {} images with {} worker(s)".format(len(pairs), workers))
+  convertBatch(tool, pairs, options, workers)
+
+def convertBatch(tool, pairs, options, workers):
+  started = time.perf_counter()
+  converted = 0
+  skipped = 0
+  failed = 0
+  samples = 0
+
+  tasks = ((tool, inputFile, outputFile, options) for inputFile, outputFile in pairs)
+  for result in orderedMap(convertImage, tasks, workers):
+    if result["error"] is not None:
+      failed = failed + 1
+      print("Failed {}: {}".format(result["inputFile"], result["error"]))
+    elif result["skipped"] == True:
+      skipped = skipped + 1
+    else:
+      converted = converted + 1
+      samples = samples + result["samples"]
+      print("Converted {} in {:.2f}s".format(result["inputFile"], result["seconds"]))
+
+  # aggregate throughput
+  elapsed = time.perf_counter() - started
+  unit = "notes" if tool == "midi" else "samples"
+  print("Done: {} converted, {} up to date, {} failed in {:.2f}s".format(converted, skipped, failed, elapsed))
+  print("Throughput: {:.2f} images/s, {:.0f} {}/s".format(converted / elapsed, samples / elapsed, unit))
+
+# checks the tool if there are any validation errors
+def checkTool(tool):
+  if tool not in tools:
+    printError("Tool not supported. Use {}".format(", ".join(tools)))
+
+  return True
+
+# help, I need somebody, help!
+def help():
+  print("Usage: ./image-batch.py -t <tool> -i <directory|glob|manifest> -o <directory>")
+
+# prints an error and exists after showing help()
+def printError(errorMessage):
+  message = "\033[1mError:\033[0m {}".format(errorMessage)
+  print(message)
+  help()
+  sys.exit()
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,166 @@
+#!/usr/bin/python3
+
+# NAME
+#   Image benchmark - times every stage of the converters
+#
+# SYNOPSIS
+#   ./image-benchmark.py [-s <sizes>] [-t <tools>] [-o <report>] [-b <baseline>]
+#
+# DESCRIPTION
+#   This script renders synthetic images of a few sizes with every converter
+#   and times each stage on its own: decoding, the HSV conversion, mapping,
+#   synthesis, writing the wave file, encoding and building the midi file.
+#   Besides the time the peak memory and the rates (pixels, samples and notes
+#   per second) are reported. The report can be written as JSON and compared
+#   against an older report; if a stage got slower than the threshold allows,
+#   the script exits with 1. Errors in the options or a baseline that can not
+#   be compared exit with 2, so they do not pass as a clean run.
+#
+#   Stages that would take longer than --max-seconds (estimated from the size
+#   before) are skipped, so big sizes only run the fast stages.
+#
+# EXAMPLE:
+#   ./image-benchmark.py -o baseline.json
+#   ./image-benchmark.py -s 64,256,1024,8192 -t wave,midi -b baseline.json
+#
+# OPTIONS
+#   -s|--sizes        comma separated image sizes, defaults to 64,256,1024
+#   -t|--tools        comma separated tools: wave, midi, pf, pp, chord, noise
+#   -o|--output-file  write the report as JSON to this file
+#   -b|--baseline     compare with this report
+#   -r|--repeat       runs per stage, the best time is kept, defaults to 1
+#   -m|--mode         synthesis mode of the wave tool, defaults to sine
+#   --threshold       allowed slowdown in percent, defaults to 20
+#   --max-seconds     skip stages estimated to take longer, defaults to 60
+#   --no-memory       do not measure the peak memory
+#
+# LEGAL NOTE
+#   Written and maintained by Laura Herzog (laura-herzog@outlook.com)
+#   Permission to copy and modify is granted under the AGPL license
+#   Project Information: https://github.com/lauraherzog/universum-tonal/
+
+import getopt, sys, os.path, json, tempfile
+from tonal.benchmark import runBenchmark, compareResults, defaultSizes, benchmarkTools, benchmarkVersion
+
+def main():
+  try:
+    opts, args = getopt.getopt(sys.argv[1:], "hs:t:o:b:r:m:", ["help", "sizes=", "tools=", "output-file=", "baseline=", "repeat=", "mode=", "threshold=", "max-seconds=", "no-memory"])
+  except getopt.GetoptError as err:
+    help()
+    sys.exit(2)
+
+  sizes = defaultSizes
+  tools = benchmarkTools
+  outputFile = None
+  baselineFile = None
+  repeat = 1
+  mode = "sine"
+  threshold = 20
+  maxSeconds = 60
+  traceMemory = True
+
+  for operator, argument in opts:
+    if operator in ("-h", "--help"):
+      help()
+      sys.exit()
+    elif operator in ("-s", "--sizes"):
+      sizes = [int(size) for size in argument.split(",")]
+    elif operator in ("-t", "--tools"):
+      tools = argument.split(",")
+      checkTools(tools)
+    elif operator in ("-o", "--output-file"):
+      outputFile = argument
+    elif operator in ("-b", "--baseline"):
+      baselineFile = argument
+    elif operator in ("-r", "--repeat"):
+      repeat = int(argument)
+    elif operator in ("-m", "--mode"):
+      mode = argument
+    elif operator == "--threshold":
+      threshold = float(argument)
+    elif operator == "--max-seconds":
+      maxSeconds = float(argument)
+    elif operator == "--no-memory":
+      traceMemory = False
+    else:
+      assert False, "unhandled option"
+
+  baseline = None
+  if baselineFile is not None:
+    baseline = readReport(baselineFile)
+
+  with tempfile.TemporaryDirectory() as directory:
+    report = runBenchmark(sizes, tools, directory, repeat, traceMemory, maxSeconds, mode)
+  printReport(report)
+
+  if outputFile is not None:
+    with open(outputFile, "w") as reportFile:
+      json.dump(report, reportFile, indent=2)
+
+  if baseline is not None:
+    try:
+      comparisons = compareResults(report, baseline, threshold / 100)
+    except ValueError as error:
+      printError(str(error))
+    regressions = printComparisons(comparisons)
+    if regressions > 0:
+      print("{} stage(s) slower than {:.0f}% over the baseline".format(regressions, threshold))
+      sys.exit(1)
+
+def printReport(report):
+  print("{:<7} {:<10} {:>6} {:>10} {:>10} {:>14} {:>14}".format("tool", "stage", "size", "seconds", "peak MiB", "pixels/s", "samples/s"))
+  for result in report["results"]:
+    if "skipped" in result:
+      print("{:<7} {:<10} {:>6} skipped, {}".format(result["tool"], result["stage"], result["size"], result["skipped"]))
+      continue
+    print("{:<7} {:<10} {:>6} {:>10.4f} {:>10} {:>14} {:>14}".format(
+      result["tool"], result["stage"], result["size"], result["seconds"],
+      formatValue(result["peakBytes"], 1 / (1 << 20), "{:.1f}"),
+      formatValue(result["pixelsPerSecond"], 1, "{:.0f}"),
+      formatValue(result["samplesPerSecond"], 1, "{:.0f}")))
+
+# prints the comparison and returns the number of regressions
+def printComparisons(comparisons):
+  regressions = 0
+  print("Compared with the baseline:")
+  for result, before, ratio, regressed in comparisons:
+    marker = "  SLOWER" if regressed else ""
+    print("{:<7} {:<10} {:>6} {:>10.4f} -> {:>10.4f} {:>6.2f}x{}".format(result["tool"], result["stage"], result["size"], before["seconds"], result["seconds"], ratio, marker))
+    regressions = regressions + (1 if regressed else 0)
+  return regressions
+
+def formatValue(value, factor, template):
+  return "-" if value is None else template.format(value * factor)
+
+# reads the baseline and checks its version before the benchmark runs
+def readReport(path):
+  try:
+    with open(path) as reportFile:
+      report = json.load(reportFile)
+  except (OSError, ValueError) as error:
+    printError("Baseline not usable: {}".format(error))
+  if isinstance(report, dict) == False or report.get("version") != benchmarkVersion:
+    printError("Baseline not usable: it is not a report of benchmark version {}".format(benchmarkVersion))
+  return report
+
+# checks the tools if there are any validation errors
+def checkTools(tools):
+  for tool in tools:
+    if tool not in benchmarkTools:
+      printError("Tool not supported. Use {}".format(", ".join(benchmarkTools)))
+
+  return True
+
+# help, I need somebody, help!
+def help():
+  print("Usage: ./image-benchmark.py [-s <sizes>] [-t <tools>] [-o <report>] [-b <baseline>]")
+
+# prints an error and exits with 2 after showing help()
+def printError(errorMessage):
+  message = "\033[1mError:\033[0m {}".format(errorMessage)
+  print(message)
+  help()
+  sys.exit(2)
+
+if __name__ == "__main__":
+  main()
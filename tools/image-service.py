@@ -0,0 +1,97 @@
+#!/usr/bin/python3
+
+# NAME
+#   Image service - converts images over http
+#
+# SYNOPSIS
+#   ./image-service.py [-p <port>] [-w <workers>] [-q <queue size>] [--socket <path>]
+#
+# DESCRIPTION
+#   This script serves the converters on localhost. Images are posted to
+#   /render/<tool> and the wave or midi file comes back, wave files of the
+#   image-to-wave converter can be streamed as raw pcm while they are
+#   rendered. Jobs wait in a bounded queue and are rendered by a pool of
+#   worker processes. See tonal/service.py for the whole interface.
+#
+# EXAMPLE:
+#   ./image-service.py -p 8000 -w 4
+#   curl --data-binary @sample.jpg "localhost:8000/render/wave?mode=bank" -o sample.wav
+#   curl -N --data-binary @sample.jpg "localhost:8000/render/wave?stream=1" | aplay -f S16_LE -r 44100
+#   curl --data-binary @sample.jpg -H "X-Job-Id: sgta" localhost:8000/render/midi -o sample.mid
+#   curl -X DELETE localhost:8000/jobs/sgta
+#   curl localhost:8000/metrics
+#
+# OPTIONS
+#   -p|--port       port on localhost, defaults to 8000
+#   --host          address to listen on, defaults to 127.0.0.1
+#   --socket        listen on this unix socket instead
+#   -w|--workers    worker processes rendering the jobs, defaults to 1
+#   -q|--queue-size jobs waiting at most, defaults to 16
+#
+# LEGAL NOTE
+#   Written and maintained by Laura Herzog (laura-herzog@outlook.com)
+#   Permission to copy and modify is granted under the AGPL license
+#   Project Information: https://github.com/lauraherzog/universum-tonal/
+
+import getopt, sys, asyncio
+from tonal.service import RenderService, defaultQueueSize
+
+def main():
+  try:
+    opts, args = getopt.getopt(sys.argv[1:], "hp:w:q:", ["help", "port=", "host=", "socket=", "workers=", "queue-size="])
+  except getopt.GetoptError as err:
+    help()
+    sys.exit(2)
+
+  host = "127.0.0.1"
+  port = 8000
+  socketPath = None
+  workers = 1
+  queueSize = defaultQueueSize
+
+  for operator, argument in opts:
+    if operator in ("-h", "--help"):
+      help()
+      sys.exit()
+    elif operator in ("-p", "--port"):
+      port = int(argument)
+    elif operator == "--host":
+      host = argument
+    elif operator == "--socket":
+      socketPath = argument
+    elif operator in ("-w", "--workers"):
+      workers = int(argument)
+    elif operator in ("-q", "--queue-size"):
+      queueSize = int(argument)
+      checkQueueSize(queueSize)
+    else:
+      assert False, "unhandled option"
+
+  service = RenderService(workers, queueSize)
+  print("Serving on {} with {} worker(s)".format(socketPath or "{}:{}".format(host, port), workers))
+  try:
+    asyncio.run(service.serve(host, port, socketPath))
+  except OSError as error:
+    printError("Can not listen: {}".format(error))
+  print("Stopped")
+
+# checks the queue size if there are any validation errors
+def checkQueueSize(queueSize):
+  if queueSize < 1:
+    printError("The queue needs room for at least one job")
+
+  return True
+
+# help, I need somebody, help!
+def help():
+  print("Usage: ./image-service.py [-p <port>] [-w <workers>] [-q <queue size>] [--socket <path>]")
+
+# prints an error and exists after showing help()
+def printError(errorMessage):
+  message = "\033[1mError:\033[0m {}".format(errorMessage)
+  print(message)
+  help()
+  sys.exit()
+
+if __name__ == "__main__":
+  main()
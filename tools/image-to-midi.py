@@ -13,11 +13,22 @@
 #
 # EXAMPLE:
 #   ./image-to-midi.py -i resources/image-to-midi-sample-sgta.jpg -o image-to-midi-output-sgta.mid
+#   ./image-to-midi.py -i resources/image-to-midi-sample-sgta.jpg -o preview.mid --preview 2
 #
 # OPTIONS
 #   -i|--input-file        path to the input file
 #   -o|--output-file       path to the output file
 #   -b|--ignore-background dark pixel will be ignored
+#   -r|--reduce            read the image at 1/2, 1/4 or 1/8 of its size
+#   -c|--cache-dir         keep converted images and outputs in this directory
+#   --cache-size           size cap of the cache in MiB, defaults to 1024
+#   --preview              render a preview out of this level of the image
+#                          pyramid: every level halves the image, the notes
+#                          are as long as the ones of the full render
+#   -v|--verbose           print the added notes, at most one line per second
+#   --metrics            write stage times, counters and rates as JSON to this file
+#   --profile            profile the run with cProfile and write the stats to this file
+#   --trace-memory       report the peak memory of every stage (slower)
 #
 # LEGAL NOTE
 #   Written and maintained by Laura Herzog (laura-herzog@outlook.com)
@@ -25,14 +36,14 @@
 #   Project Information: https://github.com/lauraherzog/universum-tonal/
 
 import getopt, sys, os.path
-import cv2, colorsys
-import numpy as np
-from pathlib import Path
-from midiutil.MidiFile import MIDIFile
+from tonal.cache import RenderCache
+from tonal.converters import ConversionError, ImageToMidi
+from tonal.imagefile import imageExtensions
+from tonal.metrics import Metrics
 
 def main():
   try:
-    opts, args = getopt.getopt(sys.argv[1:], "vhi:o:b", ["verbose", "help", "input-file", "output-file", "ignore-background"])
+    opts, args = getopt.getopt(sys.argv[1:], "vhi:o:br:c:", ["verbose", "help", "input-file=", "output-file=", "ignore-background", "reduce=", "cache-dir=", "cache-size=", "preview=", "metrics=", "profile=", "trace-memory"])
   except getopt.GetoptError as err:
     help()
     sys.exit(2)
@@ -41,6 +52,13 @@ def main():
   inputFile = None
   outputFile = None
   ignoreBackground = False
+  reduce = 1
+  cacheDirectory = None
+  cacheSize = 1024
+  preview = 0
+  metricsFile = None
+  profileFile = None
+  traceMemory = False
 
   for operator, argument in opts:
     if operator in ("-h", "--help"):
@@ -56,126 +74,71 @@ def main():
       ignoreBackground = True
     elif operator in ("-v", "--verbose"):
       verbose = True
+    elif operator in ("-r", "--reduce"):
+      reduce = int(argument)
+    elif operator in ("-c", "--cache-dir"):
+      cacheDirectory = argument
+    elif operator == "--cache-size":
+      cacheSize = int(argument)
+    elif operator == "--preview":
+      preview = int(argument)
+      checkPreview(preview)
+    elif operator == "--metrics":
+      metricsFile = argument
+    elif operator == "--profile":
+      profileFile = argument
+    elif operator == "--trace-memory":
+      traceMemory = True
     else:
       assert False, "unhandled option"
 
   print("Converting image to midi")
-  print("Step: convertImageToHSV")
-  convertedData = convertImageToHSV(inputFile)
-  print("Step: convertImageToMidi")
-  convertedData = convertHSVToMidi(inputFile, convertedData, ignoreBackground, verbose)
-  print("Step: buildMidiFile")
-  buildMidiFile(convertedData, outputFile, verbose)
+  cache = None
+  if cacheDirectory is not None:
+    cache = RenderCache(cacheDirectory, cacheSize << 20)
+    renderKey = cache.key("image-to-midi", cache.hashFile(inputFile), ignoreBackground, reduce, preview)
+    if cache.fetch(renderKey, outputFile):
+      print("Step: copied from cache")
+      print("Done")
+      return
+
+  metrics = Metrics(profileFile, traceMemory)
+  converter = createConverter(ignoreBackground, reduce, cache, metrics, verbose, preview)
+  try:
+    # the notes are encoded a tile at a time while the file is built, one step
+    print("Step: convertImageToMidi")
+    converter.convert(inputFile, outputFile)
+  except ConversionError as error:
+    printError(error)
+  print("Added {} notes, skipped {} duplicates".format(converter.added, converter.deduped))
+
+  if cache is not None:
+    cache.store(renderKey, outputFile)
+  metrics.finish()
+  if metricsFile is not None:
+    metrics.dump(metricsFile)
   print("Done")
 
-def convertImageToHSV(inputFile):
-  imageObject = cv2.imread(inputFile)
-  imageHeigth, imageWidth, imageChannel = imageObject.shape
-  convertedData = {}
-  # rows from left to right
-  for x in range(0, imageWidth):
-    for y in range(0, imageHeigth):
-      # get rgb value (they are switched in cv2) and convert them to hsv
-      b, g, r = imageObject[x, y]
-      (h, s, v) = convertToHSV(b, g, r)
-      convertedData["{}-{}".format(x,y)] = (h, s, v)
-
-  return convertedData
-
-def convertHSVToMidi(inputFile, data, ignoreBackground, verbose):
-  checkData = []
-  convertedData = {}
-  readAdjacentPixel = []
-  imageObject = cv2.imread(inputFile)
-  imageHeigth, imageWidth, imageChannel = imageObject.shape
-  
-  # rows from left to right
-  for x in range(0, imageWidth):
-    for y in range(0, imageHeigth):
-      if "{}-{}".format(x,y) in readAdjacentPixel:
-        continue
-
-      (h, s, v) = data["{}-{}".format(x,y)]
-
-      # set the note
-      note = int((((h - 0) * (108 - 21)) / (360 - 0)) + 21)
-
-      # set the velocity
-      velocity = int((((s - 0) * (127 - 0)) / (100 - 0)) + 0)
-
-      # set the channel
-      if velocity <= 5:
-        if ignoreBackground == True:
-          continue
-        channel = 15
-      else:
-        channel = int((((v - 0) * (0 - 14)) / (100 - 0)) + 14)
-
-      # set start time
-      start = x
-
-      # set duration based on adjacent pixel
-      duration = 1
-      nextPixel = x + 1
-      while nextPixel < imageWidth:
-
-        nb, ng, nr = imageObject[nextPixel, y]
-        (nh, ns, nv) = convertToHSV(nb, ng, nr)
-
-        if nh == h:
-          duration = duration + 1
-          if "{}-{}".format(nextPixel,y) not in readAdjacentPixel:
-            readAdjacentPixel.append("{}-{}".format(nextPixel,y))
-        else:
-          break
-
-        nextPixel = nextPixel + 1
-
-      if (channel, note, velocity, start) not in checkData:
-        convertedData["{}-{}".format(x,y)] = (channel, note, velocity, start, duration)
-
-    if verbose == True:
-      print("Converted line {} of {}".format(x, imageWidth))
-  return convertedData
-
-def buildMidiFile(data, outputFile, verbose):
-  blockedNotes = []
-
-  # build a mf
-  mf = MIDIFile(16)
-  for i in range(0,15):
-    mf.addTrackName(i, 0, "Track {}".format(i))
-    mf.addTempo(i, 0, 480)
-
-  # add note to that mf
-  for node, note in data.items():
-    channel, pitch, velocity, start, duration = note
-
-    # skip blocked notes
-    if (channel, pitch, start) in blockedNotes:
-      continue
-
-    if (channel, pitch, start) not in blockedNotes:
-      blockedNotes.append((channel, pitch, start))
-      mf.addNote(channel, 0, pitch, start, duration, velocity)
-      if verbose == True:
-        print("Added {}".format(node))
-
-    for d in range(0, duration):
-      start = start + d
-      if (channel, pitch, start) not in blockedNotes:
-        blockedNotes.append((channel, pitch, start))
-
-  outputFile = open(outputFile, "wb")
-  mf.writeFile(outputFile)
+def createConverter(ignoreBackground, reduce, cache, metrics, verbose, preview):
+  try:
+    return ImageToMidi(ignoreBackground, reduce, cache, metrics, verbose, preview)
+  except ConversionError as error:
+    printError(error)
+
+# checks the preview level if there are any validation errors
+def checkPreview(preview):
+  if preview < 0:
+    printError("The preview level has to be 0 or more")
+
+  return True
 
 # checks the inputFile if there are any validation errors
 def checkInputFile(inputFile):
   if os.path.exists(inputFile) == False:
     printError("File not found")
 
-  if inputFile.lower().endswith(('.png', '.jpg', '.jpeg')) == False:
-    printError("Filetype not supported. Use .jpg and .jpeg")
+  if inputFile.lower().endswith(imageExtensions) == False:
+    printError("Filetype not supported. Use .jpg, .jpeg, .png, .npy, .tif or .tiff")
 
   return True
 
@@ -186,11 +149,6 @@ def checkOutputFile(outputFile):
 
   return True
 
-def convertToHSV(b, g, r):
-  (h, s, v) = colorsys.rgb_to_hsv(r / 255, g / 255, b / 255)
-  (h, s, v) = (int(h*360), int(s*100), int(v*100))
-  return (h, s, v)
-
 # help, I need somebody, help!
 def help():
   print("Usage: ./image-to-midi.py -i <source> -o <target> [-bd]")
@@ -21,11 +21,11 @@
 #   Project Information: https://github.com/lauraherzog/universum-tonal/
 
 import getopt, sys, os.path
-import wave, struct, math
+from tonal.converters import Chord
 
 def main():
   try:
-    opts, args = getopt.getopt(sys.argv[1:], "ho:", ["output-file"])
+    opts, args = getopt.getopt(sys.argv[1:], "ho:", ["help", "output-file="])
   except getopt.GetoptError as err:
     help()
     sys.exit(2)
@@ -42,42 +42,9 @@ def main():
     else:
       assert False, "unhandled option"
 
-  generateChord(outputFile)
+  Chord().convert(outputFile)
   print("done")
 
-def generateChord(outputFile):
-  notes = [
-    [246.94, 0.6],
-    [146.83, 0.5],
-    [185.00, 0.7] 
-  ]
-
-  sineList = generateSineWaves(notes)
-
-  # prep the wave file
-  waveFile = wave.open(outputFile,'w')
-  waveFile.setnchannels(1) # mono
-  waveFile.setsampwidth(2)
-  waveFile.setframerate(44100)
-
-  for sine in sineList:
-    waveFile.writeframes(struct.pack('h', int(sine*8000/2)))
-
-  # finished writing
-  waveFile.close()
-
-def generateSineWaves(notes):
-  frameRate = 44100
-  sineList=[]
-
-  for x in range(88200):
-    sineWave = 0
-    for frequency, amplitude in notes:
-      sineWave = sineWave + amplitude * math.sin(2*math.pi*frequency*(x/44100))
-    sineList.append(sineWave)
-
-  return sineList
-
 # checks the ouputFile if there are any validation errors
 def checkOutputFile(outputFile):
   if outputFile.lower().endswith(('.wav')) == False:
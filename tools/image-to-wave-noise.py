@@ -4,18 +4,22 @@
 #   Image to Wave - Noise-Generator
 #
 # SYNOPSIS
-#   ./image-to-wave-noise.py -o <target> [-d <duration>]
+#   ./image-to-wave-noise.py -o <target> [-d <duration>] [-c <color>] [--seed <seed>]
 #
 # DESCRIPTION
 #   This script generates some noise based on the given duration. If no duration
-#   is given the script defaults to five seconds.
+#   is given the script defaults to five seconds. The noise is generated and
+#   written a chunk at a time, so an hour takes seconds and no more memory.
 #
 # EXAMPLE:
 #   ./image-to-wave-noise.py -o noise.wav -d 10
+#   ./image-to-wave-noise.py -o bed.wav -d 3600 -c pink --seed 7
 #
 # OPTIONS
 #   -o|--output-file Path to the output file
 #   -d|--duration    Optional. The duration in seconds. Defaults to 5
+#   -c|--color       Optional. white, pink or brown. Defaults to white
+#   --seed           Optional. The same seed gives the same noise
 #
 # LEGAL NOTE
 #   Written and maintained by Laura Herzog (laura-herzog@outlook.com)
@@ -23,11 +27,12 @@
 #   Project Information: https://github.com/lauraherzog/universum-tonal/
 
 import getopt, sys, os.path
-import wave, struct, math, random
+from tonal.converters import Noise
+from tonal.noise import noiseColors
 
 def main():
   try:
-    opts, args = getopt.getopt(sys.argv[1:], "vho:d:", ["verbose", "output-file", "duration"])
+    opts, args = getopt.getopt(sys.argv[1:], "vho:d:c:", ["verbose", "help", "output-file=", "duration=", "color=", "seed="])
   except getopt.GetoptError as err:
     help()
     sys.exit(2)
@@ -35,6 +40,8 @@ def main():
   verbose = False
   outputFile = None
   duration = 44100 * 5
+  color = "white"
+  seed = None
 
   for operator, argument in opts:
     if operator in ("-h", "--help"):
@@ -47,25 +54,22 @@ def main():
       duration = int(argument) * 44100
     elif operator in ("-v", "--verbose"):
       verbose = True
+    elif operator in ("-c", "--color"):
+      color = argument
+      checkColor(color)
+    elif operator == "--seed":
+      seed = int(argument)
     else:
       assert False, "unhandled option"
 
-  generateNoise(duration, outputFile)
+  Noise(color, seed).convert(duration, outputFile)
 
-def generateNoise(duration, outputFile):
-  sampleRate = 44100
-  frequency = 440
+# checks the color if there are any validation errors
+def checkColor(color):
+  if color not in noiseColors:
+    printError("Color not supported. Use {}".format(", ".join(noiseColors)))
 
-  waveFile = wave.open(outputFile,'w')
-  waveFile.setnchannels(1) # mono
-  waveFile.setsampwidth(2)
-  waveFile.setframerate(sampleRate)
-
-  for i in range(duration):
-    value = random.randint(-32767, 32767)
-    data = struct.pack('<h', value)
-    waveFile.writeframesraw( data )
-  waveFile.close()
+  return True
 
 # checks the ouputFile if there are any validation errors
 def checkOutputFile(outputFile):
@@ -76,7 +80,7 @@ def checkOutputFile(outputFile):
 
 # help, I need somebody, help!
 def help():
-  print("Usage: ./image-to-wave-noise.py -o <target> [-d <duration>]")
+  print("Usage: ./image-to-wave-noise.py -o <target> [-d <duration>] [-c <color>] [--seed <seed>]")
 
 # prints an error and exists after showing help()
 def printError(errorMessage):
@@ -8,13 +8,24 @@
 #
 # DESCRIPTION
 #   This script generates sine waves out of a given pixel from an image.
+#   Every pixel becomes a grain of 256 ticks, the grain of every frequency is
+#   computed once and the pixels are written a block at a time. The image is
+#   converted a strip of rows at a time.
 #
 # EXAMPLE:
 #   ./image-to-wave-pf.py -i sample-image.jpg -o sample-output.wav
+#   ./image-to-wave-pf.py -i sample-image.jpg -o sample-preview.wav --preview 2
 #
 # OPTIONS
-#   -i|--input-file  path to the input file
-#   -o|--output-file path to the output file
+#   -i|--input-file   path to the input file
+#   -o|--output-file  path to the output file
+#   -r|--reduce       read the image at 1/2, 1/4 or 1/8 of its size
+#   -t|--octave-table json file with [lowest, highest] frequency per octave
+#   -c|--cache-dir    keep converted images and outputs in this directory
+#   --cache-size      size cap of the cache in MiB, defaults to 1024
+#   --preview         render a preview out of this level of the image pyramid:
+#                     every level halves the image, a pixel of the level is
+#                     repeated for every pixel it stands for
 #
 # LEGAL NOTE
 #   Written and maintained by Laura Herzog (laura-herzog@outlook.com)
@@ -22,30 +33,25 @@
 #   Project Information: https://github.com/lauraherzog/universum-tonal/
 
 import getopt, sys, os.path
-import cv2, colorsys
-import wave, struct, math, random
-
-octaveFrequencies = [
-  [16.35, 30.87],
-  [32.70, 61.74],
-  [65.41, 123.47],
-  [130.81, 246.94],
-  [261.63, 493.88],
-  [523.25, 987.77],
-  [1046.50, 1975.53],
-  [2093.00, 3951.07],
-  [4186.01,  7902.13]
-]
+from tonal.cache import RenderCache
+from tonal.converters import ConversionError, PixelFrequency
+from tonal.imagefile import imageExtensions
+from tonal.mapping import loadOctaveTable, octaveFrequencies
 
 def main():
   try:
-    opts, args = getopt.getopt(sys.argv[1:], "hi:o:", ["help", "input-file", "output-file"])
+    opts, args = getopt.getopt(sys.argv[1:], "hi:o:r:t:c:", ["help", "input-file=", "output-file=", "reduce=", "octave-table=", "cache-dir=", "cache-size=", "preview="])
   except getopt.GetoptError as err:
     help()
     sys.exit(2)
 
   inputFile = None
   outputFile = None
+  octaveTable = octaveFrequencies
+  reduce = 1
+  cacheDirectory = None
+  cacheSize = 1024
+  preview = 0
 
   for operator, argument in opts:
     if operator in ("-h", "--help"):
@@ -57,72 +63,68 @@ def main():
     elif operator in ("-o", "--output-file"):
       outputFile = argument
       checkOutputFile(outputFile)
+    elif operator in ("-r", "--reduce"):
+      reduce = int(argument)
+    elif operator in ("-t", "--octave-table"):
+      octaveTable = readOctaveTable(argument)
+    elif operator in ("-c", "--cache-dir"):
+      cacheDirectory = argument
+    elif operator == "--cache-size":
+      cacheSize = int(argument)
+    elif operator == "--preview":
+      preview = int(argument)
+      checkPreview(preview)
     else:
       assert False, "unhandled option"
 
-  print("Step: convertImageToHSV")
-  convertedData = convertImageToHSV(inputFile)
-  print("Step: convertHSVtoWave")
-  convertHSVtoWave(convertedData, outputFile)
-  print("Done")
-
-def convertImageToHSV(inputFile):
-  imageObject = cv2.imread(inputFile)
-  imageHeigth, imageWidth, imageChannel = imageObject.shape
-  convertedData = {}
-  # rows from left to right
-  for y in range(0, imageHeigth):
-    for x in range(0, imageWidth):
-      # get rgb value (they are switched in cv2) and convert them to hsv
-      b, g, r = imageObject[x, y]
-      (h, s, v) = convertToHSV(b, g, r)
-      convertedData["{}-{}".format(x,y)] = (h, s, v)
-
-  return convertedData
-
-def convertHSVtoWave(data, outputFile):
-
-  frameRate = 44100
-
-  # prepare the sine waves
-  sineList = []
-  for coordinates in data:
-    (h, s, v) = data[coordinates]
-
-    octave = int((((v - 0) * (8 - (0))) / (100 - 0)) + (0))
-    frequency = int((((h - 0) * (octaveFrequencies[octave][1] - (octaveFrequencies[octave][0]))) / (360 - 0)) + (octaveFrequencies[octave][0]))
-    amplitude = (((s - 0) * (1 - (0))) / (100 - 0)) + (0)
+  cache = None
+  if cacheDirectory is not None:
+    cache = RenderCache(cacheDirectory, cacheSize << 20)
+    renderKey = cache.key("image-to-wave-pf", cache.hashFile(inputFile), octaveTable, reduce, preview)
+    if cache.fetch(renderKey, outputFile):
+      print("Step: copied from cache")
+      print("Done")
+      return
+
+  converter = createConverter(octaveTable, reduce, cache, preview)
+  # the rows are read and rendered a strip at a time, one step
+  try:
+    print("Step: convertHSVtoWave")
+    converter.convert(inputFile, outputFile)
+  except ConversionError as error:
+    printError(error)
 
-    # generate a sine wave with 256 ticks
-    for x in range(256):
-      sineWave = 0
-      sineWave = sineWave + amplitude * math.sin(2*math.pi*frequency*(x/frameRate))
-      sineList.append(sineWave)
+  if cache is not None:
+    cache.store(renderKey, outputFile)
+  print("Done")
 
-  # prep the wave file
-  waveFile = wave.open(outputFile,'w')
-  waveFile.setnchannels(1) # mono
-  waveFile.setsampwidth(2)
-  waveFile.setframerate(frameRate)
+def createConverter(octaveTable, reduce, cache, preview):
+  try:
+    return PixelFrequency(octaveTable, reduce, cache, preview=preview)
+  except ConversionError as error:
+    printError(error)
 
-  for sine in sineList:
-    waveFile.writeframes(struct.pack('h', int(sine*44100/2)))
+# reads a custom octave table
+def readOctaveTable(path):
+  try:
+    return loadOctaveTable(path)
+  except (OSError, ValueError) as error:
+    printError("Octave table not usable: {}".format(error))
 
-  # finished writing
-  waveFile.close()
+# checks the preview level if there are any validation errors
+def checkPreview(preview):
+  if preview < 0:
+    printError("The preview level has to be 0 or more")
 
-def convertToHSV(b, g, r):
-  (h, s, v) = colorsys.rgb_to_hsv(r / 255, g / 255, b / 255)
-  (h, s, v) = (int(h*360), int(s*100), int(v*100))
-  return (h, s, v)
+  return True
 
 # checks the inputFile if there are any validation errors
 def checkInputFile(inputFile):
   if os.path.exists(inputFile) == False:
     printError("File not found")
 
-  if inputFile.lower().endswith(('.png', '.jpg', '.jpeg')) == False:
-    printError("Filetype not supported. Use .jpg and .jpeg")
+  if inputFile.lower().endswith(imageExtensions) == False:
+    printError("Filetype not supported. Use .jpg, .jpeg, .png, .npy, .tif or .tiff")
 
   return True
 
@@ -7,14 +7,21 @@
 #   ./image-to-wave-pp.py -i <source> -o <target>
 #
 # DESCRIPTION
-#   This script generates some noise based on the given image.
+#   This script generates some noise based on the given image. Every pixel
+#   becomes one sample, its hue is mapped to the int16 range. The image is
+#   converted and written a chunk at a time.
 #
 # EXAMPLE:
 #   ./image-to-wave-pp.py -i sample-image.jpg -o sample-output.wav
+#   ./image-to-wave-pp.py -i sample-image.jpg -o sample-output.wav --scan hilbert
 #
 # OPTIONS
 #   -i|--input-file  path to the input file
 #   -o|--output-file path to the output file
+#   -r|--reduce      read the image at 1/2, 1/4 or 1/8 of its size
+#   --scan           order of the pixels: column (top to bottom, columns from
+#                    left to right, default), row (left to right, rows from
+#                    top to bottom) or hilbert (along a Hilbert curve)
 #
 # LEGAL NOTE
 #   Written and maintained by Laura Herzog (laura-herzog@outlook.com)
@@ -22,18 +29,21 @@
 #   Project Information: https://github.com/lauraherzog/universum-tonal/
 
 import getopt, sys, os.path
-import cv2, colorsys
-import wave, struct, math, random
+from tonal.converters import ConversionError, PixelByPixel
+from tonal.imagefile import imageExtensions
+from tonal.scan import scanOrders
 
 def main():
   try:
-    opts, args = getopt.getopt(sys.argv[1:], "hi:o:", ["help", "input-file", "output-file"])
+    opts, args = getopt.getopt(sys.argv[1:], "hi:o:r:", ["help", "input-file=", "output-file=", "reduce=", "scan="])
   except getopt.GetoptError as err:
     help()
     sys.exit(2)
 
   inputFile = None
   outputFile = None
+  reduce = 1
+  order = "column"
 
   for operator, argument in opts:
     if operator in ("-h", "--help"):
@@ -45,60 +55,44 @@ def main():
     elif operator in ("-o", "--output-file"):
       outputFile = argument
       checkOutputFile(outputFile)
+    elif operator in ("-r", "--reduce"):
+      reduce = int(argument)
+    elif operator == "--scan":
+      order = argument
+      checkOrder(order)
     else:
       assert False, "unhandled option"
 
-  print("Step: convertImageToHSV")
-  convertedData = convertImageToHSV(inputFile)
-  print("Step: convertHSVtoWave")
-  convertHSVtoWave(convertedData, outputFile, verbose)
+  converter = createConverter(order, reduce)
+  try:
+    print("Step: readImage")
+    imageObject = converter.readImage(inputFile)
+    print("Step: convertImageToWave")
+    converter.convert(imageObject, outputFile)
+  except ConversionError as error:
+    printError(error)
   print("Done")
 
-def convertImageToHSV(inputFile):
-  imageObject = cv2.imread(inputFile)
-  imageHeigth, imageWidth, imageChannel = imageObject.shape
-  convertedData = {}
-  # rows from left to right
-  for x in range(0, imageWidth):
-    for y in range(0, imageHeight):
-      # get rgb value (they are switched in cv2) and convert them to hsv
-      b, g, r = imageObject[x, y]
-      (h, s, v) = convertToHSV(b, g, r)
-      convertedData["{}-{}".format(x,y)] = (h, s, v)
-
-  return convertedData
-
-def convertHSVtoWave(data, outputFile, verbose):
-
-  # prep the wave file
-  waveFile = wave.open(outputFile,'w')
-  waveFile.setnchannels(1) # mono
-  waveFile.setsampwidth(2)
-  waveFile.setframerate(44100)
-
-  for coordinates in data:
-    (h, s, v) = data[coordinates]
-
-    # i just need the hue value and convert it to the frequency for that tick
-    frequency = int((((h - 0) * (32767 - (-32767))) / (360 - 0)) + (-32767))
-    tickData = struct.pack('<h', frequency)
-    waveFile.writeframesraw( tickData )
+def createConverter(order, reduce):
+  try:
+    return PixelByPixel(order, reduce)
+  except ConversionError as error:
+    printError(error)
 
-  # finished writing
-  waveFile.close()
+# checks the scan order if there are any validation errors
+def checkOrder(order):
+  if order not in scanOrders:
+    printError("Scan order not supported. Use {}".format(", ".join(scanOrders)))
 
-def convertToHSV(b, g, r):
-  (h, s, v) = colorsys.rgb_to_hsv(r / 255, g / 255, b / 255)
-  (h, s, v) = (int(h*360), int(s*100), int(v*100))
-  return (h, s, v)
+  return True
 
 # checks the inputFile if there are any validation errors
 def checkInputFile(inputFile):
   if os.path.exists(inputFile) == False:
     printError("File not found")
 
-  if inputFile.lower().endswith(('.png', '.jpg', '.jpeg')) == False:
-    printError("Filetype not supported. Use .jpg and .jpeg")
+  if inputFile.lower().endswith(imageExtensions) == False:
+    printError("Filetype not supported. Use .jpg, .jpeg, .png, .npy, .tif or .tiff")
 
   return True
 
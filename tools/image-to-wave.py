@@ -10,15 +10,45 @@
 #   This script converts images (currently jpg files) to wave files. It reads
 #   images from left to right row by row and decides what octave, frequency and
 #   velocity a pixel has - based on the properties of the HSL color system.
+#   The decoded image is converted and rendered a few rows at a time while
+#   the wave file is written, nothing else grows with the size of the image.
 #
 # EXAMPLE:
 #   ./image-to-wave.py -i sample.jpg -o sample.wav
+#   ./image-to-wave.py -i sample.jpg --stream - | aplay -f S16_LE -r 44100
+#   ./image-to-wave.py -i sample.jpg -o sample.wav --incremental
+#   ./image-to-wave.py -i sample.jpg -o sample-preview.wav --preview 2
 #
 # OPTIONS
 #   -i|--input-file       path to the input file
 #   -o|--output-file      path to the output file
 #   -s|--sample-rate      the length of one row
 #   -f|--ignore-frequency frequencies till this will be ignored
+#   -w|--workers          render the rows with this many processes
+#   -m|--mode             sine: one sine per pixel (default)
+#                         bank: one oscillator per distinct frequency of a row
+#                         continuous: bank without restarting the phase every
+#                         row, volume changes are faded in to avoid clicks
+#                         spectrogram: every row is a spectrum, rendered with
+#                         an inverse FFT and overlap-add
+#   -r|--reduce           read the image at 1/2, 1/4 or 1/8 of its size
+#   -t|--octave-table     json file with [lowest, highest] frequency per octave
+#   -c|--cache-dir        keep converted images and outputs in this directory
+#   --cache-size          size cap of the cache in MiB, defaults to 1024
+#   --preview             render a preview out of this level of the image
+#                         pyramid: every level halves the image and is about 4x
+#                         faster, the output has the same length as the full
+#                         render. Levels are kept in the cache directory
+#   --incremental         render only the rows that changed since the last
+#                         --incremental run into the existing output file, the
+#                         hashes of the rows are kept in <output>.columns
+#   --stream              play while rendering instead of writing a file: raw
+#                         16 bit pcm to - (stdout), unix:<socket> or a pipe
+#   --latency             milliseconds buffered ahead when streaming,
+#                         defaults to 200
+#   --metrics             write stage times, counters and rates as JSON to this file
+#   --profile             profile the run with cProfile and write the stats to this file
+#   --trace-memory        report the peak memory of every stage (slower)
 #
 # LEGAL NOTE
 #   Written and maintained by Laura Herzog (laura-herzog@outlook.com)
@@ -26,33 +56,39 @@
 #   Project Information: https://github.com/lauraherzog/universum-tonal/
 
 import getopt, sys, os.path
-import cv2, colorsys
-import wave, struct, math, random
+from tonal.cache import RenderCache
+from tonal.converters import ConversionError, ImageToWave, waveModes
+from tonal.imagefile import imageExtensions
+from tonal.mapping import loadOctaveTable, octaveFrequencies
+from tonal.metrics import Metrics
+from tonal.stream import PcmStreamer
 
 frameRate = 44100
-octaveFrequencies = [
-  [16.35, 30.87],
-  [32.70, 61.74],
-  [65.41, 123.47],
-  [130.81, 246.94],
-  [261.63, 493.88],
-  [523.25, 987.77],
-  [1046.50, 1975.53],
-  [2093.00, 3951.07],
-  [4186.01,  7902.13]
-]
 
 def main():
   try:
-    opts, args = getopt.getopt(sys.argv[1:], "hi:o:f:s:", ["help", "input-file", "output-file", "ignore-frequency", "sample-rate"])
+    opts, args = getopt.getopt(sys.argv[1:], "hi:o:f:s:w:m:r:t:c:", ["help", "input-file=", "output-file=", "ignore-frequency=", "sample-rate=", "workers=", "mode=", "reduce=", "octave-table=", "cache-dir=", "cache-size=", "preview=", "incremental", "stream=", "latency=", "metrics=", "profile=", "trace-memory"])
   except getopt.GetoptError as err:
     help()
     sys.exit(2)
 
   lowestFrequency = 16.35
   sampleRate = 2048
+  workers = 1
+  mode = "sine"
+  reduce = 1
   inputFile = None
   outputFile = None
+  octaveTable = octaveFrequencies
+  cacheDirectory = None
+  cacheSize = 1024
+  preview = 0
+  incremental = False
+  streamTarget = None
+  latency = 200
+  metricsFile = None
+  profileFile = None
+  traceMemory = False
 
   for operator, argument in opts:
     if operator in ("-h", "--help"):
@@ -68,82 +104,134 @@ def main():
       lowestFrequency = float(argument)
     elif operator in ("-s", "--sample-rate"):
       sampleRate = int(argument)
+    elif operator in ("-w", "--workers"):
+      workers = int(argument)
+    elif operator in ("-m", "--mode"):
+      mode = argument
+      checkMode(mode)
+    elif operator in ("-r", "--reduce"):
+      reduce = int(argument)
+    elif operator in ("-t", "--octave-table"):
+      octaveTable = readOctaveTable(argument)
+    elif operator in ("-c", "--cache-dir"):
+      cacheDirectory = argument
+    elif operator == "--cache-size":
+      cacheSize = int(argument)
+    elif operator == "--preview":
+      preview = int(argument)
+      checkPreview(preview)
+    elif operator == "--incremental":
+      incremental = True
+    elif operator == "--stream":
+      streamTarget = argument
+    elif operator == "--latency":
+      latency = int(argument)
+    elif operator == "--metrics":
+      metricsFile = argument
+    elif operator == "--profile":
+      profileFile = argument
+    elif operator == "--trace-memory":
+      traceMemory = True
     else:
       assert False, "unhandled option"
 
-  print("Step: convertImageToData")
-  convertedData = convertImageToData(inputFile)
-  print("Step: convertDataToWave")
-  convertDataToWave(convertedData, outputFile, sampleRate, lowestFrequency)
-
-def convertDataToWave(data, outputFile, sampleRate, lowestFrequency):
-
-  # prep the wave file
-  waveFile = wave.open(outputFile,'w')
-  waveFile.setnchannels(1) # mono
-  waveFile.setsampwidth(2)
-  waveFile.setframerate(frameRate)
-
-  i = 0
-  for notes in data:
-    sineList = []
-    print("Generating sine waves for row {}".format(i))
-    sineList = generateSineWaves(notes, sampleRate, lowestFrequency)
-    for sine in sineList:
-      waveFile.writeframes(struct.pack('h', int(sine*250/2)))
-    i = i + 1
-
-  # finished writing
-  waveFile.close()
-
-def generateSineWaves(notes, sampleRate, lowestFrequency):
-  sineList=[]
-
-  for x in range(sampleRate):
-    sineWave = 0
-    for frequency, amplitude in notes:
-      if frequency < lowestFrequency:
-        continue
-      sineWave = sineWave + amplitude * math.sin(2*math.pi*frequency*(x/frameRate))
-    sineList.append(sineWave)
-
-  return sineList
-
-def convertImageToData(inputFile):
-  imageObject = cv2.imread(inputFile)
-  imageHeigth, imageWidth, imageChannel = imageObject.shape
-  
-  rows = []
-  # rows from left to right
-  for x in range(0, imageWidth):
-    rowData = []
-    for y in range(0, imageHeigth):
-
-      # get rgb value (they are switched in cv2) and convert them to hsv
-      b, g, r = imageObject[x, y]
-      (h, s, v) = convertToHSV(b, g, r)
-
-      octave = int((((v - 0) * (8 - (0))) / (100 - 0)) + (0))
-      frequency = int((((h - 0) * (octaveFrequencies[octave][1] - (octaveFrequencies[octave][0]))) / (360 - 0)) + (octaveFrequencies[octave][0]))
-      amplitude = (((s - 0) * (1 - (0))) / (100 - 0)) + (0)
-
-      rowData.append((frequency, amplitude))
-    rows.append(rowData)
-
-  return rows
-
-def convertToHSV(b, g, r):
-  (h, s, v) = colorsys.rgb_to_hsv(r / 255, g / 255, b / 255)
-  (h, s, v) = (int(h*360), int(s*100), int(v*100))
-  return (h, s, v)
+  if incremental and (streamTarget is not None or outputFile is None):
+    printError("--incremental needs an output file")
+
+  streamer = None
+  if streamTarget is not None:
+    streamer = openStream(streamTarget, latency)
+    # the samples own stdout now, messages go to stderr
+    if streamTarget == "-":
+      sys.stdout = sys.stderr
+
+  cache = None
+  if cacheDirectory is not None:
+    cache = RenderCache(cacheDirectory, cacheSize << 20)
+    renderKey = cache.key("image-to-wave", cache.hashFile(inputFile), sampleRate, lowestFrequency, octaveTable, mode, reduce, preview)
+    # a copy from the cache would not match the hashes of the rows
+    if streamer is None and incremental == False and cache.fetch(renderKey, outputFile):
+      print("Step: copied from cache")
+      return
+
+  metrics = Metrics(profileFile, traceMemory)
+  converter = createConverter(sampleRate, lowestFrequency, octaveTable, mode, workers, reduce, cache, metrics, preview)
+  # the rows are read and rendered a tile at a time, one step
+  print("Step: convertImageToWave")
+  try:
+    if incremental:
+      rowsRendered = converter.update(inputFile, outputFile)
+      print("Rendered {} of {} rows".format(rowsRendered, converter.readWidth(inputFile)))
+      framesWritten = rowsRendered * sampleRate
+    else:
+      framesWritten = converter.convert(inputFile, streamer if streamer is not None else outputFile)
+  except OSError as error:
+    if streamer is None:
+      raise
+    printError("Stream closed: {}".format(error))
+  except ConversionError as error:
+    printError(error)
+  finally:
+    converter.close()
+    # the converter closes the streamer when it is done, not on errors
+    if streamer is not None:
+      streamer.close()
+
+  if converter.clipped > 0:
+    print("Clipped {} of {} samples".format(converter.clipped, framesWritten))
+  if mode != "sine" and converter.notes > 0:
+    print("Rendered {} notes with {} oscillators ({:.1f}x fewer)".format(converter.notes, converter.oscillators, converter.notes / max(converter.oscillators, 1)))
+
+  if streamer is not None:
+    print("Streamed {} samples, {} underruns, up to {:.0f} ms buffered".format(streamer.framesWritten, streamer.underruns, streamer.maxLatency * 1000))
+  elif cache is not None:
+    cache.store(renderKey, outputFile)
+
+  metrics.finish()
+  if metricsFile is not None:
+    metrics.dump(metricsFile)
+
+def createConverter(sampleRate, lowestFrequency, octaveTable, mode, workers, reduce, cache, metrics, preview):
+  try:
+    return ImageToWave(sampleRate, lowestFrequency, octaveTable, mode, workers, reduce, cache, metrics, preview)
+  except ConversionError as error:
+    printError(error)
+
+# connects to the stream target
+def openStream(streamTarget, latency):
+  try:
+    return PcmStreamer(streamTarget, frameRate, latency / 1000)
+  except OSError as error:
+    printError("Stream target not usable: {}".format(error))
+
+# reads a custom octave table
+def readOctaveTable(path):
+  try:
+    return loadOctaveTable(path)
+  except (OSError, ValueError) as error:
+    printError("Octave table not usable: {}".format(error))
+
+# checks the preview level if there are any validation errors
+def checkPreview(preview):
+  if preview < 0:
+    printError("The preview level has to be 0 or more")
+
+  return True
+
+# checks the mode if there are any validation errors
+def checkMode(mode):
+  if mode not in waveModes:
+    printError("Mode not supported. Use sine, bank, continuous or spectrogram")
+
+  return True
 
 # checks the inputFile if there are any validation errors
 def checkInputFile(inputFile):
   if os.path.exists(inputFile) == False:
     printError("File not found")
 
-  if inputFile.lower().endswith(('.png', '.jpg', '.jpeg')) == False:
-    printError("Filetype not supported. Use .jpg and .jpeg")
+  if inputFile.lower().endswith(imageExtensions) == False:
+    printError("Filetype not supported. Use .jpg, .jpeg, .png, .npy, .tif or .tiff")
 
   return True
 
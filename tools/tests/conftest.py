@@ -0,0 +1,44 @@
+# NAME
+#   conftest - shared fixtures of the tests
+#
+# DESCRIPTION
+#   The tests import the tonal package from the tools folder and run the
+#   scripts in it, run them from anywhere with
+#     python3 -m pytest tools/tests
+#
+# LEGAL NOTE
+#   Written and maintained by Laura Herzog (laura-herzog@outlook.com)
+#   Permission to copy and modify is granted under the AGPL license
+#   Project Information: https://github.com/lauraherzog/universum-tonal/
+
+import os, sys, subprocess
+import cv2
+import numpy as np
+import pytest
+
+toolsDirectory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, toolsDirectory)
+
+# a small random image, the same for every test
+def makeImage(height=40, width=30, seed=0):
+  rng = np.random.default_rng(seed)
+  return rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+
+# runs a script of the tools folder, returns the finished process
+def runScript(script, *arguments):
+  return subprocess.run([sys.executable, os.path.join(toolsDirectory, script)] + list(arguments), capture_output=True, text=True, cwd=toolsDirectory)
+
+# the bytes of a file written by a test
+def readFile(path):
+  with open(path, "rb") as source:
+    return source.read()
+
+@pytest.fixture
+def imageObject():
+  return makeImage()
+
+@pytest.fixture
+def imageFile(tmp_path, imageObject):
+  path = str(tmp_path / "image.png")
+  cv2.imwrite(path, imageObject)
+  return path
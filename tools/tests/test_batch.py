@@ -0,0 +1,41 @@
+# NAME
+#   test_batch - inputs and outputs of image-batch
+#
+# LEGAL NOTE
+#   Written and maintained by Laura Herzog (laura-herzog@outlook.com)
+#   Permission to copy and modify is granted under the AGPL license
+#   Project Information: https://github.com/lauraherzog/universum-tonal/
+
+import os
+import cv2
+import numpy as np
+import pytest
+from tonal.batch import collectInputs, convertImage
+
+def test_inputsDifferingInTheExtensionKeepIt(tmp_path, imageObject):
+  cv2.imwrite(str(tmp_path / "wide.png"), imageObject)
+  np.save(str(tmp_path / "wide.npy"), imageObject)
+  cv2.imwrite(str(tmp_path / "tall.png"), imageObject)
+  pairs = collectInputs(str(tmp_path), "out", "wave")
+  assert sorted(os.path.basename(outputFile) for inputFile, outputFile in pairs) == ["tall.wav", "wide.npy.wav", "wide.png.wav"]
+
+def test_duplicateOutputsAreRejected(tmp_path, imageObject):
+  cv2.imwrite(str(tmp_path / "a.png"), imageObject)
+  cv2.imwrite(str(tmp_path / "b.png"), imageObject)
+  manifest = tmp_path / "manifest.txt"
+  manifest.write_text("a.png same.wav\nb.png same.wav\n")
+  with pytest.raises(ValueError):
+    collectInputs(str(manifest), "out", "wave")
+
+# a missing input is one failed item, even if its output exists
+def test_missingInputFailsItsItem(tmp_path):
+  outputFile = tmp_path / "gone.wav"
+  outputFile.write_bytes(b"old")
+  result = convertImage("wave", str(tmp_path / "gone.png"), str(outputFile), {})
+  assert result["error"] is not None
+  assert result["skipped"] == False
+
+def test_outputsGetTheSuffixOfTheTool(tmp_path, imageObject):
+  cv2.imwrite(str(tmp_path / "image.png"), imageObject)
+  pairs = collectInputs(str(tmp_path), "out", "pf")
+  assert [os.path.basename(outputFile) for inputFile, outputFile in pairs] == ["image-pf.wav"]
@@ -0,0 +1,43 @@
+# NAME
+#   test_benchmark - the regression gate of image-benchmark
+#
+# LEGAL NOTE
+#   Written and maintained by Laura Herzog (laura-herzog@outlook.com)
+#   Permission to copy and modify is granted under the AGPL license
+#   Project Information: https://github.com/lauraherzog/universum-tonal/
+
+import json
+import pytest
+from conftest import runScript
+from tonal.benchmark import benchmarkVersion, compareResults
+
+def makeReport(*results, version=benchmarkVersion):
+  return {"version": version, "results": [{"tool": tool, "stage": stage, "size": size, "seconds": seconds} for tool, stage, size, seconds in results]}
+
+# only stages in both reports with a time are compared
+def test_stagesAreMatchedByToolStageAndSize():
+  baseline = makeReport(("wave", "synthesis", 64, 1.0), ("wave", "synthesis", 256, 2.0), ("midi", "encode", 64, 0.5))
+  report = makeReport(("wave", "synthesis", 64, 1.1), ("wave", "synthesis", 1024, 9.0), ("midi", "build", 64, 0.5))
+  report["results"].append({"tool": "midi", "stage": "encode", "size": 64, "skipped": "too slow"})
+  comparisons = compareResults(report, baseline, 0.2)
+  assert [(result["tool"], result["stage"], result["size"]) for result, before, ratio, regressed in comparisons] == [("wave", "synthesis", 64)]
+  assert comparisons[0][1]["seconds"] == 1.0
+
+# a stage exactly at the threshold is not a regression, above it is
+def test_thresholdBoundary():
+  baseline = makeReport(("wave", "synthesis", 64, 1.0), ("midi", "encode", 64, 1.0))
+  report = makeReport(("wave", "synthesis", 64, 1.5), ("midi", "encode", 64, 1.5001))
+  assert [regressed for result, before, ratio, regressed in compareResults(report, baseline, 0.5)] == [False, True]
+
+def test_otherVersionsAreNotCompared():
+  with pytest.raises(ValueError):
+    compareResults(makeReport(), makeReport(version=benchmarkVersion - 1), 0.2)
+
+# an unusable baseline or tool fails the script before anything runs
+def test_unusableInputsExitWithTwo(tmp_path):
+  oldBaseline = str(tmp_path / "old.json")
+  with open(oldBaseline, "w") as reportFile:
+    json.dump(makeReport(version=benchmarkVersion - 1), reportFile)
+  assert runScript("image-benchmark.py", "-b", oldBaseline).returncode == 2
+  assert runScript("image-benchmark.py", "-b", str(tmp_path / "missing.json")).returncode == 2
+  assert runScript("image-benchmark.py", "-t", "video").returncode == 2
@@ -0,0 +1,84 @@
+# NAME
+#   test_cache - the content addressed render cache
+#
+# LEGAL NOTE
+#   Written and maintained by Laura Herzog (laura-herzog@outlook.com)
+#   Permission to copy and modify is granted under the AGPL license
+#   Project Information: https://github.com/lauraherzog/universum-tonal/
+
+import os
+import cv2
+import numpy as np
+import pytest
+from conftest import makeImage, readFile, runScript
+from tonal.cache import RenderCache
+from tonal.converters import ImageToMidi, ImageToWave, PixelFrequency
+from tonal.pixels import PixelStore, stripHeight, tileWidth
+from tonal.pyramid import buildLevel
+
+# a render from the cached planes is the same as one from the image
+def test_cachedPixelsRenderTheSame(tmp_path, imageFile):
+  cache = RenderCache(str(tmp_path / "cache"))
+  expected = ImageToWave(sampleRate=256).render(imageFile)
+  assert ImageToWave(sampleRate=256, cache=cache).render(imageFile) == expected
+  assert ImageToWave(sampleRate=256, cache=cache).render(imageFile) == expected
+  assert any(name.endswith(".npy") for name in os.listdir(str(tmp_path / "cache")))
+
+# midi converts tiles of columns and pf strips of rows, never the whole image,
+# with and without the cache
+@pytest.mark.parametrize("converterClass", [ImageToMidi, PixelFrequency])
+def test_imagesAreConvertedInParts(tmp_path, monkeypatch, converterClass):
+  # few colors, so runs go on across the tiles
+  imageObject = makeImage(stripHeight + 20, tileWidth * 2 + 5) // 128 * 255
+  imageFile = str(tmp_path / "image.png")
+  cv2.imwrite(imageFile, imageObject)
+  expected = converterClass().render(PixelStore.fromImage(imageObject))
+
+  shapes = []
+  fromImage = PixelStore.fromImage
+  monkeypatch.setattr(PixelStore, "fromImage", lambda part: shapes.append(part.shape[:2]) or fromImage(part))
+  cache = RenderCache(str(tmp_path / "cache"))
+  assert converterClass().render(imageFile) == expected
+  assert converterClass(cache=cache).render(imageFile) == expected
+  assert converterClass(cache=cache).render(imageFile) == expected
+  assert len(shapes) > 0
+  assert all(width <= tileWidth or height <= stripHeight for height, width in shapes)
+
+def test_cachedLevelsMatchThePyramid(tmp_path, imageFile, imageObject):
+  cache = RenderCache(str(tmp_path / "cache"))
+  for level in (2, 1, 2):
+    (levelImage, imageHeight, imageWidth) = cache.loadLevel(imageFile, level)
+    assert np.array_equal(levelImage, buildLevel(imageObject, level))
+    assert (imageHeight, imageWidth) == imageObject.shape[:2]
+
+# the output is copied from the cache only for the same parameters
+def test_outputsAreKeyedOnTheParameters(tmp_path, imageFile):
+  cacheDirectory = str(tmp_path / "cache")
+  first = str(tmp_path / "first.wav")
+  second = str(tmp_path / "second.wav")
+  other = str(tmp_path / "other.wav")
+  assert "copied from cache" not in runScript("image-to-wave.py", "-i", imageFile, "-o", first, "-s", "256", "-c", cacheDirectory).stdout
+  assert "copied from cache" in runScript("image-to-wave.py", "-i", imageFile, "-o", second, "-s", "256", "-c", cacheDirectory).stdout
+  assert "copied from cache" not in runScript("image-to-wave.py", "-i", imageFile, "-o", other, "-s", "512", "-c", cacheDirectory).stdout
+  assert readFile(first) == readFile(second)
+  assert readFile(first) != readFile(other)
+
+# the least recently used entries go first, a hit counts as a use
+def test_evictsLeastRecentlyUsed(tmp_path):
+  cache = RenderCache(str(tmp_path / "cache"), maxBytes=2500)
+  outputFile = str(tmp_path / "output")
+  def store(name):
+    with open(outputFile, "wb") as output:
+      output.write(name.encode() * 1000)
+    cache.store(cache.key(name), outputFile)
+
+  # a and b stored long ago, a used again since
+  for seconds, name in enumerate(("a", "b"), 1):
+    store(name)
+    os.utime(cache.path(cache.key(name), ".out"), ns=(0, seconds * 10**9))
+  assert cache.fetch(cache.key("a"), outputFile)
+  store("c")
+
+  assert cache.lookup(cache.key("a"), ".out") is not None
+  assert cache.lookup(cache.key("b"), ".out") is None
+  assert cache.lookup(cache.key("c"), ".out") is not None
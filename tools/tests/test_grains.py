@@ -0,0 +1,37 @@
+# NAME
+#   test_grains - the per pixel grains of image-to-wave-pf
+#
+# LEGAL NOTE
+#   Written and maintained by Laura Herzog (laura-herzog@outlook.com)
+#   Permission to copy and modify is granted under the AGPL license
+#   Project Information: https://github.com/lauraherzog/universum-tonal/
+
+import math
+import numpy as np
+from tonal.grains import grainLength, renderGrains
+from tonal.mapping import octaveFrequencies
+
+# a table of the -t option, with fewer octaves than the default one
+customTable = [[55.0, 110.0], [110.0, 220.0], [220.5, 439.0]]
+
+# the samples of a pixel the way the per pixel loop of image-to-wave-pf made them
+def loopGrain(h, s, v, octaveTable, frameRate=44100):
+  octave = int((((v - 0) * ((len(octaveTable) - 1) - (0))) / (100 - 0)) + (0))
+  frequency = int((((h - 0) * (octaveTable[octave][1] - (octaveTable[octave][0]))) / (360 - 0)) + (octaveTable[octave][0]))
+  amplitude = (((s - 0) * (1 - (0))) / (100 - 0)) + (0)
+  return [math.sin(2*math.pi*frequency*(tick/frameRate)) * amplitude for tick in range(grainLength)]
+
+# pixels in every octave of the table, the grains of the default table
+# rendered before do not leak into the ones of the custom table
+def test_customOctaveTable():
+  hue = np.array([0, 90, 180, 360, 45, 270], dtype=np.uint16)
+  saturation = np.array([100, 50, 0, 25, 75, 100], dtype=np.uint8)
+  value = np.array([0, 30, 49, 50, 99, 100], dtype=np.uint8)
+  default = renderGrains(hue, saturation, value, octaveFrequencies, np.empty((len(hue), grainLength)))
+  custom = renderGrains(hue, saturation, value, customTable, np.empty((len(hue), grainLength)))
+
+  expected = [loopGrain(h, s, v, customTable) for h, s, v in zip(hue.tolist(), saturation.tolist(), value.tolist())]
+  assert custom.tolist() == expected
+  # silent pixels are silent with any table, the others change with it
+  assert np.all(custom[2] == 0)
+  assert all(np.array_equal(default[i], custom[i]) == False for i in (0, 1, 3, 4, 5))
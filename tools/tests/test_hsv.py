@@ -0,0 +1,30 @@
+# NAME
+#   test_hsv - the vectorized HSV conversion against colorsys
+#
+# LEGAL NOTE
+#   Written and maintained by Laura Herzog (laura-herzog@outlook.com)
+#   Permission to copy and modify is granted under the AGPL license
+#   Project Information: https://github.com/lauraherzog/universum-tonal/
+
+import numpy as np
+from conftest import makeImage
+from tonal.hsv import HueTable, checkParity, convertToHSV, convertToHSVPlanes
+
+# a grid of the rgb cube gives the same integers as the per pixel colorsys
+def test_planesMatchColorsys():
+  assert checkParity()
+
+def test_columnOrderKeepsTheValues(imageObject):
+  rowPlanes = convertToHSVPlanes(imageObject)
+  columnPlanes = convertToHSVPlanes(imageObject, order="F")
+  for rowPlane, columnPlane in zip(rowPlanes, columnPlanes):
+    assert np.array_equal(rowPlane, columnPlane)
+
+# hues of colors seen before come from the table, new ones are converted
+def test_hueTableMatchesThePlanes():
+  table = HueTable()
+  for seed in range(3):
+    imageObject = makeImage(50, 40, seed)
+    assert np.array_equal(table.convert(imageObject), convertToHSVPlanes(imageObject)[0])
+  (b, g, r) = imageObject[7, 9].tolist()
+  assert table.convert(imageObject[7:8, 9:10])[0, 0] == convertToHSV(b, g, r)[0]
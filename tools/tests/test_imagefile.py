@@ -0,0 +1,31 @@
+# NAME
+#   test_imagefile - opening images
+#
+# LEGAL NOTE
+#   Written and maintained by Laura Herzog (laura-herzog@outlook.com)
+#   Permission to copy and modify is granted under the AGPL license
+#   Project Information: https://github.com/lauraherzog/universum-tonal/
+
+import cv2
+import pytest
+from conftest import makeImage, runScript
+from tonal.converters import ConversionError, ImageToWave
+from tonal.imagefile import openImage
+
+@pytest.fixture
+def tinyFile(tmp_path):
+  path = str(tmp_path / "tiny.png")
+  cv2.imwrite(path, makeImage(7, 9))
+  return path
+
+# cv2 fails on reduced reads of images smaller than the reduction
+def test_tinyReducedImageIsAValueError(tinyFile):
+  with pytest.raises(ValueError):
+    openImage(tinyFile, 8)
+  with pytest.raises(ConversionError):
+    ImageToWave(reduce=8).readImage(tinyFile)
+
+def test_tinyReducedImageIsReported(tmp_path, tinyFile):
+  result = runScript("image-to-wave.py", "-i", tinyFile, "-o", str(tmp_path / "tiny.wav"), "-r", "8")
+  assert "Traceback" not in result.stderr
+  assert "could not be decoded" in result.stdout
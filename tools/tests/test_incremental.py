@@ -0,0 +1,47 @@
+# NAME
+#   test_incremental - updates of a wave file against full renders
+#
+# LEGAL NOTE
+#   Written and maintained by Laura Herzog (laura-herzog@outlook.com)
+#   Permission to copy and modify is granted under the AGPL license
+#   Project Information: https://github.com/lauraherzog/universum-tonal/
+
+import pytest
+from conftest import makeImage, readFile
+from tonal.converters import ImageToWave, columnsPerTask
+
+# columns at both edges, a run longer than a batch and single ones in between
+def editImage(imageObject):
+  edited = imageObject.copy()
+  for left, right in ((0, 1), (5, 6), (7, 8 + columnsPerTask), (imageObject.shape[1] - 1, imageObject.shape[1])):
+    edited[:, left:right] = 255 - edited[:, left:right]
+  return edited
+
+@pytest.mark.parametrize("mode", ["sine", "bank", "continuous", "spectrogram"])
+@pytest.mark.parametrize("workers", [1, 2])
+def test_updateMatchesFullRender(tmp_path, mode, workers):
+  imageObject = makeImage(20, 40, seed=4)
+  edited = editImage(imageObject)
+  outputFile = str(tmp_path / "update.wav")
+  with ImageToWave(sampleRate=256, mode=mode, workers=workers) as converter:
+    assert converter.update(imageObject, outputFile) == 40
+    rendered = converter.update(edited, outputFile)
+  # continuous and spectrogram also render the column after every edited run
+  changed = 4 + columnsPerTask
+  assert rendered == (changed if mode in ("sine", "bank") else changed + 3)
+  assert readFile(outputFile) == ImageToWave(sampleRate=256, mode=mode).render(edited)
+
+def test_unchangedImageRendersNothing(tmp_path, imageObject):
+  outputFile = str(tmp_path / "update.wav")
+  converter = ImageToWave(sampleRate=256)
+  converter.update(imageObject, outputFile)
+  assert converter.update(imageObject, outputFile) == 0
+
+# other parameters or a file written by something else mean a full render
+def test_mismatchesRenderEverything(tmp_path, imageObject):
+  outputFile = str(tmp_path / "update.wav")
+  ImageToWave(sampleRate=256).update(imageObject, outputFile)
+  assert ImageToWave(sampleRate=512).update(imageObject, outputFile) == imageObject.shape[1]
+  ImageToWave(sampleRate=512).convert(editImage(imageObject), outputFile)
+  assert ImageToWave(sampleRate=512).update(imageObject, outputFile) == imageObject.shape[1]
+  assert readFile(outputFile) == ImageToWave(sampleRate=512).render(imageObject)
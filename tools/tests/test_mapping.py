@@ -0,0 +1,57 @@
+# NAME
+#   test_mapping - the lookup tables against the per pixel formulas
+#
+# LEGAL NOTE
+#   Written and maintained by Laura Herzog (laura-herzog@outlook.com)
+#   Permission to copy and modify is granted under the AGPL license
+#   Project Information: https://github.com/lauraherzog/universum-tonal/
+
+import json
+import numpy as np
+import pytest
+from tonal.mapping import convertToFrequencies, convertToMidi, convertToSamples, loadOctaveTable, octaveFrequencies
+
+# every quantized hue and value once, the saturation goes along with the value
+# (frequency and channel depend on two of the planes, amplitude and velocity on one)
+hue, value = (plane.ravel() for plane in np.meshgrid(np.arange(361), np.arange(101), indexing="ij"))
+saturation = (value * 37) % 101
+
+# the octave, frequency and amplitude of a pixel the way image-to-wave picked
+# them, spread over the octaves of the table
+def mapPixel(h, s, v, octaveTable):
+  octave = int((((v - 0) * ((len(octaveTable) - 1) - (0))) / (100 - 0)) + (0))
+  frequency = int((((h - 0) * (octaveTable[octave][1] - (octaveTable[octave][0]))) / (360 - 0)) + (octaveTable[octave][0]))
+  amplitude = (((s - 0) * (1 - (0))) / (100 - 0)) + (0)
+  return (frequency, amplitude)
+
+def test_defaultTableMatchesTheFormulas():
+  (frequencies, amplitudes) = convertToFrequencies(hue, saturation, value)
+  expected = [mapPixel(h, s, v, octaveFrequencies) for h, s, v in zip(hue.tolist(), saturation.tolist(), value.tolist())]
+  assert list(zip(frequencies.tolist(), amplitudes.tolist())) == expected
+
+# a table of the -t option, with fewer octaves than the default one
+def test_customTableMatchesTheFormulas(tmp_path):
+  path = tmp_path / "octaves.json"
+  path.write_text(json.dumps([[55, 110], [110, 220], [220.5, 439]]))
+  octaveTable = loadOctaveTable(str(path))
+  (frequencies, amplitudes) = convertToFrequencies(hue, saturation, value, octaveTable)
+  expected = [mapPixel(h, s, v, octaveTable) for h, s, v in zip(hue.tolist(), saturation.tolist(), value.tolist())]
+  assert list(zip(frequencies.tolist(), amplitudes.tolist())) == expected
+
+def test_midiAndSamplesMatchTheFormulas():
+  saturation, value = (plane.ravel() for plane in np.meshgrid(np.arange(101), np.arange(101), indexing="ij"))
+  hue = (saturation * 101 + value) % 361
+  (notes, velocities, channels) = convertToMidi(hue, saturation, value)
+  for h, s, v, note, velocity, channel in zip(hue.tolist(), saturation.tolist(), value.tolist(), notes.tolist(), velocities.tolist(), channels.tolist()):
+    assert note == int((((h - 0) * (108 - 21)) / (360 - 0)) + 21)
+    assert velocity == int((((s - 0) * (127 - 0)) / (100 - 0)) + 0)
+    assert channel == (15 if velocity <= 5 else int((((v - 0) * (0 - 14)) / (100 - 0)) + 14))
+  samples = convertToSamples(np.arange(361))
+  assert samples.tolist() == [int((((h - 0) * (32767 - (-32767))) / (360 - 0)) + (-32767)) for h in range(361)]
+
+def test_brokenTablesAreRejected(tmp_path):
+  path = tmp_path / "octaves.json"
+  for table in ([], [[55]], [[55, "110"]], {"a": 1}):
+    path.write_text(json.dumps(table))
+    with pytest.raises(ValueError):
+      loadOctaveTable(str(path))
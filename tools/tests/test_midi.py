@@ -0,0 +1,95 @@
+# NAME
+#   test_midi - the run-length note encoder
+#
+# LEGAL NOTE
+#   Written and maintained by Laura Herzog (laura-herzog@outlook.com)
+#   Permission to copy and modify is granted under the AGPL license
+#   Project Information: https://github.com/lauraherzog/universum-tonal/
+
+import numpy as np
+import pytest
+from conftest import makeImage
+from tonal.converters import ImageToMidi
+from tonal.mapping import buildMidiTables, convertToMidi
+from tonal.metrics import Metrics
+from tonal.midi import NoteIndex, encodeRuns
+from tonal.pixels import PixelStore, iterateTiles
+
+# the library prints nothing, verbose lines go through the metrics
+def test_verboseEncodingLogsThroughMetrics(capsys):
+  imageObject = makeImage(20, 600)
+  list(ImageToMidi(verbose=True).encode(imageObject))
+  assert capsys.readouterr().out == ""
+
+  list(ImageToMidi(metrics=Metrics(interval=3600), verbose=True).encode(imageObject))
+  lines = capsys.readouterr().out.splitlines()
+  assert lines == ["Converted columns 0 to 64 of 600"]
+
+# the index against a set of every covered tick, in and out of start order
+def test_noteIndexMatchesCoveredTicks():
+  rng = np.random.default_rng(0)
+  notes = list(zip(rng.integers(0, 2, 400).tolist(), rng.integers(60, 63, 400).tolist(), rng.integers(0, 200, 400).tolist(), rng.integers(1, 12, 400).tolist()))
+  for ordered in (sorted(notes, key=lambda note: note[2]), notes):
+    index = NoteIndex()
+    covered = set()
+    for channel, pitch, start, duration in ordered:
+      expected = (channel, pitch, start) not in covered
+      if expected:
+        covered.update((channel, pitch, tick) for tick in range(start, start + duration))
+      assert index.add(channel, pitch, start, duration) == expected
+    assert index.added + index.deduped == len(notes)
+
+# the notes of the batches with their ends filled in, in the order they come
+def collectNotes(batches):
+  notes = []
+  openNotes = {}
+  for (rows, ends), (noteRows, channels, pitches, velocities, starts, noteEnds) in batches:
+    for row, end in zip(rows.tolist(), ends.tolist()):
+      if row in openNotes:
+        notes[openNotes.pop(row)][4] = end
+    for row, channel, pitch, velocity, start, end in zip(noteRows.tolist(), channels.tolist(), pitches.tolist(), velocities.tolist(), starts.tolist(), noteEnds.tolist()):
+      if end < 0:
+        openNotes[row] = len(notes)
+      notes.append([channel, pitch, velocity, start, end, row])
+  assert len(openNotes) == 0
+  return notes
+
+# a note per run of equal hue in every row, walked pixel by pixel
+def walkRuns(data, ignoreBackground):
+  notes = []
+  for y in range(data.height):
+    (hue, saturation, value) = data.row(y)
+    x = 0
+    while x < data.width:
+      end = x + 1
+      while end < data.width and hue[end] == hue[x]:
+        end = end + 1
+      for start in range(x, end):
+        if ignoreBackground == False or buildMidiTables()[1][saturation[start]] > 5:
+          (pitch, velocity, channel) = (int(values[0]) for values in convertToMidi(hue[start:start + 1], saturation[start:start + 1], value[start:start + 1]))
+          notes.append([channel, pitch, velocity, start, end, y])
+          break
+      x = end
+  return sorted(notes, key=lambda note: (note[3], note[5]))
+
+# runs longer than a tile, dark rows and background
+@pytest.mark.parametrize("ignoreBackground", [False, True])
+def test_tilesMatchThePixelWalk(ignoreBackground):
+  rng = np.random.default_rng(6)
+  palette = rng.integers(0, 256, (5, 3), dtype=np.uint8)
+  palette[0] = 0
+  imageObject = palette[np.repeat(rng.integers(0, 5, (12, 20)), rng.integers(1, 40, 20), axis=1)]
+  imageObject[::5] = 0
+  data = PixelStore.fromImage(imageObject)
+  notes = collectNotes(encodeRuns(iterateTiles(imageObject, 16), ignoreBackground))
+  assert notes == walkRuns(data, ignoreBackground)
+
+def test_openNotesCoverUntilClosed():
+  index = NoteIndex()
+  assert index.open(0, 60, 5)
+  assert index.add(0, 60, 4, 1)
+  assert index.add(0, 60, 7, 3) == False
+  index.close(0, 60, 5, 9)
+  assert index.add(0, 60, 8, 2) == False
+  assert index.add(0, 60, 9, 2)
+  assert (index.added, index.deduped) == (3, 2)
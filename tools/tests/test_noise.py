@@ -0,0 +1,34 @@
+# NAME
+#   test_noise - seeded noise in chunks
+#
+# LEGAL NOTE
+#   Written and maintained by Laura Herzog (laura-herzog@outlook.com)
+#   Permission to copy and modify is granted under the AGPL license
+#   Project Information: https://github.com/lauraherzog/universum-tonal/
+
+import numpy as np
+import pytest
+from tonal.converters import Noise
+from tonal.noise import NoiseGenerator, colorLevel
+from tonal.wavewriter import saturate
+
+# the same seed gives the same samples however the duration is split up,
+# the running sums of pink and brown noise only differ in the last bits
+@pytest.mark.parametrize("color", ["white", "pink", "brown"])
+def test_chunksDoNotChangeTheSamples(color):
+  whole = NoiseGenerator(color, seed=5).generate(50000)
+  generator = NoiseGenerator(color, seed=5)
+  chunks = [generator.generate(count) for count in (1, 999, 4096, 20000, 24904)]
+  assert np.array_equal(saturate(np.concatenate(chunks), 32767)[0], saturate(whole, 32767)[0])
+  assert np.allclose(np.concatenate(chunks), whole, rtol=0, atol=1e-12)
+
+@pytest.mark.parametrize("color", ["white", "pink", "brown"])
+def test_seedsRenderTheSameFile(color):
+  assert Noise(color, seed=7).render(44100) == Noise(color, seed=7).render(44100)
+  assert Noise(color, seed=7).render(44100) != Noise(color, seed=8).render(44100)
+
+def test_levels():
+  assert np.abs(NoiseGenerator("white", seed=1).generate(100000)).max() <= 1
+  for color in ("pink", "brown"):
+    samples = NoiseGenerator(color, seed=1).generate(1 << 18)
+    assert np.sqrt(np.mean(samples ** 2)) == pytest.approx(colorLevel, rel=0.5)
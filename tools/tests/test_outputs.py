@@ -0,0 +1,46 @@
+# NAME
+#   test_outputs - the files of the scripts against the ones before the rewrite
+#
+# DESCRIPTION
+#   The digests are of the files the original per pixel scripts wrote for a
+#   24x24 test image. They read the image with x and y swapped, so the
+#   scripts of today get the image transposed to write the same file.
+#
+# LEGAL NOTE
+#   Written and maintained by Laura Herzog (laura-herzog@outlook.com)
+#   Permission to copy and modify is granted under the AGPL license
+#   Project Information: https://github.com/lauraherzog/universum-tonal/
+
+import hashlib
+import cv2
+import pytest
+from conftest import makeImage, readFile, runScript
+
+def fileDigest(path):
+  return hashlib.sha256(readFile(path)).hexdigest()
+
+@pytest.fixture
+def originalImage(tmp_path):
+  path = str(tmp_path / "original.png")
+  cv2.imwrite(path, makeImage(24, 24).transpose(1, 0, 2).copy())
+  return path
+
+def test_waveMatchesTheOriginal(tmp_path, originalImage):
+  outputFile = str(tmp_path / "wave.wav")
+  assert runScript("image-to-wave.py", "-i", originalImage, "-o", outputFile).returncode == 0
+  assert fileDigest(outputFile) == "688cac2bccb1ecf26041bf86b225193814beabb373acff6f765fd4eb0e844767"
+
+def test_pixelFrequencyMatchesTheOriginal(tmp_path, originalImage):
+  outputFile = str(tmp_path / "pf.wav")
+  assert runScript("image-to-wave-pf.py", "-i", originalImage, "-o", outputFile).returncode == 0
+  assert fileDigest(outputFile) == "20f3fa904277a43148f62f339fafff4f8703c70ea9d5c3570c7aa3418f26b6c8"
+
+def test_chordMatchesTheOriginal(tmp_path):
+  outputFile = str(tmp_path / "chord.wav")
+  assert runScript("image-to-wave-chord.py", "-o", outputFile).returncode == 0
+  assert fileDigest(outputFile) == "666b3e2b8fff6d142ac7993afffa2dcf5cdd17713a9fc59166cb11f498acfa5e"
+
+def test_midiMatchesTheOriginal(tmp_path, originalImage):
+  outputFile = str(tmp_path / "notes.mid")
+  assert runScript("image-to-midi.py", "-i", originalImage, "-o", outputFile).returncode == 0
+  assert fileDigest(outputFile) == "e51301f169c357fbb3d1c2e172c625d8ca4e543479c38a164edef56e56b138d5"
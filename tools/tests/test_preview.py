@@ -0,0 +1,44 @@
+# NAME
+#   test_preview - previews out of the image pyramid
+#
+# LEGAL NOTE
+#   Written and maintained by Laura Herzog (laura-herzog@outlook.com)
+#   Permission to copy and modify is granted under the AGPL license
+#   Project Information: https://github.com/lauraherzog/universum-tonal/
+
+import pytest
+from conftest import makeImage
+from tonal.converters import ConversionError, ImageToWave, PixelFrequency
+from tonal.pyramid import buildLevel, levelRepeats
+
+# odd sizes leave smaller blocks at the right and bottom edge
+def test_levelsCoverTheImage():
+  imageObject = makeImage(37, 21)
+  for level in range(4):
+    levelImage = buildLevel(imageObject, level)
+    assert levelImage.shape[:2] == (len(levelRepeats(37, level)), len(levelRepeats(21, level)))
+    assert levelRepeats(37, level).sum() == 37
+    assert levelRepeats(21, level).sum() == 21
+
+# a preview is as long as the full render
+@pytest.mark.parametrize("level", [1, 2, 3])
+def test_previewsKeepTheLength(level):
+  imageObject = makeImage(37, 21)
+  for converter in (lambda preview: ImageToWave(sampleRate=256, preview=preview), lambda preview: PixelFrequency(preview=preview)):
+    assert len(converter(level).render(imageObject)) == len(converter(0).render(imageObject))
+
+def test_levelZeroIsTheFullRender(imageObject):
+  assert ImageToWave(sampleRate=256, preview=0).render(imageObject) == ImageToWave(sampleRate=256).render(imageObject)
+
+def test_previewsCanNotBeUpdated(tmp_path, imageObject):
+  with pytest.raises(ConversionError):
+    ImageToWave(preview=1).update(imageObject, str(tmp_path / "preview.wav"))
+  with pytest.raises(ConversionError):
+    ImageToWave(preview=-1)
+
+# an image of one color averages to itself, so the preview lines up with the full render
+def test_previewLinesUpWithTheRender():
+  imageObject = makeImage(1, 1).repeat(37, axis=0).repeat(21, axis=1)
+  for level in (1, 3):
+    assert ImageToWave(sampleRate=256, preview=level).render(imageObject) == ImageToWave(sampleRate=256).render(imageObject)
+    assert PixelFrequency(preview=level).render(imageObject) == PixelFrequency().render(imageObject)
@@ -0,0 +1,51 @@
+# NAME
+#   test_scan - the scan orders of image-to-wave-pp
+#
+# LEGAL NOTE
+#   Written and maintained by Laura Herzog (laura-herzog@outlook.com)
+#   Permission to copy and modify is granted under the AGPL license
+#   Project Information: https://github.com/lauraherzog/universum-tonal/
+
+import numpy as np
+import pytest
+from tonal.scan import iterateScan, scanOrders
+
+# stands in for the HueTable, the "hue" of a pixel is its index
+class IndexTable:
+
+  def convert(self, imageObject):
+    return imageObject[..., 0].astype(np.int64) + 256 * imageObject[..., 1].astype(np.int64) + 65536 * imageObject[..., 2].astype(np.int64)
+
+# an image whose pixels hold their index (row * width + column) in b, g and r
+def makeIndexImage(height, width):
+  indices = np.arange(height * width).reshape(height, width)
+  return np.dstack((indices % 256, indices // 256 % 256, indices // 65536)).astype(np.uint8)
+
+def scan(height, width, order):
+  chunks = list(iterateScan(makeIndexImage(height, width), order, IndexTable()))
+  return np.concatenate(chunks).tolist() if len(chunks) > 0 else []
+
+# every pixel once, also over several chunks, tiles and blocks
+@pytest.mark.parametrize("order", scanOrders)
+@pytest.mark.parametrize("height, width", [(0, 5), (1, 1), (5, 7), (7, 5), (8, 8), (300, 20), (20, 600), (260, 300)])
+def test_ordersArePermutations(order, height, width):
+  assert sorted(scan(height, width, order)) == list(range(height * width))
+
+def test_smallGridOrders():
+  assert scan(3, 4, "row") == [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11]
+  assert scan(3, 4, "column") == [0, 4, 8, 1, 5, 9, 2, 6, 10, 3, 7, 11]
+  assert scan(4, 4, "hilbert") == [0, 1, 5, 4, 8, 12, 13, 9, 10, 14, 15, 11, 7, 6, 2, 3]
+  # two blocks of 2x2 side by side
+  assert scan(2, 4, "hilbert") == [0, 4, 5, 1, 2, 6, 7, 3]
+  # a 4x4 curve without the points outside the image
+  assert scan(3, 3, "hilbert") == [0, 1, 4, 3, 6, 7, 8, 5, 2]
+
+# within a square block the curve only ever steps to a neighbouring pixel
+@pytest.mark.parametrize("side", [2, 16, 512])
+def test_hilbertStepsToNeighbours(side):
+  (rows, columns) = np.divmod(np.array(scan(side, side, "hilbert")), side)
+  assert np.all(np.abs(np.diff(rows)) + np.abs(np.diff(columns)) == 1)
+
+def test_unknownOrderIsAValueError():
+  with pytest.raises(ValueError):
+    list(iterateScan(makeIndexImage(2, 2), "spiral"))
@@ -0,0 +1,40 @@
+# NAME
+#   test_scripts - the command lines of the image-to-* scripts
+#
+# LEGAL NOTE
+#   Written and maintained by Laura Herzog (laura-herzog@outlook.com)
+#   Permission to copy and modify is granted under the AGPL license
+#   Project Information: https://github.com/lauraherzog/universum-tonal/
+
+import subprocess, sys
+from conftest import readFile, runScript, toolsDirectory
+
+# long options take their values with a space or with =
+def test_waveLongOptions(tmp_path, imageFile):
+  short = str(tmp_path / "short.wav")
+  spaced = str(tmp_path / "spaced.wav")
+  joined = str(tmp_path / "joined.wav")
+  assert runScript("image-to-wave.py", "-i", imageFile, "-o", short, "-s", "512", "-w", "2").returncode == 0
+  assert runScript("image-to-wave.py", "--input-file", imageFile, "--output-file", spaced, "--sample-rate", "512", "--workers", "2").returncode == 0
+  assert runScript("image-to-wave.py", "--input-file=" + imageFile, "--output-file=" + joined, "--sample-rate=512", "--workers=2", "--ignore-frequency=16.35").returncode == 0
+  assert readFile(short) == readFile(spaced) == readFile(joined)
+
+def test_otherScriptsLongOptions(tmp_path, imageFile):
+  for script, suffix in (("image-to-wave-pf.py", ".wav"), ("image-to-wave-pp.py", ".wav"), ("image-to-midi.py", ".mid")):
+    output = str(tmp_path / ("out" + suffix))
+    result = runScript(script, "--input-file", imageFile, "--output-file", output)
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert readFile(output) != b""
+  assert runScript("image-to-wave-noise.py", "--output-file", str(tmp_path / "noise.wav"), "--duration", "1").returncode == 0
+  assert runScript("image-to-wave-chord.py", "--output-file", str(tmp_path / "chord.wav")).returncode == 0
+
+# the self checks of the modules run on their own, without the converters
+# loaded by the package first
+def test_moduleChecksRunWithoutWarnings():
+  for module in ("tonal.hsv", "tonal.synthesis"):
+    result = subprocess.run([sys.executable, "-W", "error::RuntimeWarning", "-m", module], capture_output=True, text=True, cwd=toolsDirectory)
+    assert result.returncode == 0, result.stderr
+    assert "Warning" not in result.stderr
+  # the converters are loaded once they are asked for
+  result = subprocess.run([sys.executable, "-c", "import sys, tonal.hsv; loaded = 'tonal.converters' in sys.modules; from tonal import Noise; print(loaded, Noise.__module__)"], capture_output=True, text=True, cwd=toolsDirectory)
+  assert result.stdout.split() == ["False", "tonal.converters"]
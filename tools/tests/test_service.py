@@ -0,0 +1,204 @@
+# NAME
+#   test_service - the streamed responses of the render service
+#
+# LEGAL NOTE
+#   Written and maintained by Laura Herzog (laura-herzog@outlook.com)
+#   Permission to copy and modify is granted under the AGPL license
+#   Project Information: https://github.com/lauraherzog/universum-tonal/
+
+import asyncio, json, threading
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+import numpy as np
+import pytest
+from conftest import makeImage
+from tonal import synthesis
+from tonal.converters import ConversionError, ImageToWave
+from tonal.service import Job, RenderService, decodeImage
+
+# collects what the service sends
+class Writer:
+
+  def __init__(self):
+    self.data = b""
+
+  def write(self, data):
+    self.data = self.data + data
+
+  async def drain(self):
+    pass
+
+# the chunks of a chunked response, up to the empty one that ends it
+def readChunks(response):
+  body = response.split(b"\r\n\r\n", 1)[1]
+  chunks = []
+  while True:
+    (size, body) = body.split(b"\r\n", 1)
+    size = int(size, 16)
+    chunks.append(body[:size])
+    body = body[size + 2:]
+    if size == 0:
+      return (chunks, body)
+
+def streamJob(imageObject, settings):
+  async def run():
+    service = RenderService()
+    service.pool = ThreadPoolExecutor(1)
+    job = Job("1", "wave", settings, cv2.imencode(".png", imageObject)[1].tobytes(), 1, 5, True)
+    job.writer = Writer()
+    try:
+      await service.stream(job)
+    finally:
+      service.pool.shutdown()
+    return job.writer.data
+  return asyncio.run(run())
+
+# a batch without samples must not end the response early
+def test_emptyBatchesAreNotSent(monkeypatch, imageObject):
+  renderColumns = synthesis.renderColumns
+  calls = []
+  def renderSome(*batch):
+    calls.append(1)
+    (blocks, clipped, notes, oscillators) = renderColumns(*batch)
+    return ([] if len(calls) == 1 else blocks, clipped, notes, oscillators)
+  monkeypatch.setattr(synthesis, "renderColumns", renderSome)
+
+  (chunks, rest) = readChunks(streamJob(imageObject, {"sampleRate": 256}))
+  assert len(calls) > 1
+  assert chunks[-1] == b""
+  assert all(len(chunk) > 0 for chunk in chunks[:-1])
+  assert rest == b""
+
+def test_streamMatchesTheFile(imageObject):
+  (chunks, rest) = readChunks(streamJob(imageObject, {"sampleRate": 256, "mode": "bank"}))
+  waveData = ImageToWave(sampleRate=256, mode="bank").render(imageObject)
+  assert waveData.endswith(b"".join(chunks))
+
+def test_sampleRateHasToBeAboveZero():
+  with pytest.raises(ConversionError):
+    ImageToWave(sampleRate=0)
+
+def test_undecodableImagesAreConversionErrors():
+  with pytest.raises(ConversionError):
+    decodeImage(b"no image at all")
+  # cv2 fails on reduced reads of images smaller than the reduction
+  tinyImage = cv2.imencode(".png", np.zeros((1, 1, 3), dtype=np.uint8))[1].tobytes()
+  with pytest.raises(ConversionError):
+    decodeImage(tinyImage, 8)
+
+# starts the service on a free port of localhost, returns (task, port)
+async def startService(service):
+  task = asyncio.create_task(service.serve("127.0.0.1", 0))
+  while service.server is None:
+    assert task.done() == False
+    await asyncio.sleep(0.01)
+  return (task, service.server.sockets[0].getsockname()[1])
+
+async def stopService(task):
+  task.cancel()
+  await asyncio.gather(task, return_exceptions=True)
+
+# sends a request and leaves the connection open, like a client waiting for its answer
+async def sendRequest(port, method, path, body=b"", headers={}):
+  (reader, writer) = await asyncio.open_connection("127.0.0.1", port)
+  lines = ["{} {} HTTP/1.1".format(method, path), "Host: localhost", "Content-Length: {}".format(len(body))]
+  lines = lines + ["{}: {}".format(name, value) for name, value in headers.items()] + ["", ""]
+  writer.write("\r\n".join(lines).encode("latin-1") + body)
+  await writer.drain()
+  return (reader, writer)
+
+# the whole response, the service closes every connection after it
+async def readResponse(reader, writer):
+  response = await asyncio.wait_for(reader.read(), 30)
+  writer.close()
+  return response
+
+async def fetch(port, method, path, body=b"", headers={}):
+  return await readResponse(*await sendRequest(port, method, path, body, headers))
+
+def encodeImage(imageObject):
+  return cv2.imencode(".png", imageObject)[1].tobytes()
+
+# rendering waits for the test, so jobs stay running as long as it needs them to
+def holdRendering(monkeypatch, service):
+  released = threading.Event()
+  renderColumns = synthesis.renderColumns
+  monkeypatch.setattr(synthesis, "renderColumns", lambda *batch: released.wait(30) and renderColumns(*batch))
+  service.pool.shutdown()
+  service.pool = ThreadPoolExecutor(4)
+  return released
+
+async def waitForState(service, jobId, state):
+  while jobId not in service.jobs or service.jobs[jobId].state != state:
+    await asyncio.sleep(0.01)
+
+# the pcm of a streamed job arrives in full over the socket
+def test_streamOverASocket(imageObject):
+  async def run():
+    service = RenderService(workers=1)
+    (task, port) = await startService(service)
+    try:
+      response = await fetch(port, "POST", "/render/wave?sampleRate=256&mode=bank&stream=1", encodeImage(imageObject))
+    finally:
+      await stopService(task)
+    return response
+  response = asyncio.run(run())
+  assert response.startswith(b"HTTP/1.1 200 OK\r\n")
+  assert b"Transfer-Encoding: chunked" in response
+  (chunks, rest) = readChunks(response)
+  data = b"".join(chunks)
+  assert len(data) == imageObject.shape[1] * 256 * 2
+  assert ImageToWave(sampleRate=256, mode="bank").render(imageObject).endswith(data)
+
+# one job running, one waiting in the queue of one, the next one is turned away
+def test_fullQueueIsAnswered503(monkeypatch):
+  image = encodeImage(makeImage(20, 10))
+  async def run():
+    service = RenderService(workers=1, queueSize=1)
+    (task, port) = await startService(service)
+    released = holdRendering(monkeypatch, service)
+    try:
+      running = await sendRequest(port, "POST", "/render/wave?sampleRate=256&stream=1", image, {"X-Job-Id": "running"})
+      await waitForState(service, "running", "running")
+      queued = await sendRequest(port, "POST", "/render/wave?sampleRate=256&stream=1", image, {"X-Job-Id": "queued"})
+      while service.queue.qsize() == 0:
+        await asyncio.sleep(0.01)
+      rejected = await fetch(port, "POST", "/render/wave?sampleRate=256&stream=1", image)
+      released.set()
+      responses = [await readResponse(*running), await readResponse(*queued)]
+    finally:
+      released.set()
+      await stopService(task)
+    return (rejected, responses, service.metrics.counters)
+  (rejected, responses, counters) = asyncio.run(run())
+  assert rejected.startswith(b"HTTP/1.1 503 Service Unavailable\r\n")
+  assert b"Retry-After: 1" in rejected
+  assert json.loads(rejected.split(b"\r\n\r\n", 1)[1]) == {"error": "Queue is full"}
+  assert all(response.endswith(b"0\r\n\r\n") for response in responses)
+  assert (counters["accepted"], counters["rejected"], counters["completed"]) == (2, 1, 2)
+
+# DELETE stops a streaming job after the batch it is on
+def test_deleteCancelsARunningJob(monkeypatch):
+  image = encodeImage(makeImage(20, 10))
+  async def run():
+    service = RenderService(workers=1)
+    (task, port) = await startService(service)
+    released = holdRendering(monkeypatch, service)
+    try:
+      running = await sendRequest(port, "POST", "/render/wave?sampleRate=256&stream=1", image, {"X-Job-Id": "1"})
+      await waitForState(service, "1", "running")
+      deleted = await fetch(port, "DELETE", "/jobs/1")
+      response = await readResponse(*running)
+      jobs = await fetch(port, "GET", "/jobs")
+    finally:
+      released.set()
+      await stopService(task)
+    return (deleted, response, jobs, service.metrics.counters)
+  (deleted, response, jobs, counters) = asyncio.run(run())
+  assert deleted.startswith(b"HTTP/1.1 204 No Content\r\n")
+  # the headers went out before it was cancelled, the body just ends
+  assert response.startswith(b"HTTP/1.1 200 OK\r\n")
+  assert response.endswith(b"0\r\n\r\n") == False
+  assert jobs.split(b"\r\n\r\n", 1)[1] == b"[]"
+  assert counters["cancelled"] == 1
+  assert "completed" not in counters
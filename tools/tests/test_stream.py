@@ -0,0 +1,104 @@
+# NAME
+#   test_stream - the ring buffer and the pacing of the live pcm output
+#
+# LEGAL NOTE
+#   Written and maintained by Laura Herzog (laura-herzog@outlook.com)
+#   Permission to copy and modify is granted under the AGPL license
+#   Project Information: https://github.com/lauraherzog/universum-tonal/
+
+import time
+import numpy as np
+import pytest
+from tonal import stream
+from tonal.stream import PcmStreamer, RingBuffer
+
+# collects what the sender hands over, fails from the given write on
+class Sink:
+
+  def __init__(self, failAfter=None):
+    self.data = b""
+    self.writes = 0
+    self.failAfter = failAfter
+
+  def write(self, data):
+    self.writes = self.writes + 1
+    if self.failAfter is not None and self.writes > self.failAfter:
+      raise ValueError("sink failed")
+    self.data = self.data + data
+
+  def flush(self):
+    pass
+
+  def samples(self):
+    return np.frombuffer(self.data, dtype="<i2")
+
+# 1000 samples a second, chunks of 20 and a budget of 50
+def openStreamer(monkeypatch, sink):
+  monkeypatch.setattr(stream, "openSink", lambda target: (sink, False))
+  return PcmStreamer("-", frameRate=1000, latency=0.05)
+
+def test_ringWrapsAround():
+  ring = RingBuffer(5)
+  assert ring.put(np.arange(3)) == 3
+  assert ring.take(2).tolist() == [0, 1]
+  # two samples at the end, two at the start, one does not fit
+  assert ring.put(np.arange(3, 8)) == 4
+  assert ring.free() == 0
+  assert ring.start == 2
+  assert ring.take(10).tolist() == [2, 3, 4, 5, 6]
+  assert ring.available == 0
+
+def test_everySampleIsSentInOrder(monkeypatch):
+  sink = Sink()
+  samples = np.arange(-150, 150, dtype=np.int16)
+  with openStreamer(monkeypatch, sink) as streamer:
+    streamer.write(samples[:120])
+    streamer.write(samples[120:])
+  assert np.array_equal(sink.samples(), samples)
+  assert streamer.framesWritten == len(samples)
+
+# nothing goes out before the budget is buffered, and the sender stays no
+# more than the budget ahead of the listener
+def test_latencyBudget(monkeypatch):
+  sink = Sink()
+  streamer = openStreamer(monkeypatch, sink)
+  started = time.monotonic()
+  streamer.write(np.ones(49))
+  time.sleep(0.05)
+  assert sink.data == b""
+  streamer.write(np.ones(251))
+  streamer.close()
+  # 300 samples play for 0.3 seconds, the last leave 0.05 before that
+  assert time.monotonic() - started >= 0.3 - 0.05 - 0.01
+  assert len(sink.samples()) == 300
+  assert 0.05 <= streamer.maxLatency <= 0.1
+
+# running out of samples is counted once, then the budget is buffered again
+def test_underrunsAreCounted(monkeypatch):
+  sink = Sink()
+  with openStreamer(monkeypatch, sink) as streamer:
+    streamer.write(np.ones(60))
+    time.sleep(0.2)
+    assert streamer.underruns == 1
+    streamer.write(np.ones(49))
+    time.sleep(0.1)
+    assert streamer.underruns == 1
+    assert len(sink.samples()) == 60
+    streamer.write(np.ones(1))
+  assert streamer.underruns == 1
+  assert len(sink.samples()) == 110
+
+# a failing target does not leave the renderer waiting on a full ring buffer
+def test_sinkErrorsReachTheWriter(monkeypatch):
+  streamer = openStreamer(monkeypatch, Sink(failAfter=1))
+  with pytest.raises(ValueError):
+    for i in range(100):
+      streamer.write(np.ones(50))
+  # raised once
+  streamer.close()
+
+def test_sinkErrorsAtTheEndReachClose(monkeypatch):
+  streamer = openStreamer(monkeypatch, Sink(failAfter=0))
+  streamer.write(np.ones(10))
+  with pytest.raises(ValueError):
+    streamer.close()
@@ -0,0 +1,104 @@
+# NAME
+#   test_synthesis - the render modes of image-to-wave
+#
+# LEGAL NOTE
+#   Written and maintained by Laura Herzog (laura-herzog@outlook.com)
+#   Permission to copy and modify is granted under the AGPL license
+#   Project Information: https://github.com/lauraherzog/universum-tonal/
+
+import numpy as np
+import pytest
+from conftest import makeImage
+from tonal import synthesis
+from tonal.converters import ImageToWave, prepareBatches, columnsPerTask
+
+# the samples of an image, without carry every batch starts the renderer like in a worker process
+def renderBatches(converter, imageObject, batchSize, carry=True):
+  renderer = None
+  if carry:
+    renderer = synthesis.createRenderer(converter.mode, converter.sampleRate, converter.lowestFrequency)
+  blocks = []
+  for batch in prepareBatches(converter.columns(imageObject), batchSize, converter.sampleRate, converter.lowestFrequency, converter.mode, renderer=renderer):
+    blocks.extend(synthesis.renderColumns(*batch)[0])
+  return np.concatenate(blocks)
+
+# the serial path carries the renderer on instead of seeking every column
+def test_continuousBucketsEveryColumnOnce(monkeypatch):
+  calls = []
+  bucketNotes = synthesis.bucketNotes
+  monkeypatch.setattr(synthesis, "bucketNotes", lambda *arguments: calls.append(1) or bucketNotes(*arguments))
+  ImageToWave(sampleRate=256, mode="continuous").render(makeImage(20, 50))
+  assert len(calls) == 50
+
+# one inverse FFT per column, the frame before is not synthesized again
+def test_spectrogramSynthesizesEveryFrameOnce(monkeypatch):
+  calls = []
+  irfft = np.fft.irfft
+  monkeypatch.setattr(np.fft, "irfft", lambda *arguments: calls.append(1) or irfft(*arguments))
+  ImageToWave(sampleRate=256, mode="spectrogram").render(makeImage(20, 50))
+  assert len(calls) == 50
+
+# and it sounds the same as batches that each start the renderer anew
+@pytest.mark.parametrize("mode", ["continuous", "spectrogram"])
+def test_carriedRendererMatchesSeeking(mode):
+  imageObject = makeImage(20, 50, seed=1)
+  converter = ImageToWave(sampleRate=256, mode=mode)
+  serial = renderBatches(converter, imageObject, 1)
+  seeking = renderBatches(converter, imageObject, 1, carry=False)
+  batched = renderBatches(converter, imageObject, columnsPerTask, carry=False)
+  assert np.array_equal(serial, seeking)
+  assert np.array_equal(serial, batched)
+
+# converters rendering in turn in one process each carry their own renderer
+@pytest.mark.parametrize("mode", ["continuous", "spectrogram"])
+def test_convertersKeepTheirOwnRenderer(mode):
+  converters = [ImageToWave(sampleRate=256, mode=mode), ImageToWave(sampleRate=300, mode=mode)]
+  images = [makeImage(20, 2 * columnsPerTask + 3, seed) for seed in (4, 5)]
+  expected = [renderBatches(converter, imageObject, columnsPerTask) for converter, imageObject in zip(converters, images)]
+  tasks = [prepareBatches(converter.columns(imageObject), columnsPerTask, converter.sampleRate, converter.lowestFrequency, mode, renderer=converter.startRenderer()) for converter, imageObject in zip(converters, images)]
+  blocks = [[], []]
+  for batches in zip(*tasks):
+    for number, batch in enumerate(batches):
+      blocks[number].extend(synthesis.renderColumns(*batch)[0])
+  assert converters[0].renderer is not converters[1].renderer
+  assert all(np.array_equal(np.concatenate(blocks[number]), expected[number]) for number in (0, 1))
+
+# the pool is started once and kept between conversions, the file is the same as with one worker
+def test_workersAreKeptBetweenConversions():
+  imageObject = makeImage(20, 40, seed=2)
+  expected = ImageToWave(sampleRate=256, mode="bank").render(imageObject)
+  with ImageToWave(sampleRate=256, mode="bank", workers=2) as converter:
+    first = converter.render(imageObject)
+    executor = converter.executor
+    second = converter.render(imageObject)
+    assert converter.executor is executor
+  assert converter.executor is None
+  assert first == expected
+  assert second == expected
+
+# the engine against the per sample loop of the original script
+def test_engineMatchesTheLoop():
+  assert synthesis.checkParity(64, 512)
+  notes = [(8000, 0.5), (10, 1.0), (440, 0.25)]
+  expected = synthesis.generateSineWavesLoop(notes, 300, 16.35)
+  sineList = synthesis.generateSineWaves(*zip(*notes), 300, 16.35)
+  assert np.allclose(sineList, expected, rtol=0, atol=1e-9)
+
+# the batches come back in order, the file is the same with any number of workers
+@pytest.mark.parametrize("mode", ["sine", "bank", "continuous", "spectrogram"])
+def test_workersMatchSerialRender(mode):
+  imageObject = makeImage(20, 3 * columnsPerTask + 5, seed=3)
+  serial = ImageToWave(sampleRate=256, mode=mode).render(imageObject)
+  with ImageToWave(sampleRate=256, mode=mode, workers=3) as converter:
+    assert converter.render(imageObject) == serial
+
+# summing the notes of a frequency into one oscillator gives the same samples
+def test_bankMatchesSine():
+  for seed in range(3):
+    imageObject = makeImage(200, 20, seed)
+    assert ImageToWave(sampleRate=512, mode="bank").render(imageObject) == ImageToWave(sampleRate=512).render(imageObject)
+
+def test_bucketNotesSumsAudibleAmplitudes():
+  (frequencies, amplitudes) = synthesis.bucketNotes([440, 10, 440, 880, 220], [0.5, 1.0, 0.25, 0.0, 0.1], 16.35)
+  assert frequencies.tolist() == [220, 440]
+  assert amplitudes.tolist() == [0.1, 0.75]
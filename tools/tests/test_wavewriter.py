@@ -0,0 +1,36 @@
+# NAME
+#   test_wavewriter - the buffered int16 frame writer
+#
+# LEGAL NOTE
+#   Written and maintained by Laura Herzog (laura-herzog@outlook.com)
+#   Permission to copy and modify is granted under the AGPL license
+#   Project Information: https://github.com/lauraherzog/universum-tonal/
+
+import io, struct, wave
+import numpy as np
+from tonal.wavewriter import FrameWriter
+
+# the same frames as packing every sample on its own, whatever the buffer size
+def test_blocksMatchPackedSamples():
+  rng = np.random.default_rng(0)
+  blocks = [rng.uniform(-200, 200, size) for size in (1, 7, 300, 64)]
+  expected = b"".join(struct.pack("h", int(sine * 250/2)) for block in blocks for sine in block.tolist())
+  for flushSize in (1, 16, 65536):
+    output = io.BytesIO()
+    with FrameWriter(output, flushSize=flushSize) as writer:
+      for block in blocks:
+        writer.write(block, 250/2)
+    output.seek(0)
+    with wave.open(output, "rb") as reader:
+      assert reader.readframes(reader.getnframes()) == expected
+    assert writer.framesWritten == len(expected) // 2
+
+# values outside of int16 saturate and are counted
+def test_loudSamplesAreClipped():
+  output = io.BytesIO()
+  with FrameWriter(output) as writer:
+    writer.write([1000.0, -1000.0, 1.0], 250/2)
+  output.seek(0)
+  with wave.open(output, "rb") as reader:
+    assert np.frombuffer(reader.readframes(3), dtype=np.int16).tolist() == [32767, -32768, 125]
+  assert writer.clipped == 2
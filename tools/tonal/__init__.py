@@ -0,0 +1,32 @@
+# NAME
+#   tonal - shared engine for the image-to-* tools
+#
+# SYNOPSIS
+#   from tonal import ImageToWave, ImageToMidi, PixelFrequency, PixelByPixel, Chord, Noise
+#   ImageToWave(mode="bank").convert("sample.jpg", "sample.wav")
+#
+# DESCRIPTION
+#   Helpers shared by the converter scripts in this folder. The scripts import
+#   from here so the heavy lifting (color conversion, synthesis, writing) is
+#   done once and in bulk instead of pixel by pixel.
+#
+#   The converters themselves are classes in tonal.converters, exported here
+#   for programs that embed them. The scripts are thin wrappers around them.
+#   The export is resolved on first use, so importing a single module (or
+#   running one with python3 -m tonal.<module>) does not load all of them.
+#
+# LEGAL NOTE
+#   Written and maintained by Laura Herzog (laura-herzog@outlook.com)
+#   Permission to copy and modify is granted under the AGPL license
+#   Project Information: https://github.com/lauraherzog/universum-tonal/
+
+import importlib
+
+exportedNames = ("ConversionError", "ImageToWave", "ImageToMidi", "PixelFrequency", "PixelByPixel", "Chord", "Noise")
+
+__all__ = list(exportedNames)
+
+def __getattr__(name):
+  if name in exportedNames:
+    return getattr(importlib.import_module("tonal.converters"), name)
+  raise AttributeError("module 'tonal' has no attribute {!r}".format(name))
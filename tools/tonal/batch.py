@@ -0,0 +1,109 @@
+# NAME
+#   tonal.batch - batch conversion of many images
+#
+# SYNOPSIS
+#   from tonal.batch import collectInputs, convertImage
+#
+# DESCRIPTION
+#   Runs one of the converters on many images within one process. Every
+#   process creates a converter once per tool and options and keeps it
+#   between images, so cv2 and numpy are set up and the tables are built a
+#   single time.
+#
+#   Inputs are a directory (all supported images in it), a glob pattern or a
+#   manifest file listing one input per line, optionally followed by the
+#   output path. Outputs default to the name of the input without its
+#   extension, inputs that only differ in the extension keep it. Two inputs
+#   writing the same output are an error. Outputs that are newer than their
+#   input are skipped.
+#
+# LEGAL NOTE
+#   Written and maintained by Laura Herzog (laura-herzog@outlook.com)
+#   Permission to copy and modify is granted under the AGPL license
+#   Project Information: https://github.com/lauraherzog/universum-tonal/
+
+import os, glob, time
+from tonal.converters import ImageToWave, ImageToMidi, PixelFrequency, PixelByPixel
+from tonal.imagefile import imageExtensions
+
+# tool name -> suffix of the output files
+tools = {
+  "wave": ".wav",
+  "pf": "-pf.wav",
+  "pp": "-pp.wav",
+  "midi": ".mid"
+}
+
+# converters created in this process, by tool and options
+converters = {}
+
+def loadConverter(tool, options):
+  key = (tool, options.get("sampleRate", 2048), options.get("lowestFrequency", 16.35), options.get("ignoreBackground", False))
+  if key not in converters:
+    converters[key] = createConverter(tool, options)
+  return converters[key]
+
+def createConverter(tool, options):
+  if tool == "wave":
+    return ImageToWave(options.get("sampleRate", 2048), options.get("lowestFrequency", 16.35))
+  elif tool == "pf":
+    return PixelFrequency()
+  elif tool == "pp":
+    return PixelByPixel()
+  elif tool == "midi":
+    return ImageToMidi(options.get("ignoreBackground", False))
+
+# returns (inputFile, outputFile) pairs for a directory, glob or manifest,
+# raises a ValueError if two of them would write the same output
+def collectInputs(source, outputDirectory, tool):
+  suffix = tools[tool]
+  pairs = []
+
+  if os.path.isdir(source):
+    inputFiles = sorted(os.path.join(source, name) for name in os.listdir(source) if name.lower().endswith(imageExtensions))
+    pairs = [(inputFile, None) for inputFile in inputFiles]
+  elif glob.has_magic(source):
+    pairs = [(inputFile, None) for inputFile in sorted(glob.glob(source, recursive=True)) if inputFile.lower().endswith(imageExtensions)]
+  elif os.path.isfile(source):
+    manifestDirectory = os.path.dirname(source)
+    with open(source) as manifest:
+      for line in manifest:
+        line = line.strip()
+        if line == "" or line.startswith("#"):
+          continue
+        parts = line.split(None, 1)
+        inputFile = os.path.join(manifestDirectory, parts[0])
+        outputFile = os.path.join(manifestDirectory, parts[1]) if len(parts) > 1 else None
+        pairs.append((inputFile, outputFile))
+
+  # outputs default to the output directory with the name of the input,
+  # wide.png and wide.npy become wide.png.wav and wide.npy.wav
+  stems = [os.path.splitext(os.path.basename(inputFile))[0] for inputFile, outputFile in pairs]
+  pairs = [(inputFile, outputFile or os.path.join(outputDirectory, (stem if stems.count(stem) == 1 else os.path.basename(inputFile)) + suffix)) for (inputFile, outputFile), stem in zip(pairs, stems)]
+
+  writers = {}
+  for inputFile, outputFile in pairs:
+    path = os.path.abspath(outputFile)
+    if path in writers:
+      raise ValueError("{} and {} would both write {}".format(writers[path], inputFile, outputFile))
+    writers[path] = inputFile
+  return pairs
+
+# true if the output exists and is not older than the input
+def isUpToDate(inputFile, outputFile):
+  return os.path.exists(outputFile) and os.path.getmtime(outputFile) >= os.path.getmtime(inputFile)
+
+# converts one image, errors end up in the result
+def convertImage(tool, inputFile, outputFile, options):
+  result = {"inputFile": inputFile, "outputFile": outputFile, "samples": 0, "seconds": 0.0, "skipped": False, "error": None}
+  started = time.perf_counter()
+  try:
+    if options.get("force", False) == False and isUpToDate(inputFile, outputFile):
+      result["skipped"] = True
+      return result
+    os.makedirs(os.path.dirname(outputFile) or ".", exist_ok=True)
+    result["samples"] = loadConverter(tool, options).convert(inputFile, outputFile)
+  except Exception as error:
+    result["error"] = str(error) or type(error).__name__
+  result["seconds"] = time.perf_counter() - started
+  return result
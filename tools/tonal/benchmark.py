@@ -0,0 +1,222 @@
+# NAME
+#   tonal.benchmark - stage timings of the converters
+#
+# SYNOPSIS
+#   from tonal.benchmark import runBenchmark, compareResults
+#   results = runBenchmark([64, 256], ["wave", "midi"], directory)
+#   comparisons = compareResults(results, baseline, 0.2)
+#
+# DESCRIPTION
+#   Renders synthetic images of the given sizes (square, the same pixels for
+#   every run) and times every stage of the converters on its own:
+#
+#     shared  decode, hsv
+#     wave    mapping, synthesis, write
+#     midi    encode, build
+#     pf      render (PixelFrequency from the converted image)
+#     pp      render (PixelByPixel from the decoded image)
+#     chord   render (no image, run once)
+#     noise   render (no image, run once)
+#
+#   Every stage is run repeat times and the best time is kept, the converters
+#   are created once and their tables stay warm like in a long running
+#   process. The peak
+#   memory is taken by tracemalloc in one more run, so the tracing does not
+#   slow down the timings. Stages whose time, estimated from the size before,
+#   would exceed maxSeconds are skipped, as are the stages that need their
+#   output.
+#
+#   A result is a dict with tool, stage, size, seconds, peakBytes, pixels,
+#   samples and notes plus the rates per second. compareResults matches
+#   results by tool, stage and size against a stored baseline.
+#
+# LEGAL NOTE
+#   Written and maintained by Laura Herzog (laura-herzog@outlook.com)
+#   Permission to copy and modify is granted under the AGPL license
+#   Project Information: https://github.com/lauraherzog/universum-tonal/
+
+import os, io, time, platform, contextlib, tracemalloc
+import cv2
+import numpy as np
+from tonal import synthesis
+from tonal.converters import ImageToMidi, PixelFrequency, PixelByPixel, Chord, Noise
+from tonal.imagefile import openImage
+from tonal.mapping import convertToFrequencies, octaveFrequencies
+from tonal.pixels import PixelStore
+from tonal.wavewriter import FrameWriter
+
+# bump when stages are added or changed, results of other versions do not compare
+benchmarkVersion = 4
+
+defaultSizes = [64, 256, 1024]
+benchmarkTools = ["wave", "midi", "pf", "pp", "chord", "noise"]
+imageTools = ["wave", "midi", "pf", "pp"]
+
+# a deterministic test image: hue gradients with blocks of noise and some
+# dark background, so there are runs for midi and many distinct notes
+def createImage(size, seed=0):
+  random = np.random.default_rng(seed)
+  y, x = np.mgrid[0:size, 0:size]
+  hue = (x * 180 // max(size, 1)).astype(np.uint8)
+  saturation = np.full((size, size), 200, dtype=np.uint8)
+  value = random.integers(0, 256, ((size + 7) // 8, (size + 7) // 8), dtype=np.uint8)
+  value = np.repeat(np.repeat(value, 8, axis=0), 8, axis=1)[:size, :size]
+  value[(y // 16) % 4 == 0] = 0
+  return cv2.cvtColor(np.dstack((hue, saturation, value)), cv2.COLOR_HSV2BGR)
+
+class Benchmark:
+
+  def __init__(self, directory, repeat=1, traceMemory=True, maxSeconds=60, mode="sine"):
+    self.directory = directory
+    self.repeat = max(1, repeat)
+    self.traceMemory = traceMemory
+    self.maxSeconds = maxSeconds
+    self.mode = mode
+    self.results = []
+    # (tool, stage) -> (seconds, pixels) of the last run, for the estimates
+    self.lastRuns = {}
+
+  # runs a stage and records it, returns its output or None if it was skipped
+  def measure(self, tool, stage, size, function, *arguments, samples=None, notes=None):
+    pixels = size * size
+    if any(argument is None for argument in arguments):
+      return self.skip(tool, stage, size, "input skipped")
+    if (tool, stage) in self.lastRuns:
+      seconds, lastPixels = self.lastRuns[(tool, stage)]
+      estimate = seconds * pixels / max(lastPixels, 1)
+      if estimate > self.maxSeconds:
+        return self.skip(tool, stage, size, "estimated {:.0f}s".format(estimate))
+
+    best = None
+    for run in range(self.repeat):
+      started = time.perf_counter()
+      with contextlib.redirect_stdout(io.StringIO()):
+        output = function(*arguments)
+      seconds = time.perf_counter() - started
+      best = seconds if best is None else min(best, seconds)
+
+    peakBytes = None
+    if self.traceMemory:
+      tracemalloc.start()
+      with contextlib.redirect_stdout(io.StringIO()):
+        function(*arguments)
+      peakBytes = tracemalloc.get_traced_memory()[1]
+      tracemalloc.stop()
+
+    # counts that depend on the output
+    samples = samples(output) if callable(samples) else samples
+    notes = notes(output) if callable(notes) else notes
+
+    self.lastRuns[(tool, stage)] = (best, pixels)
+    self.results.append({
+      "tool": tool,
+      "stage": stage,
+      "size": size,
+      "seconds": best,
+      "peakBytes": peakBytes,
+      "pixels": pixels,
+      "pixelsPerSecond": pixels / best if pixels > 0 and best > 0 else None,
+      "samples": samples,
+      "samplesPerSecond": samples / best if samples is not None and best > 0 else None,
+      "notes": notes,
+      "notesPerSecond": notes / best if notes is not None and best > 0 else None
+    })
+    return output
+
+  def skip(self, tool, stage, size, reason):
+    self.results.append({"tool": tool, "stage": stage, "size": size, "skipped": reason})
+    return None
+
+  def runImage(self, size, tools):
+    inputFile = os.path.join(self.directory, "benchmark-{}.png".format(size))
+    cv2.imwrite(inputFile, createImage(size))
+    outputFile = os.path.join(self.directory, "benchmark-{}".format(size))
+
+    imageObject = self.measure("shared", "decode", size, openImage, inputFile)
+    data = self.measure("shared", "hsv", size, PixelStore.fromImage, imageObject)
+
+    if "wave" in tools:
+      columns = self.measure("wave", "mapping", size, mapColumns, data)
+      rendered = self.measure("wave", "synthesis", size, synthesis.renderColumns, columns, 2048, 16.35, 250/2, 44100, self.mode, samples=size * 2048)
+      blocks = None if rendered is None else rendered[0]
+      self.measure("wave", "write", size, writeBlocks, blocks, outputFile + ".wav", samples=size * 2048)
+
+    if "midi" in tools:
+      converter = ImageToMidi()
+      batches = self.measure("midi", "encode", size, encodeNotes, converter, data, notes=countNotes)
+      self.measure("midi", "build", size, converter.build, batches, outputFile + ".mid", notes=lambda added: added)
+
+    if "pf" in tools:
+      self.measure("pf", "render", size, PixelFrequency().convert, data, outputFile + "-pf.wav", samples=lambda framesWritten: framesWritten)
+
+    if "pp" in tools:
+      self.measure("pp", "render", size, PixelByPixel().convert, imageObject, outputFile + "-pp.wav", samples=lambda framesWritten: framesWritten)
+
+    for name in os.listdir(self.directory):
+      if name.startswith("benchmark-{}".format(size)):
+        os.remove(os.path.join(self.directory, name))
+
+  # the tools without an input image
+  def runGenerators(self, tools):
+    outputFile = os.path.join(self.directory, "benchmark-generated.wav")
+    if "chord" in tools:
+      # the chord is summed up when the converter is created
+      self.measure("chord", "render", 0, renderChord, outputFile, samples=88200)
+    if "noise" in tools:
+      self.measure("noise", "render", 0, Noise().convert, 44100 * 5, outputFile, samples=44100 * 5)
+    if os.path.exists(outputFile):
+      os.remove(outputFile)
+
+def renderChord(outputFile):
+  return Chord().convert(outputFile)
+
+# the note batches of an image at once, so encode and build are timed apart
+def encodeNotes(converter, data):
+  return list(converter.encode(data))
+
+def countNotes(batches):
+  return sum(len(notes[0]) for closed, notes in batches)
+
+def mapColumns(data):
+  return [convertToFrequencies(*data.column(x), octaveFrequencies) for x in range(data.width)]
+
+def writeBlocks(blocks, outputFile):
+  with FrameWriter(outputFile, 44100) as waveFile:
+    for sineList in blocks:
+      waveFile.write(sineList)
+  return waveFile.framesWritten
+
+# runs all sizes and tools, returns the report with the environment and results
+def runBenchmark(sizes, tools, directory, repeat=1, traceMemory=True, maxSeconds=60, mode="sine"):
+  benchmark = Benchmark(directory, repeat, traceMemory, maxSeconds, mode)
+  benchmark.runGenerators(tools)
+  if any(tool in imageTools for tool in tools):
+    for size in sorted(sizes):
+      benchmark.runImage(size, tools)
+
+  return {
+    "version": benchmarkVersion,
+    "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    "python": platform.python_version(),
+    "numpy": np.__version__,
+    "opencv": cv2.__version__,
+    "machine": platform.machine(),
+    "mode": mode,
+    "results": benchmark.results
+  }
+
+# returns (result, baseline result, ratio, regressed) for every stage in both,
+# regressed if it got slower by more than threshold (0.2 = 20%)
+def compareResults(report, baseline, threshold):
+  if baseline.get("version") != report.get("version"):
+    raise ValueError("Baseline is from benchmark version {}, this is version {}".format(baseline.get("version"), report.get("version")))
+
+  stored = {(result["tool"], result["stage"], result["size"]): result for result in baseline["results"] if "seconds" in result}
+  comparisons = []
+  for result in report["results"]:
+    before = stored.get((result["tool"], result["stage"], result["size"]))
+    if before is None or "seconds" not in result or before["seconds"] <= 0:
+      continue
+    ratio = result["seconds"] / before["seconds"]
+    comparisons.append((result, before, ratio, ratio > 1 + threshold))
+  return comparisons
@@ -0,0 +1,190 @@
+# NAME
+#   tonal.cache - content addressed render cache
+#
+# SYNOPSIS
+#   from tonal.cache import RenderCache
+#   cache = RenderCache(cacheDirectory, maxBytes)
+#   renderKey = cache.key("image-to-wave", cache.hashFile(inputFile), sampleRate)
+#   if cache.fetch(renderKey, outputFile) == False:
+#     ...
+#     cache.store(renderKey, outputFile)
+#
+# DESCRIPTION
+#   Keeps the results of expensive stages on disk, addressed by the content
+#   of the image instead of its name. Two kinds of entries are stored:
+#
+#   - the HSV planes of an image, keyed by the image hash only, so a render
+#     with different parameters still skips decoding and converting. They
+#     are converted a tile at a time, kept as a .npy file of pixel records
+#     and memory mapped on load.
+#   - the final output (wave or midi file), keyed by the image hash, the
+#     tool and all of its parameters.
+#   - the levels of the preview pyramid of an image (see tonal.pyramid),
+#     keyed by the image hash and the level. Each level is built out of the
+#     one below it, so the image is decoded and averaged down only once.
+#
+#   The cache has a size cap. Every hit refreshes the modification time of an
+#   entry and when the cap is exceeded the least recently used entries are
+#   removed first.
+#
+# LEGAL NOTE
+#   Written and maintained by Laura Herzog (laura-herzog@outlook.com)
+#   Permission to copy and modify is granted under the AGPL license
+#   Project Information: https://github.com/lauraherzog/universum-tonal/
+
+import os, json, shutil, hashlib, tempfile
+import numpy as np
+from tonal.imagefile import openImage
+from tonal.pixels import PixelStore, pixelRecord, stripHeight, tileWidth
+from tonal.pyramid import halveImage
+
+# bump when a stage changes its results, old entries are not used anymore
+cacheVersion = 1
+
+# default size cap, 1 GiB
+maxBytes = 1 << 30
+
+class RenderCache:
+
+  def __init__(self, directory, maxBytes=maxBytes):
+    self.directory = directory
+    self.maxBytes = maxBytes
+    self.hashes = {}
+    os.makedirs(directory, exist_ok=True)
+
+  # a key out of any json serializable parts
+  def key(self, *parts):
+    return hashlib.sha256(json.dumps([cacheVersion] + list(parts)).encode()).hexdigest()
+
+  # the content hash of a file, remembered as long as the file is unchanged
+  def hashFile(self, path):
+    stat = os.stat(path)
+    signature = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    if signature not in self.hashes:
+      digest = hashlib.sha256()
+      with open(path, "rb") as source:
+        for block in iter(lambda: source.read(1 << 20), b""):
+          digest.update(block)
+      self.hashes[signature] = digest.hexdigest()
+    return self.hashes[signature]
+
+  def path(self, key, suffix):
+    return os.path.join(self.directory, key + suffix)
+
+  # the path of an entry if it exists, a hit marks it as recently used
+  def lookup(self, key, suffix):
+    path = self.path(key, suffix)
+    if os.path.exists(path) == False:
+      return None
+    os.utime(path)
+    return path
+
+  # copies a cached output to outputFile, returns whether there was one
+  def fetch(self, key, outputFile):
+    path = self.lookup(key, ".out")
+    if path is None:
+      return False
+    shutil.copyfile(path, outputFile)
+    return True
+
+  # keeps a copy of outputFile
+  def store(self, key, outputFile):
+    temporaryPath = self.temporaryPath()
+    shutil.copyfile(outputFile, temporaryPath)
+    self.commit(temporaryPath, self.path(key, ".out"))
+
+  # the HSV planes of an image, converted a tile at a time and stored if they
+  # are not cached yet
+  def loadPixels(self, inputFile, reduce=1):
+    key = self.key("pixels", self.hashFile(inputFile), reduce)
+    path = self.lookup(key, ".npy")
+    if path is None:
+      for tile in self.iterateTiles(inputFile, reduce=reduce):
+        pass
+      path = self.lookup(key, ".npy")
+      # too big for the cap, it is gone again already
+      if path is None:
+        return PixelStore.fromFile(inputFile, reduce)
+    return PixelStore.fromRecords(np.load(path, mmap_mode="r"))
+
+  # like pixels.iterateTiles, but the planes come from or go to the cache
+  def iterateTiles(self, inputFile, tileWidth=tileWidth, reduce=1):
+    key = self.key("pixels", self.hashFile(inputFile), reduce)
+    path = self.lookup(key, ".npy")
+    if path is not None:
+      records = np.load(path, mmap_mode="r")
+      for left in range(0, records.shape[0], tileWidth):
+        yield (left, PixelStore.fromRecords(records[left:left + tileWidth]))
+      return
+
+    # convert tile by tile and fill the cache entry on the way
+    imageObject = openImage(inputFile, reduce)
+    imageHeigth, imageWidth = imageObject.shape[:2]
+    temporaryPath = self.temporaryPath()
+    records = np.lib.format.open_memmap(temporaryPath, mode="w+", dtype=pixelRecord, shape=(imageWidth, imageHeigth))
+    try:
+      for left in range(0, imageWidth, tileWidth):
+        tile = PixelStore.fromImage(imageObject[:, left:left + tileWidth])
+        tile.toRecords(records, left)
+        yield (left, tile)
+      records.flush()
+      del records
+      self.commit(temporaryPath, self.path(key, ".npy"))
+    finally:
+      if os.path.exists(temporaryPath):
+        os.remove(temporaryPath)
+
+  # like pixels.iterateStrips, the strips are copied out of the cached planes
+  # so every page of them is read once
+  def iterateStrips(self, inputFile, stripHeight=stripHeight, reduce=1):
+    data = self.loadPixels(inputFile, reduce)
+    for top in range(0, data.height, stripHeight):
+      yield (top, PixelStore(*(np.array(plane[top:top + stripHeight]) for plane in (data.hue, data.saturation, data.value))))
+
+  # (level image, height, width of the image) of a preview level above 0,
+  # built out of the level below and stored if it is not cached yet
+  def loadLevel(self, inputFile, level, reduce=1):
+    key = self.key("level", self.hashFile(inputFile), reduce, level)
+    path = self.lookup(key, ".npz")
+    if path is not None:
+      with np.load(path) as entry:
+        return (entry["image"], int(entry["size"][0]), int(entry["size"][1]))
+
+    if level == 1:
+      imageObject = openImage(inputFile, reduce)
+      (imageHeight, imageWidth) = imageObject.shape[:2]
+    else:
+      (imageObject, imageHeight, imageWidth) = self.loadLevel(inputFile, level - 1, reduce)
+    levelImage = halveImage(imageObject)
+
+    temporaryPath = self.temporaryPath()
+    with open(temporaryPath, "wb") as entry:
+      np.savez(entry, image=levelImage, size=np.array([imageHeight, imageWidth]))
+    self.commit(temporaryPath, self.path(key, ".npz"))
+    return (levelImage, imageHeight, imageWidth)
+
+  def temporaryPath(self):
+    handle, path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+    os.close(handle)
+    return path
+
+  # moves a finished entry into place and makes room for it
+  def commit(self, temporaryPath, path):
+    os.replace(temporaryPath, path)
+    self.evict()
+
+  # removes the least recently used entries until the cache fits its cap
+  def evict(self):
+    entries = []
+    for name in os.listdir(self.directory):
+      if name.endswith(".tmp"):
+        continue
+      stat = os.stat(os.path.join(self.directory, name))
+      entries.append((stat.st_mtime_ns, stat.st_size, name))
+
+    total = sum(size for modified, size, name in entries)
+    for modified, size, name in sorted(entries):
+      if total <= self.maxBytes:
+        break
+      os.remove(os.path.join(self.directory, name))
+      total = total - size
@@ -0,0 +1,620 @@
+# NAME
+#   tonal.converters - the converters as a library
+#
+# SYNOPSIS
+#   from tonal import ImageToWave, ConversionError
+#   converter = ImageToWave(sampleRate=2048, mode="bank")
+#   converter.convert("sample.jpg", "sample.wav")
+#   converter.convert(cv2.imread("sample.jpg"), outputFile)
+#   waveData = converter.render(imageObject)
+#   converter.update("sample.jpg", "sample.wav")
+#   converter.close()
+#   with ImageToWave(workers=4) as converter: ...
+#   Noise("pink", seed=7).convert(44100 * 10, "noise.wav")
+#
+# DESCRIPTION
+#   The converters of the image-to-* scripts as classes, for programs that
+#   convert many images in one process. A converter is set up once with its
+#   parameters and then converts any number of images. The tables it needs
+#   (frequencies, grains, hues, the chord) are built when it is created and
+#   stay warm between the calls.
+#
+#   Images are paths (opened with tonal.imagefile, raw files are memory
+#   mapped), cv2 images (BGR uint8 arrays of height x width x 3) or, for the
+#   converters working on HSV values, PixelStores. reduce only applies to
+#   paths. Outputs are paths or seekable binary file like objects; the wave
+#   converters also take a FrameWriter or a PcmStreamer, which is closed at
+#   the end like a file they opened themselves. render() takes the same
+#   arguments as convert() without the output and returns the whole file
+#   as bytes. With a preview level above 0 image-to-wave, image-to-midi and
+#   image-to-wave-pf render out of that level of the image pyramid (see
+#   tonal.pyramid) instead of the image, kept in the cache if there is one.
+#   ImageToWave.update() renders only the rows of an image that
+#   changed since the last update into an existing wave file (see
+#   tonal.incremental).
+#
+#   image-to-wave and image-to-midi convert images a tile of columns at a
+#   time, image-to-wave-pf a strip of rows at a time (see tonal.pixels).
+#   image-to-wave-pp and previews convert the whole image (or level) first.
+#
+#   ImageToWave with more than one worker starts its process pool with the
+#   first conversion and keeps it for the ones after it. close() (or the
+#   end of a with block) shuts the pool down, a conversion after it starts
+#   a new one. The other converters have nothing to close.
+#
+#   Errors in the input or the parameters raise a ConversionError (a
+#   ValueError) instead of exiting. Nothing is printed unless a Metrics is
+#   handed in. The counts of the last conversion (clipped samples, notes,
+#   oscillators, skipped duplicates) are kept as attributes of the converter.
+#
+# LEGAL NOTE
+#   Written and maintained by Laura Herzog (laura-herzog@outlook.com)
+#   Permission to copy and modify is granted under the AGPL license
+#   Project Information: https://github.com/lauraherzog/universum-tonal/
+
+import io, os, math, itertools
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from tonal import synthesis
+from tonal.grains import buildGrainTable, grainLength, renderGrains
+from tonal.hsv import HueTable
+from tonal.imagefile import imageSize, openImage, reducedFlags
+from tonal.incremental import ColumnIndex, hashColumns
+from tonal.mapping import buildMidiTables, buildWaveTables, convertToFrequencies, convertToSamples, octaveFrequencies
+from tonal.metrics import Metrics
+from tonal.midi import encodeRuns, NoteIndex
+from tonal.noise import NoiseGenerator, noiseColors
+from tonal.parallel import orderedMap, batched
+from tonal.pixels import PixelStore, iterateStrips, iterateTiles, tileWidth
+from tonal.pyramid import buildLevel, levelRepeats
+from tonal.scan import iterateScan, scanOrders
+from tonal.stream import PcmStreamer
+from tonal.wavewriter import FrameWriter, flushSize, saturate
+
+frameRate = 44100
+
+waveModes = ("sine", "bank", "continuous", "spectrogram")
+
+# rows per task handed to a worker process
+columnsPerTask = 8
+
+# pixels of image-to-wave-pf rendered into the buffer at a time
+pixelsPerBlock = 256
+
+# the b minor chord of image-to-wave-chord, (frequency, amplitude)
+chordNotes = [
+  [246.94, 0.6],
+  [146.83, 0.5],
+  [185.00, 0.7]
+]
+
+class ConversionError(ValueError):
+  pass
+
+class Converter:
+
+  def __init__(self, reduce=1, cache=None, metrics=None, preview=0):
+    if reduce not in reducedFlags:
+      raise ConversionError("reduce has to be 1, 2, 4 or 8")
+    if isinstance(preview, int) == False or preview < 0:
+      raise ConversionError("The preview level has to be 0 or more")
+    self.reduce = reduce
+    self.preview = preview
+    self.cache = cache
+    self.metrics = metrics if metrics is not None else Metrics(verbose=False)
+    self.executor = None
+
+  # shuts the process pool down, if the converter started one
+  def close(self):
+    if self.executor is not None:
+      self.executor.shutdown()
+      self.executor = None
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exception):
+    self.close()
+
+  # the whole output as bytes instead of a file
+  def render(self, *arguments):
+    output = io.BytesIO()
+    self.convert(*arguments, output)
+    return output.getvalue()
+
+  # a cv2 image out of a path or an image
+  def readImage(self, image):
+    if isPath(image):
+      try:
+        return openImage(os.fspath(image), self.reduce)
+      except (OSError, ValueError) as error:
+        raise ConversionError("Image not usable: {}".format(error))
+
+    shape = getattr(image, "shape", ())
+    if len(shape) != 3 or shape[2] != 3 or getattr(image, "dtype", None) != np.uint8:
+      raise ConversionError("Images have to be paths or BGR uint8 arrays of height x width x 3")
+    return image
+
+  # the HSV planes of an image, paths come from the cache if there is one.
+  # With a preview level they are the planes of that level
+  def readPixels(self, image):
+    if isinstance(image, PixelStore):
+      if self.preview > 0 and image.previewOf is None:
+        raise ConversionError("Previews need a path or a cv2 image")
+      return image
+    if self.preview > 0:
+      (levelImage, imageHeight, imageWidth) = self.readLevel(image)
+      data = PixelStore.fromImage(levelImage)
+      data.previewOf = (self.preview, imageHeight, imageWidth)
+      return data
+    if isPath(image) and self.cache is not None:
+      try:
+        return self.cache.loadPixels(os.fspath(image), self.reduce)
+      except (OSError, ValueError) as error:
+        raise ConversionError("Image not usable: {}".format(error))
+    return PixelStore.fromImage(self.readImage(image))
+
+  # the width of an image for the progress, None if the header is not understood
+  def readWidth(self, image):
+    if isinstance(image, PixelStore):
+      return image.width
+    if isPath(image) == False:
+      return getattr(image, "shape", (None, None))[1]
+    try:
+      size = imageSize(os.fspath(image), self.reduce)
+    except (OSError, ValueError):
+      return None
+    return None if size is None else size[1]
+
+  # (left, PixelStore) tiles of the columns of an image from left to right.
+  # Images are opened right away, cached ones once the first tile is asked for
+  def tiles(self, image):
+    if isinstance(image, PixelStore):
+      tiles = ((left, PixelStore(image.hue[:, left:left + tileWidth], image.saturation[:, left:left + tileWidth], image.value[:, left:left + tileWidth])) for left in range(0, image.width, tileWidth))
+    elif isPath(image) and self.cache is not None:
+      tiles = self.cache.iterateTiles(os.fspath(image), reduce=self.reduce)
+    else:
+      tiles = iterateTiles(self.readImage(image))
+    return checkTiles(tiles)
+
+  # (top, PixelStore) strips of the rows of an image from top to bottom, like tiles()
+  def strips(self, image):
+    if isinstance(image, PixelStore):
+      strips = iter([(0, image)])
+    elif isPath(image) and self.cache is not None:
+      strips = self.cache.iterateStrips(os.fspath(image), reduce=self.reduce)
+    else:
+      strips = iterateStrips(self.readImage(image))
+    return checkTiles(strips)
+
+  # (preview level image, height, width of the image), levels of paths come
+  # from the cache if there is one
+  def readLevel(self, image):
+    if isPath(image) and self.cache is not None:
+      try:
+        return self.cache.loadLevel(os.fspath(image), self.preview, self.reduce)
+      except (OSError, ValueError) as error:
+        raise ConversionError("Image not usable: {}".format(error))
+    imageObject = self.readImage(image)
+    return (buildLevel(imageObject, self.preview),) + imageObject.shape[:2]
+
+# image -> wave, every row of the image becomes sampleRate ticks of sine waves
+class ImageToWave(Converter):
+
+  def __init__(self, sampleRate=2048, lowestFrequency=16.35, octaveFrequencies=octaveFrequencies, mode="sine", workers=1, reduce=1, cache=None, metrics=None, preview=0):
+    super().__init__(reduce, cache, metrics, preview)
+    if mode not in waveModes:
+      raise ConversionError("Mode not supported. Use sine, bank, continuous or spectrogram")
+    if sampleRate <= 0:
+      raise ConversionError("The sample rate has to be above 0")
+    self.sampleRate = sampleRate
+    self.lowestFrequency = lowestFrequency
+    self.octaveFrequencies = [list(octave) for octave in octaveFrequencies]
+    self.mode = mode
+    self.workers = workers
+    buildWaveTables(tuple(tuple(octave) for octave in self.octaveFrequencies))
+    # the continuous or spectrogram renderer of the serial path
+    self.renderer = None
+
+    self.clipped = 0
+    self.notes = 0
+    self.oscillators = 0
+
+  # writes the wave of an image, returns the number of samples
+  def convert(self, image, output):
+    with self.metrics.stage("convertDataToWave"):
+      # sine and bank rows do not depend on the one before, a preview row
+      # is rendered once and written as often as it is covered
+      if self.preview > 0 and self.mode in ("sine", "bank"):
+        data = self.readPixels(image)
+        return self.convertColumns(self.previewColumns(data), output, data.width, levelRepeats(data.previewOf[2], data.previewOf[0]))
+      return self.convertColumns(self.columns(image), output, self.readWidth(image))
+
+  # the notes of one row after another, only one tile is converted at a time.
+  # Images are opened right away, cached ones once the first tile is asked for
+  def columns(self, image):
+    if self.preview > 0:
+      data = self.readPixels(image)
+      repeats = levelRepeats(data.previewOf[2], data.previewOf[0]).tolist()
+      return (column for column, count in zip(self.previewColumns(data), repeats) for i in range(count))
+    return self.iterateColumns(self.tiles(image))
+
+  def iterateColumns(self, tiles):
+    # rows from left to right
+    while True:
+      with self.metrics.stage("convertImageToData"):
+        tile = next(tiles, None)
+        if tile is None:
+          return
+        columns = [convertToFrequencies(*tile[1].column(x), self.octaveFrequencies) for x in range(tile[1].width)]
+      yield from columns
+
+  # the rows of a preview level, a pixel is as loud as the pixels it stands for together
+  def previewColumns(self, data):
+    scale = data.previewOf[1] / data.height
+    for frequencies, amplitudes in self.iterateColumns(iter([(0, data)])):
+      yield (frequencies, amplitudes * scale)
+
+  # writes the notes of the rows, total is the number of rows if known.
+  # repeats is how often each rendered row is written, once if None
+  def convertColumns(self, columns, output, total=None, repeats=None):
+
+    # prep the wave file
+    waveFile = openWave(output)
+
+    # with workers the rows are rendered in batches by a process pool, the
+    # batches come back in order so the file is the same as without workers
+    batchSize = 1 if self.workers <= 1 else columnsPerTask
+    batches = prepareBatches(columns, batchSize, self.sampleRate, self.lowestFrequency, self.mode, renderer=self.startRenderer())
+
+    progress = self.metrics.progress("Generating sine waves", total, "rows")
+    counts = itertools.repeat(1) if repeats is None else iter(repeats.tolist())
+    self.notes = 0
+    self.oscillators = 0
+    for blocks, clipped, batchNotes, batchOscillators in orderedMap(synthesis.renderColumns, batches, self.workers, self.pool()):
+      for sineList in blocks:
+        for i in range(next(counts)):
+          waveFile.write(sineList)
+        progress.advance(1, samples=len(sineList))
+      self.metrics.count("pixels", batchNotes)
+      waveFile.clipped = waveFile.clipped + clipped
+      self.notes = self.notes + batchNotes
+      self.oscillators = self.oscillators + batchOscillators
+
+    # finished writing
+    waveFile.close()
+    self.clipped = waveFile.clipped
+    return waveFile.framesWritten
+
+  # renders only the rows that changed since the last update of the output
+  # file and writes them over the old ones, the first update renders all of
+  # them. Returns the number of rows rendered
+  def update(self, image, outputFile):
+    if isPath(outputFile) == False:
+      raise ConversionError("Updates need the path of the wave file")
+    if self.preview > 0:
+      raise ConversionError("Previews can not be updated, they are rendered in full")
+    imageObject = self.readImage(image)
+    with self.metrics.stage("hashColumns"):
+      hashes = hashColumns(imageObject)
+    parameters = {"sampleRate": self.sampleRate, "lowestFrequency": self.lowestFrequency, "octaveFrequencies": self.octaveFrequencies, "mode": self.mode, "frameRate": frameRate}
+    index = ColumnIndex(os.fspath(outputFile), parameters, self.sampleRate)
+    changed = index.changed(hashes, self.mode in ("continuous", "spectrogram"))
+
+    index.discard()
+    if changed is None:
+      self.convert(imageObject, outputFile)
+      index.store(hashes)
+      return len(hashes)
+
+    with self.metrics.stage("convertDataToWave"):
+      self.spliceColumns(imageObject, changed, index.dataOffset, outputFile)
+    index.store(hashes)
+    return len(changed)
+
+  # renders the given rows and writes each over its ticks in the wave file
+  def spliceColumns(self, imageObject, changed, dataOffset, outputFile):
+    batchSize = 1 if self.workers <= 1 else columnsPerTask
+    renderer = self.startRenderer()
+    batches = itertools.chain.from_iterable(self.runBatches(imageObject, left, right, batchSize, renderer) for left, right in findRuns(changed))
+
+    progress = self.metrics.progress("Generating sine waves", len(changed), "rows")
+    self.clipped = 0
+    self.notes = 0
+    self.oscillators = 0
+    positions = iter(changed)
+    with open(outputFile, "r+b") as waveFile:
+      for blocks, clipped, batchNotes, batchOscillators in orderedMap(synthesis.renderColumns, batches, self.workers, self.pool()):
+        for sineList in blocks:
+          waveFile.seek(dataOffset + next(positions) * self.sampleRate * 2)
+          waveFile.write(np.asarray(sineList, dtype="<i2").tobytes())
+          progress.advance(1, samples=len(sineList))
+        self.metrics.count("pixels", batchNotes)
+        self.clipped = self.clipped + clipped
+        self.notes = self.notes + batchNotes
+        self.oscillators = self.oscillators + batchOscillators
+
+  # the process pool of the converter, started on first use and kept until
+  # close(). None with one worker
+  def pool(self):
+    if self.workers > 1 and self.executor is None:
+      self.executor = ProcessPoolExecutor(self.workers)
+    return self.executor
+
+  # the renderer for the batches of a new conversion on the serial path, it
+  # keeps its oscillator tables from one conversion to the next. None for
+  # the sine and bank modes and with workers, whose batches start their own
+  def startRenderer(self):
+    if self.mode not in synthesis.rendererClasses or self.workers > 1:
+      return None
+    if self.renderer is None:
+      self.renderer = synthesis.createRenderer(self.mode, self.sampleRate, self.lowestFrequency, frameRate)
+    # the first batch seeks
+    self.renderer.column = None
+    return self.renderer
+
+  # the batches of the rows left to right of an image
+  def runBatches(self, imageObject, left, right, batchSize, renderer=None):
+    tiles = ((x, PixelStore.fromImage(imageObject[:, x:min(x + tileWidth, right)])) for x in range(left, right, tileWidth))
+    previous = None
+    if left > 0 and self.mode in ("continuous", "spectrogram"):
+      previous = convertToFrequencies(*PixelStore.fromImage(imageObject[:, left - 1:left]).column(0), self.octaveFrequencies)
+    return prepareBatches(self.iterateColumns(checkTiles(tiles)), batchSize, self.sampleRate, self.lowestFrequency, self.mode, left, previous, renderer)
+
+# image -> midi, every run of equal hue in a row becomes one note
+class ImageToMidi(Converter):
+
+  def __init__(self, ignoreBackground=False, reduce=1, cache=None, metrics=None, verbose=False, preview=0):
+    super().__init__(reduce, cache, metrics, preview)
+    self.ignoreBackground = ignoreBackground
+    self.verbose = verbose
+    buildMidiTables()
+
+    self.added = 0
+    self.deduped = 0
+
+  # writes the midi file of an image, returns the number of notes
+  def convert(self, image, output):
+    with self.metrics.stage("convertImageToMidi"):
+      return self.build(self.encode(image), output)
+
+  # the note batches of an image from left to right (see tonal.midi), the
+  # tiles are converted and encoded while build() takes them
+  def encode(self, image):
+    if self.preview > 0 or isPreview(image):
+      data = self.readPixels(image)
+      batches = encodeRuns(self.countPixels(self.tiles(data)), self.ignoreBackground, self.metrics if self.verbose == True else None, data.width)
+      return scaleNotes(batches, data.previewOf[0], data.previewOf[2])
+    return encodeRuns(self.countPixels(self.tiles(image)), self.ignoreBackground, self.metrics if self.verbose == True else None, self.readWidth(image))
+
+  def countPixels(self, tiles):
+    for left, tile in tiles:
+      self.metrics.count("pixels", len(tile))
+      yield (left, tile)
+
+  def build(self, batches, output):
+    # midiutil is only needed for the midi files
+    from midiutil.MidiFile import MIDIFile
+    noteIndex = NoteIndex()
+
+    # build a mf
+    mf = MIDIFile(16)
+    for i in range(0,15):
+      mf.addTrackName(i, 0, "Track {}".format(i))
+      mf.addTempo(i, 0, 480)
+
+    # add note to that mf, notes starting within a note of the same pitch are
+    # skipped. The notes of runs that go on are added once their end is known
+    first = mf.event_counter
+    # row -> (place in start order, channel, pitch, velocity, start) of an added note whose run goes on
+    openNotes = {}
+    for (rows, ends), (noteRows, channels, pitches, velocities, starts, noteEnds) in batches:
+      for row, end in zip(rows.tolist(), ends.tolist()):
+        if row in openNotes:
+          (place, channel, pitch, velocity, start) = openNotes.pop(row)
+          noteIndex.close(channel, pitch, start, end)
+          self.addNote(mf, first + place, (channel, pitch, velocity, start, end - start))
+
+      for row, channel, pitch, velocity, start, end in zip(noteRows.tolist(), channels.tolist(), pitches.tolist(), velocities.tolist(), starts.tolist(), noteEnds.tolist()):
+        if end < 0:
+          if noteIndex.open(channel, pitch, start):
+            openNotes[row] = (noteIndex.added - 1, channel, pitch, velocity, start)
+        elif noteIndex.add(channel, pitch, start, end - start):
+          self.addNote(mf, first + noteIndex.added - 1, (channel, pitch, velocity, start, end - start))
+
+    self.added = noteIndex.added
+    self.deduped = noteIndex.deduped
+    self.metrics.count("notes", noteIndex.added)
+
+    if isPath(output):
+      with open(output, "wb") as midiFile:
+        mf.writeFile(midiFile)
+    else:
+      mf.writeFile(output)
+    return noteIndex.added
+
+  # midiutil orders the events of a tick by the order the notes were added
+  # in, a note added late gets the place it has in start order
+  def addNote(self, mf, place, note):
+    channel, pitch, velocity, start, duration = note
+    mf.event_counter = place
+    mf.addNote(channel, 0, pitch, start, duration, velocity)
+    if self.verbose == True:
+      self.metrics.log("Added {}".format(note))
+
+# image -> wave, every pixel becomes a grain of 256 ticks of its frequency
+class PixelFrequency(Converter):
+
+  def __init__(self, octaveFrequencies=octaveFrequencies, reduce=1, cache=None, metrics=None, preview=0):
+    super().__init__(reduce, cache, metrics, preview)
+    self.octaveFrequencies = [list(octave) for octave in octaveFrequencies]
+    buildGrainTable(tuple(tuple(octave) for octave in self.octaveFrequencies), frameRate)
+
+  # writes the wave of an image, returns the number of samples
+  def convert(self, image, output):
+    if self.preview > 0 or isPreview(image):
+      return self.convertPreview(self.readPixels(image), output)
+
+    # prep the wave file
+    waveFile = openWave(output)
+    buffer = np.empty((pixelsPerBlock, grainLength))
+
+    # rows from top to bottom, pixels from left to right
+    for top, strip in self.strips(image):
+      for y in range(0, strip.height):
+        (hue, saturation, value) = strip.row(y)
+        for left in range(0, strip.width, pixelsPerBlock):
+          right = min(left + pixelsPerBlock, strip.width)
+
+          # a sine wave with 256 ticks per pixel
+          block = renderGrains(hue[left:right], saturation[left:right], value[left:right], self.octaveFrequencies, buffer[:right - left], frameRate)
+          waveFile.write(block, 44100/2)
+
+    # finished writing
+    waveFile.close()
+    return waveFile.framesWritten
+
+  # every pixel of a preview level is written as often as it is covered, the
+  # grains of a row are rendered once for all the rows it stands for
+  def convertPreview(self, data, output):
+    (level, imageHeight, imageWidth) = data.previewOf
+    rowRepeats = levelRepeats(imageHeight, level)
+    columnRepeats = levelRepeats(imageWidth, level)
+
+    waveFile = openWave(output)
+    grains = np.empty((data.width, grainLength))
+    for y in range(0, data.height):
+      renderGrains(*data.row(y), self.octaveFrequencies, grains, frameRate)
+      (samples, clipped) = saturate(grains, 44100/2)
+      waveFile.clipped = waveFile.clipped + clipped * int(rowRepeats[y])
+      for i in range(rowRepeats[y]):
+        for left in range(0, data.width, pixelsPerBlock):
+          right = min(left + pixelsPerBlock, data.width)
+          waveFile.write(np.repeat(samples[left:right], columnRepeats[left:right], axis=0))
+
+    # finished writing
+    waveFile.close()
+    return waveFile.framesWritten
+
+# image -> wave, every pixel becomes one sample out of its hue
+class PixelByPixel(Converter):
+
+  def __init__(self, order="column", reduce=1, metrics=None):
+    super().__init__(reduce, None, metrics)
+    if order not in scanOrders:
+      raise ConversionError("Scan order not supported. Use {}".format(", ".join(scanOrders)))
+    self.order = order
+    # the hues of the colors seen so far, 32 MiB
+    self.hueTable = HueTable()
+
+  # writes the wave of an image, returns the number of samples
+  def convert(self, image, output):
+    imageObject = self.readImage(image)
+
+    # prep the wave file
+    waveFile = openWave(output)
+
+    # i just need the hue value and convert it to the sample for that tick
+    for hue in iterateScan(imageObject, self.order, self.hueTable):
+      waveFile.write(convertToSamples(hue))
+
+    # finished writing
+    waveFile.close()
+    return waveFile.framesWritten
+
+# a two second b minor chord as a test
+class Chord(Converter):
+
+  def __init__(self, notes=chordNotes, length=88200):
+    super().__init__()
+    self.samples = generateChord(notes, length)
+
+  def convert(self, output):
+    waveFile = openWave(output)
+    waveFile.write(self.samples, 8000/2)
+
+    # finished writing
+    waveFile.close()
+    return waveFile.framesWritten
+
+# white, pink or brown noise, the same seed gives the same noise every call
+class Noise(Converter):
+
+  def __init__(self, color="white", seed=None):
+    super().__init__()
+    if color not in noiseColors:
+      raise ConversionError("Color not supported. Use {}".format(", ".join(noiseColors)))
+    self.color = color
+    self.seed = seed
+
+  # writes count samples of noise
+  def convert(self, count, output):
+    generator = NoiseGenerator(self.color, self.seed)
+    waveFile = openWave(output)
+
+    # one buffer of random values at a time
+    for start in range(0, count, flushSize):
+      waveFile.write(generator.generate(min(flushSize, count - start)), 32767)
+    waveFile.close()
+    return waveFile.framesWritten
+
+def isPath(target):
+  return isinstance(target, (str, os.PathLike))
+
+# a PixelStore of a preview level
+def isPreview(image):
+  return isinstance(image, PixelStore) and image.previewOf is not None
+
+# the tiles or strips of an image, errors reading them are conversion errors
+def checkTiles(tiles):
+  while True:
+    try:
+      tile = next(tiles, None)
+    except (OSError, ValueError) as error:
+      raise ConversionError("Image not usable: {}".format(error))
+    if tile is None:
+      return
+    yield tile
+
+# a FrameWriter for paths and file like objects, writers are used as they are
+def openWave(output):
+  if isinstance(output, (FrameWriter, PcmStreamer)):
+    return output
+  return FrameWriter(os.fspath(output) if isPath(output) else output, frameRate)
+
+# tasks for synthesis.renderColumns, continuous batches also get the row before them.
+# firstColumn and previous (the notes of the row before it) start somewhere in the image
+def prepareBatches(columns, batchSize, sampleRate, lowestFrequency, mode, firstColumn=0, previous=None, renderer=None):
+  for batch in batched(columns, batchSize):
+    yield (batch, sampleRate, lowestFrequency, 250/2, frameRate, mode, firstColumn, previous, renderer)
+    firstColumn = firstColumn + len(batch)
+    if mode in ("continuous", "spectrogram"):
+      previous = batch[-1]
+
+# the notes of a preview last as long as the pixels they stand for
+def scaleNotes(batches, level, imageWidth):
+  for (rows, ends), (noteRows, channels, notes, velocities, starts, noteEnds) in batches:
+    noteEnds = np.where(noteEnds < 0, -1, np.minimum(noteEnds << level, imageWidth))
+    yield ((rows, np.minimum(ends << level, imageWidth)), (noteRows, channels, notes, velocities, starts << level, noteEnds))
+
+# (first, last + 1) of every run of consecutive numbers
+def findRuns(numbers):
+  runs = []
+  for number in numbers:
+    if len(runs) > 0 and runs[-1][1] == number:
+      runs[-1][1] = number + 1
+    else:
+      runs.append([number, number + 1])
+  return runs
+
+# the chord sample by sample, the way the script always summed it
+def generateChord(notes, length):
+  sineList = []
+
+  for x in range(length):
+    sineWave = 0
+    for frequency, amplitude in notes:
+      sineWave = sineWave + amplitude * math.sin(2*math.pi*frequency*(x/44100))
+    sineList.append(sineWave)
+
+  return np.array(sineList)
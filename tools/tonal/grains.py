@@ -0,0 +1,58 @@
+# NAME
+#   tonal.grains - one short sine per pixel
+#
+# SYNOPSIS
+#   from tonal.grains import renderGrains, grainLength
+#   block = np.empty((len(hue), grainLength))
+#   renderGrains(hue, saturation, value, octaveFrequencies, block)
+#
+# DESCRIPTION
+#   image-to-wave-pf turns every pixel into a grain: grainLength ticks of a
+#   sine with the frequency and amplitude of the pixel. The frequencies are
+#   integers out of the octave table, so buildGrainTable computes the sine of
+#   every distinct frequency once (with math.sin, like the per pixel loop did)
+#   together with an index from (value, hue) to its grain. A pixel is then a
+#   copy of its grain times its amplitude, written into a buffer the caller
+#   keeps, and the samples are the same as the ones of the loop.
+#
+# LEGAL NOTE
+#   Written and maintained by Laura Herzog (laura-herzog@outlook.com)
+#   Permission to copy and modify is granted under the AGPL license
+#   Project Information: https://github.com/lauraherzog/universum-tonal/
+
+import math
+from functools import lru_cache
+import numpy as np
+from tonal.mapping import buildWaveTables
+
+frameRate = 44100
+
+# ticks per pixel
+grainLength = 256
+
+# the grains of every frequency of an octave table and the row of the grain
+# for every (value, hue)
+@lru_cache(maxsize=None)
+def buildGrainTable(octaveFrequencies, frameRate=frameRate):
+  (frequencyTable, amplitudeTable) = buildWaveTables(octaveFrequencies)
+  (frequencies, index) = np.unique(frequencyTable, return_inverse=True)
+
+  grains = np.empty((len(frequencies), grainLength), dtype=np.float64)
+  for row, frequency in enumerate(frequencies.tolist()):
+    grains[row] = [math.sin(2*math.pi*frequency*(tick/frameRate)) for tick in range(grainLength)]
+
+  index = index.reshape(frequencyTable.shape)
+  grains.flags.writeable = False
+  index.flags.writeable = False
+  return (grains, index)
+
+# writes the grains of some pixels, scaled by their amplitude, into out
+# (pixels x grainLength) and returns it
+def renderGrains(hue, saturation, value, octaveFrequencies, out, frameRate=frameRate):
+  octaveFrequencies = tuple(tuple(octave) for octave in octaveFrequencies)
+  (grains, index) = buildGrainTable(octaveFrequencies, frameRate)
+  amplitudes = buildWaveTables(octaveFrequencies)[1][saturation]
+
+  np.take(grains, index[value, hue], axis=0, out=out)
+  out *= amplitudes[:, None]
+  return out
@@ -0,0 +1,127 @@
+# NAME
+#   tonal.hsv - vectorized HSV conversion
+#
+# SYNOPSIS
+#   from tonal.hsv import convertToHSVPlanes
+#   (h, s, v) = convertToHSVPlanes(cv2.imread(inputFile))
+#   (h, s, v) = convertToHSVPlanes(cv2.imread(inputFile), order="F")
+#   h = HueTable().convert(cv2.imread(inputFile))
+#
+# DESCRIPTION
+#   Converts a whole cv2 image (BGR, uint8) to quantized hue, saturation and
+#   value planes in one batched call. The math mirrors colorsys.rgb_to_hsv step
+#   by step in float64, so the integers are identical to the per pixel
+#   int(h*360), int(s*100), int(v*100) the tools used before. With order="F"
+#   the planes are stored column by column, which suits converters that read
+#   the image from left to right.
+#
+#   HueTable is for converters that only need the hue of many pixels. It keeps
+#   the hue of every color (packed bgr, 2^24 entries) it has seen, so only
+#   colors that were not seen before go through the float math.
+#
+#   Run this file directly to check the parity against colorsys:
+#     python3 -m tonal.hsv [--full]
+#
+# LEGAL NOTE
+#   Written and maintained by Laura Herzog (laura-herzog@outlook.com)
+#   Permission to copy and modify is granted under the AGPL license
+#   Project Information: https://github.com/lauraherzog/universum-tonal/
+
+import sys, colorsys
+import numpy as np
+
+# rows converted per batch, keeps the float64 temporaries small
+chunkRows = 256
+# colors converted per batch by HueTable
+chunkColors = 1 << 16
+
+def convertToHSVPlanes(imageObject, order="C"):
+  imageHeigth, imageWidth = imageObject.shape[:2]
+  h = np.empty((imageHeigth, imageWidth), dtype=np.uint16, order=order)
+  s = np.empty((imageHeigth, imageWidth), dtype=np.uint8, order=order)
+  v = np.empty((imageHeigth, imageWidth), dtype=np.uint8, order=order)
+
+  for top in range(0, imageHeigth, chunkRows):
+    bottom = min(top + chunkRows, imageHeigth)
+    (h[top:bottom], s[top:bottom], v[top:bottom]) = convertChunk(imageObject[top:bottom])
+
+  return (h, s, v)
+
+# the same steps as colorsys.rgb_to_hsv, just on whole arrays
+def convertChunk(chunk):
+  # rgb values are switched in cv2
+  b = chunk[..., 0] / 255
+  g = chunk[..., 1] / 255
+  r = chunk[..., 2] / 255
+
+  maxc = np.maximum(np.maximum(r, g), b)
+  minc = np.minimum(np.minimum(r, g), b)
+  rangec = maxc - minc
+  grey = minc == maxc
+
+  # avoid divisions by zero, the grey pixels are masked out afterwards
+  safeMax = np.where(maxc == 0, 1.0, maxc)
+  safeRange = np.where(grey, 1.0, rangec)
+
+  s = np.where(grey, 0.0, rangec / safeMax)
+  rc = (maxc - r) / safeRange
+  gc = (maxc - g) / safeRange
+  bc = (maxc - b) / safeRange
+
+  h = np.where(r == maxc, bc - gc, np.where(g == maxc, 2.0 + rc - bc, 4.0 + gc - rc))
+  h = np.where(grey, 0.0, (h / 6.0) % 1.0)
+
+  return ((h * 360).astype(np.uint16), (s * 100).astype(np.uint8), (maxc * 100).astype(np.uint8))
+
+# hue of the colors as they show up, the table takes 32 MiB
+class HueTable:
+
+  # hues are 0 to 359, this marks colors that were not converted yet
+  unknown = 0xffff
+
+  def __init__(self):
+    self.hues = np.full(1 << 24, self.unknown, dtype=np.uint16)
+
+  def convert(self, imageObject):
+    colors = imageObject[..., 0].astype(np.uint32)
+    colors |= imageObject[..., 1].astype(np.uint32) << 8
+    colors |= imageObject[..., 2].astype(np.uint32) << 16
+
+    hues = self.hues[colors]
+    unknown = hues == self.unknown
+    if not unknown.any():
+      return hues
+
+    # every new color once
+    new = np.sort(colors[unknown])
+    missing = new[np.concatenate(([True], new[1:] != new[:-1]))]
+    for start in range(0, len(missing), chunkColors):
+      batch = missing[start:start + chunkColors]
+      pixels = np.stack((batch & 255, (batch >> 8) & 255, batch >> 16), axis=-1).astype(np.uint8)
+      self.hues[batch] = convertChunk(pixels)[0]
+    hues[unknown] = self.hues[colors[unknown]]
+    return hues
+
+def convertToHSV(b, g, r):
+  (h, s, v) = colorsys.rgb_to_hsv(r / 255, g / 255, b / 255)
+  (h, s, v) = (int(h*360), int(s*100), int(v*100))
+  return (h, s, v)
+
+# compares the planes with colorsys, either a grid of the rgb cube or all of it
+def checkParity(full=False):
+  step = 1 if full else 5
+  channel = np.arange(0, 256, step, dtype=np.uint8)
+  b, g, r = np.meshgrid(channel, channel, channel, indexing="ij")
+  imageObject = np.stack((b.ravel(), g.ravel(), r.ravel()), axis=-1).reshape(len(channel), -1, 3)
+
+  (h, s, v) = convertToHSVPlanes(imageObject)
+  mismatches = 0
+  for (pb, pg, pr), ph, ps, pv in zip(imageObject.reshape(-1, 3).tolist(), h.ravel().tolist(), s.ravel().tolist(), v.ravel().tolist()):
+    if convertToHSV(pb, pg, pr) != (ph, ps, pv):
+      mismatches = mismatches + 1
+
+  print("Checked {} colors, {} mismatches".format(h.size, mismatches))
+  return mismatches == 0
+
+if __name__ == "__main__":
+  sys.exit(0 if checkParity("--full" in sys.argv[1:]) else 1)
@@ -0,0 +1,275 @@
+# NAME
+#   tonal.imagefile - image readers
+#
+# SYNOPSIS
+#   from tonal.imagefile import openImage
+#   imageObject = openImage(inputFile)
+#   imageObject = openImage(inputFile, reduce=4)
+#   tile = imageObject[:, left:left + tileWidth]
+#   (height, width) = imageSize(inputFile)
+#
+# DESCRIPTION
+#   Opens an image as something that can be sliced like a cv2 image (BGR,
+#   uint8, height x width x 3). JPEG and PNG files are decoded by cv2 as a
+#   whole. Raw inputs are memory mapped instead and only the slices that are
+#   asked for are copied out:
+#
+#   - .npy files with uint8 pixels, either (height, width, 3) in BGR order
+#     like np.save(path, cv2.imread(...)) writes them or (height, width)
+#     for grey images
+#   - uncompressed 8 bit TIFF and BigTIFF files with grey, RGB or RGBA
+#     pixels stored in strips
+#
+#   Slices are copied out a block of rows at a time and the mapped pages of
+#   a block are handed back to the kernel right after, so the resident memory
+#   stays at about one tile however big the image is. The rows are stored one
+#   after another, so a slice of a few columns still reads a page of every
+#   row, and a file bigger than the page cache is read from disk again for
+#   every tile (see tonal.pixels).
+#
+#   With reduce (2, 4 or 8) the image is read at a fraction of its size.
+#   cv2 decodes JPEG and PNG files at that size (IMREAD_REDUCED_COLOR_*), of
+#   raw inputs every reduce-th pixel of every reduce-th row is read.
+#
+#   imageSize reads only the header of a file, e.g. to show progress before
+#   the image is decoded.
+#
+# LEGAL NOTE
+#   Written and maintained by Laura Herzog (laura-herzog@outlook.com)
+#   Permission to copy and modify is granted under the AGPL license
+#   Project Information: https://github.com/lauraherzog/universum-tonal/
+
+import mmap, struct
+import cv2
+import numpy as np
+
+decodedExtensions = ('.png', '.jpg', '.jpeg')
+mappedExtensions = ('.npy', '.tif', '.tiff')
+imageExtensions = decodedExtensions + mappedExtensions
+
+# reduce factor -> cv2 flag
+reducedFlags = {
+  1: cv2.IMREAD_COLOR,
+  2: cv2.IMREAD_REDUCED_COLOR_2,
+  4: cv2.IMREAD_REDUCED_COLOR_4,
+  8: cv2.IMREAD_REDUCED_COLOR_8
+}
+
+# rows copied before their pages are released
+releaseRows = 256
+
+# tiff field types -> (size, numpy type)
+tiffTypes = {1: (1, "u1"), 3: (2, "u2"), 4: (4, "u4"), 16: (8, "u8")}
+
+def openImage(inputFile, reduce=1):
+  if reduce not in reducedFlags:
+    raise ValueError("reduce has to be 1, 2, 4 or 8")
+
+  if inputFile.lower().endswith(mappedExtensions):
+    with open(inputFile, "rb") as imageFile:
+      mapping = mmap.mmap(imageFile.fileno(), 0, access=mmap.ACCESS_READ)
+    if inputFile.lower().endswith(".npy"):
+      layout = readNpyLayout(mapping)
+    else:
+      layout = readTiffLayout(mapping)
+    return MappedImage(mapping, *layout, step=reduce)
+
+  # reduced reads of images smaller than the reduction fail in cv2
+  try:
+    imageObject = cv2.imread(inputFile, reducedFlags[reduce])
+  except cv2.error as error:
+    raise ValueError("{} could not be decoded: {}".format(inputFile, error))
+  if imageObject is None:
+    raise ValueError("{} could not be decoded".format(inputFile))
+  return imageObject
+
+# (height, width) of an image as openImage would return it, None if the
+# header is not understood
+def imageSize(inputFile, reduce=1):
+  if inputFile.lower().endswith(mappedExtensions):
+    return openImage(inputFile, reduce).shape[:2]
+
+  with open(inputFile, "rb") as imageFile:
+    header = imageFile.read(24)
+    if header[:8] == b"\x89PNG\r\n\x1a\n" and header[12:16] == b"IHDR":
+      (width, height) = struct.unpack(">II", header[16:24])
+      # reduced pngs are resized down
+      return (height // reduce, width // reduce)
+    elif header[:2] == b"\xff\xd8":
+      size = readJpegSize(imageFile)
+      if size is None:
+        return None
+      (height, width) = size
+      # jpegs are decoded scaled, partial blocks are kept
+      return (-(-height // reduce), -(-width // reduce))
+  return None
+
+# walks the jpeg segments up to the start of frame
+def readJpegSize(imageFile):
+  imageFile.seek(2)
+  while True:
+    marker = imageFile.read(4)
+    if len(marker) < 4 or marker[0] != 0xff:
+      return None
+    (length,) = struct.unpack(">H", marker[2:4])
+    # start of frame markers, not the huffman (c4), jpg (c8) and arithmetic (cc) tables
+    if 0xc0 <= marker[1] <= 0xcf and marker[1] not in (0xc4, 0xc8, 0xcc):
+      return struct.unpack(">HH", imageFile.read(5)[1:5])
+    imageFile.seek(length - 2, 1)
+
+# a memory mapped image made of strips of rows, sliced like a cv2 image
+class MappedImage:
+
+  def __init__(self, mapping, strips, height, width, samples, rowsPerStrip, channels, inverted=False, step=1):
+    self.mapping = mapping
+    self.strips = strips
+    self.fullHeight = height
+    self.fullWidth = width
+    self.samples = samples
+    self.rowsPerStrip = rowsPerStrip
+    # the samples that make up blue, green and red
+    self.channels = channels
+    self.inverted = inverted
+    self.step = step
+    self.shape = (len(range(0, height, step)), len(range(0, width, step)), 3)
+    self.dtype = np.dtype(np.uint8)
+
+  def __getitem__(self, key):
+    if not isinstance(key, tuple):
+      key = (key,)
+    key = key + (slice(None),) * (3 - len(key))
+    rows = np.atleast_1d(np.arange(0, self.fullHeight, self.step)[key[0]])
+    columns = np.atleast_1d(np.arange(0, self.fullWidth, self.step)[key[1]])
+
+    imageObject = np.empty((len(rows), len(columns), 3), dtype=np.uint8)
+    columnKey = asSlice(columns)
+    for top in range(0, len(rows), releaseRows):
+      block = rows[top:top + releaseRows]
+      strips = block // self.rowsPerStrip
+      for strip in np.unique(strips):
+        selected = np.flatnonzero(strips == strip)
+        stripRows = block[selected] - strip * self.rowsPerStrip
+        pixels = self.strip(strip)[asSlice(stripRows)][:, columnKey]
+        imageObject[top + selected] = pixels if self.channels == [0, 1, 2] else pixels[..., self.channels]
+        self.release(strip, stripRows.min(), stripRows.max() + 1)
+
+    if self.inverted:
+      np.subtract(255, imageObject, out=imageObject)
+    # single rows and columns drop their axis like they do on arrays
+    return imageObject[tuple(0 if isinstance(part, (int, np.integer)) else slice(None) for part in key[:2]) + key[2:]]
+
+  def __len__(self):
+    return self.shape[0]
+
+  # the rows of a strip as (rows, width, samples) without copying
+  def strip(self, strip):
+    offset, count = self.strips[strip]
+    rows = min(self.rowsPerStrip, self.fullHeight - strip * self.rowsPerStrip)
+    pixels = np.frombuffer(self.mapping, dtype=np.uint8, count=rows * self.fullWidth * self.samples, offset=offset)
+    return pixels.reshape(rows, self.fullWidth, self.samples)
+
+  # drops the pages of some rows of a strip from the resident memory, the
+  # kernel still has them in its page cache
+  def release(self, strip, top, bottom):
+    if hasattr(mmap, "MADV_DONTNEED"):
+      rowSize = self.fullWidth * self.samples
+      start = self.strips[strip][0] + top * rowSize
+      end = self.strips[strip][0] + bottom * rowSize
+      start = start - start % mmap.PAGESIZE
+      self.mapping.madvise(mmap.MADV_DONTNEED, start, min(end, len(self.mapping)) - start)
+
+# evenly spaced indices as a slice, numpy copies those without gathering
+def asSlice(indices):
+  if len(indices) == 1 or (len(indices) > 1 and indices[1] > indices[0] and np.all(np.diff(indices) == indices[1] - indices[0])):
+    return slice(indices[0], indices[-1] + 1, indices[1] - indices[0] if len(indices) > 1 else 1)
+  return indices
+
+# returns the MappedImage arguments for a .npy file
+def readNpyLayout(mapping):
+  header = NpyHeader(mapping)
+  version = np.lib.format.read_magic(header)
+  if version == (1, 0):
+    shape, fortranOrder, dtype = np.lib.format.read_array_header_1_0(header)
+  else:
+    shape, fortranOrder, dtype = np.lib.format.read_array_header_2_0(header)
+
+  if dtype != np.uint8 or fortranOrder or len(shape) not in (2, 3) or (len(shape) == 3 and shape[2] != 3):
+    raise ValueError("Only C ordered uint8 arrays of (height, width) or (height, width, 3) are supported")
+  height, width = shape[:2]
+  samples = 1 if len(shape) == 2 else 3
+  channels = [0, 0, 0] if samples == 1 else [0, 1, 2]
+  return ([(header.position, height * width * samples)], height, width, samples, max(height, 1), channels)
+
+# a file like reader on a mapping, np.lib.format reads the header from it
+class NpyHeader:
+
+  def __init__(self, mapping):
+    self.mapping = mapping
+    self.position = 0
+
+  def read(self, size):
+    data = self.mapping[self.position:self.position + size]
+    self.position = self.position + len(data)
+    return data
+
+# returns the MappedImage arguments for the first image of a tiff file
+def readTiffLayout(mapping):
+  byteOrder = {b"II": "<", b"MM": ">"}.get(mapping[:2])
+  if byteOrder is None:
+    raise ValueError("Not a TIFF file")
+  (version,) = struct.unpack(byteOrder + "H", mapping[2:4])
+  if version == 42:
+    (offset,) = struct.unpack(byteOrder + "I", mapping[4:8])
+    entriesFormat, valueFormat = "H", "I"
+  elif version == 43:
+    (offset,) = struct.unpack(byteOrder + "Q", mapping[8:16])
+    entriesFormat, valueFormat = "Q", "Q"
+  else:
+    raise ValueError("Not a TIFF file")
+
+  # entries are tag, type, count and the value itself if it fits or its offset
+  entriesSize = struct.calcsize(entriesFormat)
+  valueSize = struct.calcsize(valueFormat)
+  (entries,) = struct.unpack(byteOrder + entriesFormat, mapping[offset:offset + entriesSize])
+  tags = {}
+  for entry in range(entries):
+    start = offset + entriesSize + entry * (4 + 2 * valueSize)
+    tag, fieldType, count, value = struct.unpack(byteOrder + "HH" + valueFormat * 2, mapping[start:start + 4 + 2 * valueSize])
+    if fieldType not in tiffTypes:
+      continue
+    size, numpyType = tiffTypes[fieldType]
+    valueStart = start + 4 + valueSize
+    if size * count > valueSize:
+      valueStart = value
+    tags[tag] = np.frombuffer(mapping, dtype=byteOrder + numpyType, count=count, offset=valueStart).astype(np.int64)
+
+  def field(tag, default=None):
+    if tag not in tags:
+      if default is None:
+        raise ValueError("TIFF field {} is missing".format(tag))
+      return default
+    return tags[tag]
+
+  width = int(field(256)[0])
+  height = int(field(257)[0])
+  samples = int(field(277, [1])[0])
+  photometric = int(field(262)[0])
+  if int(field(259, [1])[0]) != 1:
+    raise ValueError("Only uncompressed TIFF files can be mapped")
+  if np.any(field(258, [8]) != 8):
+    raise ValueError("Only 8 bit TIFF files are supported")
+  if samples > 1 and int(field(284, [1])[0]) != 1:
+    raise ValueError("Only TIFF files with interleaved samples are supported")
+  if 273 not in tags:
+    raise ValueError("Only TIFF files stored in strips are supported")
+
+  if photometric in (0, 1):
+    channels = [0, 0, 0]
+  elif photometric == 2 and samples >= 3:
+    channels = [2, 1, 0]
+  else:
+    raise ValueError("Only grey and RGB TIFF files are supported")
+
+  rowsPerStrip = min(int(field(278, [height])[0]), height)
+  strips = list(zip(field(273).tolist(), field(279).tolist()))
+  return (strips, height, width, samples, max(rowsPerStrip, 1), channels, photometric == 0)
@@ -0,0 +1,117 @@
+# NAME
+#   tonal.incremental - render only the changed columns of a wave file again
+#
+# SYNOPSIS
+#   from tonal.incremental import ColumnIndex, hashColumns
+#   index = ColumnIndex(outputFile, parameters, sampleRate)
+#   hashes = hashColumns(imageObject)
+#   columns = index.changed(hashes, dependsOnPrevious)
+#   ...
+#   index.store(hashes)
+#
+# DESCRIPTION
+#   Every column of image-to-wave becomes sampleRate ticks of the wave file
+#   and its samples only depend on the pixels of that column, in the
+#   continuous and spectrogram modes also on the column before it (which is
+#   faded or overlapped from). The index keeps a hash of the pixels of every
+#   column next to the output (<output>.columns, json), together with the
+#   parameters of the render and the size and modification time of the wave
+#   file. When the image is rendered again with the same parameters only the
+#   columns whose hash changed, and the columns right after them if they
+#   depend on the previous one, have to be rendered. They are written over
+#   their ticks in the existing file, the rest of the file is not touched.
+#
+#   Anything that does not fit (no index, other parameters, another image
+#   size, a wave file written or touched by something else) means the whole
+#   file is rendered. The index is removed before the file is changed and
+#   written again afterwards, so an interrupted update is followed by a full
+#   render.
+#
+# LEGAL NOTE
+#   Written and maintained by Laura Herzog (laura-herzog@outlook.com)
+#   Permission to copy and modify is granted under the AGPL license
+#   Project Information: https://github.com/lauraherzog/universum-tonal/
+
+import os, json, wave, struct, hashlib
+import numpy as np
+from tonal.pixels import tileWidth
+
+# bump when the hashes or the layout of the index change
+indexVersion = 1
+
+class ColumnIndex:
+
+  def __init__(self, outputFile, parameters, sampleRate):
+    self.outputFile = outputFile
+    self.path = outputFile + ".columns"
+    self.parameters = parameters
+    self.sampleRate = sampleRate
+    # byte offset of the first sample, known after changed()
+    self.dataOffset = None
+
+  # the sorted columns to render again, None if the whole file has to be rendered
+  def changed(self, hashes, dependsOnPrevious=False):
+    try:
+      with open(self.path) as indexFile:
+        index = json.load(indexFile)
+      (self.dataOffset, frames) = readDataChunk(self.outputFile)
+    except (OSError, ValueError, EOFError, wave.Error):
+      return None
+
+    if index.get("version") != indexVersion or index.get("parameters") != json.loads(json.dumps(self.parameters)):
+      return None
+    if index.get("output") != outputSignature(self.outputFile) or len(index.get("columns", ())) != len(hashes):
+      return None
+    if frames != len(hashes) * self.sampleRate:
+      return None
+
+    changed = np.flatnonzero(np.array(index["columns"]) != np.array(hashes))
+    if dependsOnPrevious:
+      changed = np.union1d(changed, changed[changed + 1 < len(hashes)] + 1)
+    return changed.tolist()
+
+  # forgets the hashes before the wave file is changed
+  def discard(self):
+    if os.path.exists(self.path):
+      os.remove(self.path)
+
+  # keeps the hashes of the wave file as it is now
+  def store(self, hashes):
+    index = {"version": indexVersion, "parameters": self.parameters, "output": outputSignature(self.outputFile), "columns": list(hashes)}
+    temporaryPath = self.path + ".tmp"
+    with open(temporaryPath, "w") as indexFile:
+      json.dump(index, indexFile)
+    os.replace(temporaryPath, self.path)
+
+# a hash of the pixels of every column of a cv2 image, left to right
+def hashColumns(imageObject, tileWidth=tileWidth):
+  hashes = []
+  for left in range(0, imageObject.shape[1], tileWidth):
+    # one column after another in memory
+    tile = np.ascontiguousarray(np.asarray(imageObject[:, left:left + tileWidth]).swapaxes(0, 1))
+    hashes.extend(hashlib.blake2b(column.tobytes(), digest_size=16).hexdigest() for column in tile)
+  return hashes
+
+# size and modification time, the wave file has to be the one the index was written for
+def outputSignature(outputFile):
+  stat = os.stat(outputFile)
+  return [stat.st_size, stat.st_mtime_ns]
+
+# (offset of the samples, number of samples) of a mono 16 bit wave file
+def readDataChunk(waveFile):
+  with wave.open(waveFile, "rb") as reader:
+    if reader.getnchannels() != 1 or reader.getsampwidth() != 2:
+      raise ValueError("not a mono 16 bit wave file")
+    frames = reader.getnframes()
+
+  with open(waveFile, "rb") as source:
+    source.seek(12)
+    while True:
+      header = source.read(8)
+      if len(header) < 8:
+        raise ValueError("no data chunk")
+      (name, size) = struct.unpack("<4sI", header)
+      if name == b"data":
+        return (source.tell(), frames)
+      # chunks are padded to an even size
+      source.seek(size + (size & 1), os.SEEK_CUR)
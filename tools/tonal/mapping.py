@@ -0,0 +1,106 @@
+# NAME
+#   tonal.mapping - HSV to sound mapping tables
+#
+# SYNOPSIS
+#   from tonal.mapping import convertToFrequencies, convertToMidi, convertToSamples
+#   (frequencies, amplitudes) = convertToFrequencies(hue, saturation, value)
+#   (notes, velocities, channels) = convertToMidi(hue, saturation, value)
+#   samples = convertToSamples(hue)
+#
+# DESCRIPTION
+#   The decisions from the .wav and .midi experiments as lookup tables. The
+#   quantized HSV space is small (361 x 101 x 101), so every formula is
+#   evaluated once per possible input and a whole plane is mapped with a
+#   single gather:
+#
+#   - wave: the value picks the octave, the hue the frequency within that
+#     octave and the saturation the amplitude between 0 and 1.
+#   - midi: the hue picks the note, the saturation the velocity and the
+#     value the channel. Greyscale pixels (velocity <= 5) go to channel 15.
+#   - pixel by pixel: the hue becomes one int16 sample.
+#
+#   The tables are filled with the original per pixel formulas, so the
+#   results are identical. Wave tables are built once per octave table, any
+#   list of [lowest, highest] frequencies can be used; the value is spread
+#   over all of its octaves.
+#
+# LEGAL NOTE
+#   Written and maintained by Laura Herzog (laura-herzog@outlook.com)
+#   Permission to copy and modify is granted under the AGPL license
+#   Project Information: https://github.com/lauraherzog/universum-tonal/
+
+import json
+from functools import lru_cache
+import numpy as np
+
+octaveFrequencies = [
+  [16.35, 30.87],
+  [32.70, 61.74],
+  [65.41, 123.47],
+  [130.81, 246.94],
+  [261.63, 493.88],
+  [523.25, 987.77],
+  [1046.50, 1975.53],
+  [2093.00, 3951.07],
+  [4186.01,  7902.13]
+]
+
+# reads an octave table from a json file, e.g. [[16.35, 30.87], [32.70, 61.74]]
+def loadOctaveTable(path):
+  with open(path) as source:
+    table = json.load(source)
+
+  if isinstance(table, list) == False or len(table) == 0:
+    raise ValueError("The octave table needs at least one octave")
+  for octave in table:
+    if isinstance(octave, list) == False or len(octave) != 2 or not all(isinstance(frequency, (int, float)) for frequency in octave):
+      raise ValueError("Every octave needs a lowest and a highest frequency")
+
+  return [[float(lowest), float(highest)] for lowest, highest in table]
+
+# frequency[value, hue] and amplitude[saturation] for one octave table
+@lru_cache(maxsize=None)
+def buildWaveTables(octaveFrequencies):
+  highestOctave = len(octaveFrequencies) - 1
+  frequencies = np.empty((101, 361), dtype=np.int64)
+  for v in range(101):
+    octave = int((((v - 0) * (highestOctave - (0))) / (100 - 0)) + (0))
+    for h in range(361):
+      frequencies[v, h] = int((((h - 0) * (octaveFrequencies[octave][1] - (octaveFrequencies[octave][0]))) / (360 - 0)) + (octaveFrequencies[octave][0]))
+
+  amplitudes = np.array([(((s - 0) * (1 - (0))) / (100 - 0)) + (0) for s in range(101)], dtype=np.float64)
+  frequencies.flags.writeable = False
+  amplitudes.flags.writeable = False
+  return (frequencies, amplitudes)
+
+# note[hue], velocity[saturation] and channel[saturation, value]
+@lru_cache(maxsize=None)
+def buildMidiTables():
+  notes = np.array([int((((h - 0) * (108 - 21)) / (360 - 0)) + 21) for h in range(361)], dtype=np.int64)
+  velocities = np.array([int((((s - 0) * (127 - 0)) / (100 - 0)) + 0) for s in range(101)], dtype=np.int64)
+  channels = np.empty((101, 101), dtype=np.int64)
+  for s in range(101):
+    for v in range(101):
+      channels[s, v] = 15 if velocities[s] <= 5 else int((((v - 0) * (0 - 14)) / (100 - 0)) + 14)
+
+  for table in (notes, velocities, channels):
+    table.flags.writeable = False
+  return (notes, velocities, channels)
+
+# sample[hue] for the pixel by pixel conversion
+@lru_cache(maxsize=None)
+def buildSampleTable():
+  samples = np.array([int((((h - 0) * (32767 - (-32767))) / (360 - 0)) + (-32767)) for h in range(361)], dtype=np.int16)
+  samples.flags.writeable = False
+  return samples
+
+def convertToFrequencies(hue, saturation, value, octaveFrequencies=octaveFrequencies):
+  (frequencyTable, amplitudeTable) = buildWaveTables(tuple(tuple(octave) for octave in octaveFrequencies))
+  return (frequencyTable[value, hue], amplitudeTable[saturation])
+
+def convertToMidi(hue, saturation, value):
+  (noteTable, velocityTable, channelTable) = buildMidiTables()
+  return (noteTable[hue], velocityTable[saturation], channelTable[saturation, value])
+
+def convertToSamples(hue):
+  return buildSampleTable()[hue]
@@ -0,0 +1,189 @@
+# NAME
+#   tonal.metrics - stage timers, progress and profiling
+#
+# SYNOPSIS
+#   from tonal.metrics import Metrics
+#   metrics = Metrics(profileFile=None, traceMemory=False)
+#   with metrics.stage("convertDataToWave"):
+#     progress = metrics.progress("Generating sine waves", width, "rows")
+#     for ...:
+#       progress.advance(1, samples=sampleRate)
+#   metrics.finish()
+#   metrics.dump("metrics.json")
+#
+# DESCRIPTION
+#   Replaces a print per row with numbers that say something: every stage is
+#   timed, counters (pixels, samples, notes) add up to rates per second and
+#   progress lines with the rate and the time left are printed at most once
+#   per interval. Verbose messages go through log(), which is rate limited as
+#   well and tells how many lines it skipped.
+#
+#   With profileFile the whole run is profiled by cProfile, the stats are
+#   written to that file (read them with python3 -m pstats) and the top
+#   functions are printed. With traceMemory the peak memory of every stage is
+#   taken by tracemalloc, which slows down the run. Stages may be nested, the
+#   peak of a nested stage is counted from the start of the outermost one.
+#
+#   dump() writes stages, counters and rates as JSON. With verbose False
+#   nothing is printed at all, the numbers are still kept.
+#
+# LEGAL NOTE
+#   Written and maintained by Laura Herzog (laura-herzog@outlook.com)
+#   Permission to copy and modify is granted under the AGPL license
+#   Project Information: https://github.com/lauraherzog/universum-tonal/
+
+import io, json, time, contextlib, cProfile, pstats, tracemalloc
+
+# seconds between two progress or log lines
+printInterval = 1.0
+
+class Metrics:
+
+  def __init__(self, profileFile=None, traceMemory=False, interval=printInterval, verbose=True):
+    self.profileFile = profileFile
+    self.traceMemory = traceMemory
+    self.interval = interval
+    self.verbose = verbose
+    self.started = time.perf_counter()
+    self.seconds = None
+    # stage name -> {"seconds": ..., "peakBytes": ...}, in the order they ran
+    self.stages = {}
+    self.counters = {}
+    self.depth = 0
+    self.lastLog = None
+    self.skippedLogs = 0
+
+    self.profiler = None
+    if profileFile is not None:
+      self.profiler = cProfile.Profile()
+      self.profiler.enable()
+    if traceMemory:
+      tracemalloc.start()
+
+  @contextlib.contextmanager
+  def stage(self, name):
+    if self.traceMemory and self.depth == 0:
+      tracemalloc.reset_peak()
+    self.depth = self.depth + 1
+    started = time.perf_counter()
+    try:
+      yield
+    finally:
+      self.depth = self.depth - 1
+      record = self.stages.setdefault(name, {"seconds": 0.0, "peakBytes": None})
+      record["seconds"] = record["seconds"] + time.perf_counter() - started
+      if self.traceMemory:
+        record["peakBytes"] = max(record["peakBytes"] or 0, tracemalloc.get_traced_memory()[1])
+
+  def count(self, name, amount=1):
+    self.counters[name] = self.counters.get(name, 0) + amount
+
+  def progress(self, label, total=None, unit="rows"):
+    return Progress(self, label, total, unit)
+
+  # prints a verbose message unless one was printed within the interval
+  def log(self, message):
+    if self.verbose == False:
+      return
+    now = time.perf_counter()
+    if self.lastLog is not None and now - self.lastLog < self.interval:
+      self.skippedLogs = self.skippedLogs + 1
+      return
+    if self.skippedLogs > 0:
+      message = "{} ({} lines skipped)".format(message, self.skippedLogs)
+      self.skippedLogs = 0
+    print(message)
+    self.lastLog = now
+
+  # stops profiling and tracing, prints the stage times and the profile
+  def finish(self):
+    if self.seconds is not None:
+      return
+    self.seconds = time.perf_counter() - self.started
+    if self.profiler is not None:
+      self.profiler.disable()
+      self.profiler.dump_stats(self.profileFile)
+    if self.traceMemory:
+      tracemalloc.stop()
+    if self.verbose == False:
+      return
+
+    for name, record in self.stages.items():
+      memory = "" if record["peakBytes"] is None else ", peak {:.1f} MiB".format(record["peakBytes"] / (1 << 20))
+      print("Stage {}: {:.2f}s{}".format(name, record["seconds"], memory))
+    rates = ", ".join("{} {}/s".format(formatAmount(rate), name) for name, rate in self.rates().items())
+    if rates != "":
+      print("Throughput: {}".format(rates))
+
+    if self.profiler is not None:
+      stats = io.StringIO()
+      pstats.Stats(self.profiler, stream=stats).sort_stats("cumulative").print_stats(15)
+      print(stats.getvalue())
+
+  # counters per second of the whole run
+  def rates(self):
+    seconds = self.seconds if self.seconds is not None else time.perf_counter() - self.started
+    return {name: amount / seconds for name, amount in self.counters.items()} if seconds > 0 else {}
+
+  def report(self):
+    return {
+      "seconds": self.seconds if self.seconds is not None else time.perf_counter() - self.started,
+      "stages": self.stages,
+      "counters": self.counters,
+      "rates": self.rates()
+    }
+
+  def dump(self, path):
+    with open(path, "w") as metricsFile:
+      json.dump(self.report(), metricsFile, indent=2)
+
+class Progress:
+
+  def __init__(self, metrics, label, total, unit):
+    self.metrics = metrics
+    self.label = label
+    self.total = total
+    self.unit = unit
+    self.done = 0
+    self.started = time.perf_counter()
+    self.lastPrint = self.started
+
+  # adds done units and counts, e.g. advance(1, pixels=height, samples=sampleRate)
+  def advance(self, amount=1, **counts):
+    self.done = self.done + amount
+    for name, count in counts.items():
+      self.metrics.count(name, count)
+
+    now = time.perf_counter()
+    if self.metrics.verbose == False:
+      return
+    if now - self.lastPrint >= self.metrics.interval or self.done == self.total:
+      self.lastPrint = now
+      print(self.line(now))
+
+  def line(self, now):
+    rate = self.done / max(now - self.started, 1e-9)
+    line = "{}: {}".format(self.label, self.done)
+    if self.total is not None and self.total > 0:
+      line = "{}/{} {} ({:.0f}%)".format(line, self.total, self.unit, 100 * self.done / self.total)
+    else:
+      line = "{} {}".format(line, self.unit)
+    line = "{}, {} {}/s".format(line, formatAmount(rate), self.unit)
+    if self.total is not None and self.done < self.total and rate > 0:
+      line = "{}, {} left".format(line, formatDuration((self.total - self.done) / rate))
+    return line
+
+def formatAmount(amount):
+  for factor, suffix in ((1e9, "G"), (1e6, "M"), (1e3, "k")):
+    if amount >= factor:
+      return "{:.1f}{}".format(amount / factor, suffix)
+  return "{:.0f}".format(amount)
+
+def formatDuration(seconds):
+  minutes, seconds = divmod(int(seconds + 0.5), 60)
+  hours, minutes = divmod(minutes, 60)
+  if hours > 0:
+    return "{}h{:02d}m".format(hours, minutes)
+  if minutes > 0:
+    return "{}m{:02d}s".format(minutes, seconds)
+  return "{}s".format(seconds)
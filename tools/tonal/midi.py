@@ -0,0 +1,162 @@
+# NAME
+#   tonal.midi - run-length note encoder
+#
+# SYNOPSIS
+#   from tonal.midi import encodeRuns, NoteIndex
+#   for closed, notes in encodeRuns(iterateTiles(imageObject), ignoreBackground): ...
+#   if noteIndex.add(channel, pitch, start, duration): ...
+#   if noteIndex.open(channel, pitch, start): ... noteIndex.close(channel, pitch, start, end)
+#
+# DESCRIPTION
+#   Turns the tiles of an image into midi notes in one linear pass over the
+#   hue plane, a few columns at a time. Every run of equal hue within an
+#   image row becomes one note which starts at the first pixel of the run and
+#   lasts until the hue changes. The note, velocity and channel are taken
+#   from that first pixel. With ignoreBackground the background pixels
+#   (velocity <= 5) are dropped and the note starts at the first pixel of the
+#   run that is not background.
+#
+#   The notes of a tile come ordered by start, then by row - the order in
+#   which the old pixel by pixel walk found them - and the tiles come from
+#   left to right, so the notes are in that order without sorting. A run can
+#   go on over many tiles: its note is handed out with the tile it starts in
+#   and an end of -1, and the end follows with the tile the run ends in (or
+#   after the last tile). Only the hue of the last column and one flag per
+#   row are carried from tile to tile.
+#
+#   NoteIndex keeps the time covered by the notes added so far as sorted,
+#   merged intervals per (channel, pitch). A note whose start is already
+#   covered is a duplicate; checking and adding is a binary search, and an
+#   append when the notes come ordered by start. A note added by open()
+#   covers every later start until close() tells its end, which is what the
+#   notes of runs that go on need when they are added in start order.
+#
+# LEGAL NOTE
+#   Written and maintained by Laura Herzog (laura-herzog@outlook.com)
+#   Permission to copy and modify is granted under the AGPL license
+#   Project Information: https://github.com/lauraherzog/universum-tonal/
+
+import bisect
+import numpy as np
+from tonal.mapping import buildMidiTables, convertToMidi
+
+# the runs of the tiles of a PixelStore, (left, tile) from left to right.
+# Every batch is ((rows, ends), (rows, channels, notes, velocities, starts,
+# ends)): the runs of the tiles before that end in this tile, and the notes
+# that start in it. With a Metrics the progress is logged through it
+def encodeRuns(tiles, ignoreBackground=False, metrics=None, total=None):
+  lastHue = None
+  noted = None
+  for left, tile in tiles:
+    hue = tile.hue
+    columns = np.arange(tile.width)
+
+    runStart = np.ones(hue.shape, dtype=bool)
+    runStart[:, 1:] = hue[:, 1:] != hue[:, :-1]
+    if lastHue is not None:
+      runStart[:, 0] = hue[:, 0] != lastHue
+
+    # a run ends where the next one starts, found with a running minimum from the right
+    nextStart = np.where(runStart, columns, tile.width)
+    nextStart = np.minimum.accumulate(nextStart[:, ::-1], axis=1)[:, ::-1]
+    runEnd = np.full(hue.shape, tile.width)
+    runEnd[:, :-1] = nextStart[:, 1:]
+
+    # the runs going on from the tile before end at the first start of their row
+    closedRows = np.flatnonzero(nextStart[:, 0] < tile.width) if lastHue is not None else np.zeros(0, dtype=np.int64)
+    closed = (closedRows, left + nextStart[closedRows, 0])
+
+    if ignoreBackground == True:
+      # the first pixel of a run that is not background starts the note, a run
+      # going on from the tile before may have had it there already
+      foreground = buildMidiTables()[1][tile.saturation] > 5
+      runFirst = np.maximum.accumulate(np.where(runStart, columns, -1), axis=1)
+      before = np.full((tile.height, 1), -2) if noted is None else np.where(noted, -1, -2)[:, None]
+      seen = np.maximum.accumulate(np.where(foreground, columns, before), axis=1)
+      lastForeground = np.concatenate((before, seen[:, :-1]), axis=1)
+      noteStart = foreground & (lastForeground < runFirst)
+      noted = seen[:, -1] >= runFirst[:, -1]
+    else:
+      noteStart = runStart
+
+    # transposed, so the notes come ordered by start and then by row
+    x, y = np.nonzero(noteStart.T)
+    (notes, velocities, channels) = convertToMidi(hue[y, x], tile.saturation[y, x], tile.value[y, x])
+    ends = runEnd[y, x]
+    ends = np.where(ends < tile.width, left + ends, -1)
+
+    lastHue = hue[:, -1].copy()
+    right = left + tile.width
+    yield (closed, (y, channels, notes, velocities, left + x, ends))
+    if metrics is not None:
+      metrics.log("Converted columns {} to {} of {}".format(left, right, total))
+
+  # the runs still going on end with the image
+  if lastHue is not None:
+    rows = np.arange(len(lastHue))
+    empty = np.zeros(0, dtype=np.int64)
+    yield ((rows, np.full(len(rows), right)), (empty, empty, empty, empty, empty, empty))
+
+class NoteIndex:
+
+  def __init__(self):
+    # (channel, pitch) -> ([interval starts], [interval ends])
+    self.intervals = {}
+    # (channel, pitch) -> [starts of the notes whose end is not known yet]
+    self.opened = {}
+    self.added = 0
+    self.deduped = 0
+
+  # true if start lies within a note already added for channel and pitch
+  def covers(self, channel, pitch, start):
+    opened = self.opened.get((channel, pitch))
+    if opened and min(opened) <= start:
+      return True
+    if (channel, pitch) not in self.intervals:
+      return False
+    starts, ends = self.intervals[(channel, pitch)]
+    i = bisect.bisect_right(starts, start) - 1
+    return i >= 0 and start < ends[i]
+
+  # adds the note unless its start is covered, returns whether it was added
+  def add(self, channel, pitch, start, duration):
+    if self.covers(channel, pitch, start):
+      self.deduped = self.deduped + 1
+      return False
+    self.insert(channel, pitch, start, start + duration)
+    self.added = self.added + 1
+    return True
+
+  # adds a note whose end is not known yet unless its start is covered, it
+  # covers every later start until it is closed
+  def open(self, channel, pitch, start):
+    if self.covers(channel, pitch, start):
+      self.deduped = self.deduped + 1
+      return False
+    self.opened.setdefault((channel, pitch), []).append(start)
+    self.added = self.added + 1
+    return True
+
+  # the end of a note added by open()
+  def close(self, channel, pitch, start, end):
+    self.opened[(channel, pitch)].remove(start)
+    self.insert(channel, pitch, start, end)
+
+  def insert(self, channel, pitch, start, end):
+    starts, ends = self.intervals.setdefault((channel, pitch), ([], []))
+    i = bisect.bisect_right(starts, start)
+
+    # merge with the interval before if it touches the note
+    if i > 0 and ends[i - 1] >= start:
+      i = i - 1
+      start = starts[i]
+      end = max(end, ends[i])
+      del starts[i], ends[i]
+
+    # and with every following interval the note reaches into
+    while i < len(starts) and starts[i] <= end:
+      end = max(end, ends[i])
+      del starts[i], ends[i]
+
+    starts.insert(i, start)
+    ends.insert(i, end)
@@ -0,0 +1,100 @@
+# NAME
+#   tonal.noise - seeded noise in chunks
+#
+# SYNOPSIS
+#   from tonal.noise import NoiseGenerator
+#   generator = NoiseGenerator("pink", seed=1)
+#   samples = generator.generate(65536)
+#
+# DESCRIPTION
+#   Generates noise a chunk at a time with numpy's Generator instead of one
+#   random.randint call per sample. The same seed gives the same samples no
+#   matter how the duration is split up into chunks.
+#
+#   white  uniform over the whole int16 range, like the tool made it before
+#   pink   Voss-McCartney: rows of random values, row k is drawn again every
+#          2**(k+1) samples, summed up with a white row (-3 dB per octave).
+#          Only one row changes per sample, so the sum is a cumulative sum
+#          of the changes instead of adding up every row for every sample
+#   brown  white noise through a leaky integrator (-6 dB per octave above
+#          a few Hz), evaluated in blocks with a cumulative sum
+#
+#   Samples are floats, white noise between -1 and 1 and pink and brown noise
+#   with an rms of colorLevel. They are scaled and clipped by the FrameWriter.
+#
+# LEGAL NOTE
+#   Written and maintained by Laura Herzog (laura-herzog@outlook.com)
+#   Permission to copy and modify is granted under the AGPL license
+#   Project Information: https://github.com/lauraherzog/universum-tonal/
+
+import numpy as np
+
+noiseColors = ("white", "pink", "brown")
+
+# rows of the pink noise, the slowest one changes every 2**16 samples
+pinkRows = 16
+# feedback of the brown noise integrator, leaks below about 7 Hz at 44.1 kHz
+brownLeak = 0.999
+# samples per block of the integrator, keeps leak**-block well in range
+brownBlock = 1024
+# rms of pink and brown noise, peaks rarely reach full scale
+colorLevel = 0.25
+
+class NoiseGenerator:
+
+  def __init__(self, color="white", seed=None):
+    if color not in noiseColors:
+      raise ValueError("Noise color has to be one of {}".format(", ".join(noiseColors)))
+    self.color = color
+    # one stream for the white noise and one per pink row, so every stream
+    # is drawn in the same order however the chunks are cut
+    streams = np.random.SeedSequence(seed).spawn(pinkRows + 1)
+    self.random = np.random.default_rng(streams[0])
+    self.rowRandom = [np.random.default_rng(stream) for stream in streams[1:]]
+    self.position = 0
+
+    # pink: the current value of every row
+    self.rowValues = np.array([random.uniform(-1, 1) for random in self.rowRandom])
+    # brown: the integrator output of the last sample
+    self.level = 0.0
+    self.powers = brownLeak ** np.arange(1, brownBlock + 1)
+
+  def generate(self, count):
+    if self.color == "white":
+      samples = self.random.integers(-32767, 32768, count) / 32767
+    elif self.color == "pink":
+      samples = self.generatePink(count)
+    else:
+      samples = self.generateBrown(count)
+    self.position = self.position + count
+    return samples
+
+  def generatePink(self, count):
+    total = self.random.uniform(-1, 1, count)
+    steps = np.zeros(count)
+    rowSum = self.rowValues.sum()
+    for row in range(pinkRows):
+      # row k is drawn again at 2**k, then every 2**(k+1) samples
+      period = 1 << (row + 1)
+      first = ((1 << row) - self.position) % period
+      changes = np.arange(first, count, period)
+      if len(changes) == 0:
+        continue
+      values = self.rowRandom[row].uniform(-1, 1, len(changes))
+      steps[changes] = np.diff(values, prepend=self.rowValues[row])
+      self.rowValues[row] = values[-1]
+    total += rowSum + np.cumsum(steps)
+    # the rows and the white row are uniform, each with a variance of 1/3
+    return total * colorLevel / np.sqrt((pinkRows + 1) / 3)
+
+  def generateBrown(self, count):
+    white = self.random.uniform(-1, 1, count)
+    samples = np.empty(count)
+    for start in range(0, count, brownBlock):
+      block = white[start:start + brownBlock]
+      powers = self.powers[:len(block)]
+      # y[n] = leak**n * y[0] + sum(leak**(n-i) * x[i]) as one cumulative sum
+      samples[start:start + len(block)] = powers * (self.level + np.cumsum(block / powers))
+      self.level = samples[start + len(block) - 1]
+    # the integrator has an rms of 1 / sqrt(3 * (1 - leak**2))
+    return samples * colorLevel * np.sqrt(3 * (1 - brownLeak ** 2))
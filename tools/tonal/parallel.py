@@ -0,0 +1,64 @@
+# NAME
+#   tonal.parallel - ordered process pool
+#
+# SYNOPSIS
+#   from tonal.parallel import orderedMap
+#   for result in orderedMap(function, tasks, workers): ...
+#   for result in orderedMap(function, tasks, workers, executor): ...
+#   for batch in batched(iterable, size): ...
+#
+# DESCRIPTION
+#   Like itertools.starmap, but the calls are spread over a pool of worker
+#   processes. Results are yielded in the order of the tasks no matter which
+#   worker finishes first, so the output is the same as with one worker.
+#   Only a limited number of tasks is in flight at a time, which keeps a
+#   streaming producer streaming instead of queueing up the whole image.
+#   Without an executor a pool is started for the call and shut down after
+#   it; an executor of the caller is used as it is and stays up, so its
+#   workers are kept warm from one call to the next.
+#
+# LEGAL NOTE
+#   Written and maintained by Laura Herzog (laura-herzog@outlook.com)
+#   Permission to copy and modify is granted under the AGPL license
+#   Project Information: https://github.com/lauraherzog/universum-tonal/
+
+import itertools
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# tasks in flight per worker
+backlogPerWorker = 4
+
+# the function has to be importable (defined at module level) for the workers
+def orderedMap(function, tasks, workers=1, executor=None):
+  if workers <= 1:
+    yield from itertools.starmap(function, tasks)
+    return
+
+  if executor is None:
+    with ProcessPoolExecutor(workers) as executor:
+      yield from orderedMap(function, tasks, workers, executor)
+    return
+
+  pending = deque()
+  try:
+    for task in tasks:
+      pending.append(executor.submit(function, *task))
+      if len(pending) >= workers * backlogPerWorker:
+        yield pending.popleft().result()
+
+    while len(pending) > 0:
+      yield pending.popleft().result()
+  finally:
+    # a pool that stays up must not go on with the tasks of an aborted call
+    for future in pending:
+      future.cancel()
+
+# lists of up to size items, lazily taken from the iterable
+def batched(iterable, size):
+  iterator = iter(iterable)
+  while True:
+    batch = list(itertools.islice(iterator, size))
+    if len(batch) == 0:
+      return
+    yield batch
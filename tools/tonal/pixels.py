@@ -0,0 +1,119 @@
+# NAME
+#   tonal.pixels - array backed pixel store
+#
+# SYNOPSIS
+#   from tonal.pixels import PixelStore
+#   data = PixelStore.fromFile(inputFile)
+#   (h, s, v) = data[x, y]
+#   (hue, saturation, value) = data.column(x)
+#   for left, tile in iterateTiles(cv2.imread(inputFile)): ...
+#   for top, strip in iterateStrips(cv2.imread(inputFile)): ...
+#
+# DESCRIPTION
+#   Holds the converted HSV values of an image in three typed planes (uint16
+#   hue, uint8 saturation and value) instead of a dict with one tuple per
+#   pixel. That is four bytes per pixel, close to the decoded image itself.
+#   Pixels are addressed by (x, y) where x is the column (left to right) and
+#   y the row (top to bottom). The planes are stored column by column, so
+#   column() returns contiguous views and row() strided views - neither of
+#   them copies.
+#
+#   iterateTiles converts an image a few columns at a time, so converters that
+#   work from left to right only ever hold the HSV values of one tile.
+#   iterateStrips does the same a few rows at a time for the converters that
+#   work from top to bottom.
+#
+#   Files are opened with tonal.imagefile, so raw inputs are memory mapped
+#   and only the tile that is converted is read. Raw files keep their rows
+#   one after another though, so every tile touches a page of every row: a
+#   file that does not fit into the page cache is read from disk again for
+#   every tile. Strips read every page once. The render cache keeps the HSV
+#   values column by column, with it a raw file is read tile by tile only
+#   the first time.
+#
+#   Stores can be written to and read from (width, height) pixelRecord
+#   arrays, which is how the render cache keeps them memory mapped on disk.
+#
+#   A store of a preview level (see tonal.pyramid) has previewOf set to
+#   (level, height, width) of the image it stands for.
+#
+# LEGAL NOTE
+#   Written and maintained by Laura Herzog (laura-herzog@outlook.com)
+#   Permission to copy and modify is granted under the AGPL license
+#   Project Information: https://github.com/lauraherzog/universum-tonal/
+
+import numpy as np
+from tonal.hsv import convertToHSVPlanes
+from tonal.imagefile import openImage
+
+# columns per tile handed out by iterateTiles
+tileWidth = 64
+
+# rows per strip handed out by iterateStrips
+stripHeight = 256
+
+# one pixel as a record, stores are kept on disk as (width, height) records
+pixelRecord = np.dtype([("hue", "<u2"), ("saturation", "u1"), ("value", "u1")])
+
+class PixelStore:
+
+  def __init__(self, hue, saturation, value):
+    self.hue = hue
+    self.saturation = saturation
+    self.value = value
+    self.height, self.width = hue.shape
+    self.previewOf = None
+
+  # converts a cv2 image (BGR) to a store
+  @classmethod
+  def fromImage(cls, imageObject):
+    return cls(*convertToHSVPlanes(imageObject, order="F"))
+
+  # reads and converts an image, the decoded image is dropped right after
+  @classmethod
+  def fromFile(cls, inputFile, reduce=1):
+    return cls.fromImage(openImage(inputFile, reduce))
+
+  # a store on top of (width, height) records, e.g. a memory mapped file
+  @classmethod
+  def fromRecords(cls, records):
+    return cls(records["hue"].T, records["saturation"].T, records["value"].T)
+
+  # copies the pixels into (width, height) records starting at column left
+  def toRecords(self, records, left=0):
+    target = records[left:left + self.width]
+    target["hue"] = self.hue.T
+    target["saturation"] = self.saturation.T
+    target["value"] = self.value.T
+
+  def __getitem__(self, coordinates):
+    x, y = coordinates
+    return (int(self.hue[y, x]), int(self.saturation[y, x]), int(self.value[y, x]))
+
+  def __len__(self):
+    return self.width * self.height
+
+  # the pixels of column x from top to bottom
+  def column(self, x):
+    return (self.hue[:, x], self.saturation[:, x], self.value[:, x])
+
+  # the pixels of row y from left to right
+  def row(self, y):
+    return (self.hue[y], self.saturation[y], self.value[y])
+
+  # bytes held by the planes
+  @property
+  def nbytes(self):
+    return self.hue.nbytes + self.saturation.nbytes + self.value.nbytes
+
+# yields (left, PixelStore) for tiles of tileWidth columns from left to right
+def iterateTiles(imageObject, tileWidth=tileWidth):
+  imageWidth = imageObject.shape[1]
+  for left in range(0, imageWidth, tileWidth):
+    yield (left, PixelStore.fromImage(imageObject[:, left:left + tileWidth]))
+
+# yields (top, PixelStore) for strips of stripHeight rows from top to bottom
+def iterateStrips(imageObject, stripHeight=stripHeight):
+  imageHeight = imageObject.shape[0]
+  for top in range(0, imageHeight, stripHeight):
+    yield (top, PixelStore.fromImage(imageObject[top:top + stripHeight]))
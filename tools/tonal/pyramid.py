@@ -0,0 +1,51 @@
+# NAME
+#   tonal.pyramid - area averaged levels of an image for previews
+#
+# SYNOPSIS
+#   from tonal.pyramid import buildLevel, levelRepeats
+#   levelImage = buildLevel(imageObject, 2)
+#   repeats = levelRepeats(imageObject.shape[1], 2)
+#
+# DESCRIPTION
+#   Level 0 is the image itself, every level above halves the one below in
+#   both directions: a pixel is the average of a 2x2 block of the level below
+#   (an odd row or column at the edge is averaged with itself). A pixel of
+#   level n stands for a block of 2^n x 2^n pixels of the image, smaller at
+#   the right and bottom edge, and levelRepeats tells how many columns (or
+#   rows) of the image every column (or row) of a level covers.
+#
+#   The converters render a preview out of a level and repeat its rows,
+#   pixels or notes as often as they are covered. A preview is as long as
+#   the full render and lines up with it, with 1/4^n of the pixels to
+#   convert and render.
+#
+# LEGAL NOTE
+#   Written and maintained by Laura Herzog (laura-herzog@outlook.com)
+#   Permission to copy and modify is granted under the AGPL license
+#   Project Information: https://github.com/lauraherzog/universum-tonal/
+
+import cv2
+import numpy as np
+from tonal.pixels import tileWidth
+
+# a cv2 image (BGR) averaged down level times
+def buildLevel(imageObject, level):
+  for step in range(level):
+    imageObject = halveImage(imageObject)
+  return imageObject
+
+# the next level of an image, read a tile of columns at a time so memory
+# mapped images are not read as a whole
+def halveImage(imageObject, tileWidth=tileWidth):
+  imageHeight, imageWidth = imageObject.shape[:2]
+  half = np.empty(((imageHeight + 1) // 2, (imageWidth + 1) // 2, 3), dtype=np.uint8)
+  for left in range(0, imageWidth, tileWidth):
+    tile = np.asarray(imageObject[:, left:left + tileWidth])
+    tile = cv2.copyMakeBorder(tile, 0, tile.shape[0] % 2, 0, tile.shape[1] % 2, cv2.BORDER_REPLICATE)
+    half[:, left // 2:left // 2 + tile.shape[1] // 2] = cv2.resize(tile, (tile.shape[1] // 2, tile.shape[0] // 2), interpolation=cv2.INTER_AREA)
+  return half
+
+# how many columns (or rows) of the image every one of the level covers
+def levelRepeats(size, level):
+  starts = np.arange(0, size, 1 << level)
+  return np.minimum(1 << level, size - starts)
@@ -0,0 +1,118 @@
+# NAME
+#   tonal.scan - scan orders over an image
+#
+# SYNOPSIS
+#   from tonal.scan import iterateScan
+#   for hue in iterateScan(imageObject, "hilbert"): ...
+#
+# DESCRIPTION
+#   Walks over a cv2 image (or a mapped one) in one of the scan orders and
+#   yields the hue of the pixels a chunk at a time, in that order:
+#
+#   row      left to right, rows from top to bottom
+#   column   top to bottom, columns from left to right
+#   hilbert  along a Hilbert curve, neighbouring pixels stay close together
+#
+#   Only one chunk of the image is converted at a time, the hues of the colors
+#   are kept in a HueTable. For the Hilbert curve the image is covered with
+#   square blocks (the next power of two of its shorter side) along its longer
+#   side, every block is walked by one curve. A block is split into tiles of
+#   hilbertTile pixels, which the curve passes one after another. Every tile
+#   is walked like the first one, just turned or mirrored, so the order within
+#   a tile comes from a table.
+#
+# LEGAL NOTE
+#   Written and maintained by Laura Herzog (laura-herzog@outlook.com)
+#   Permission to copy and modify is granted under the AGPL license
+#   Project Information: https://github.com/lauraherzog/universum-tonal/
+
+import functools
+import numpy as np
+from tonal.hsv import HueTable, chunkRows
+from tonal.pixels import tileWidth
+
+scanOrders = ("row", "column", "hilbert")
+
+# side of a hilbert tile
+hilbertTile = 256
+
+# a hueTable kept by the caller stays warm between images
+def iterateScan(imageObject, order, hueTable=None):
+  imageHeigth, imageWidth = imageObject.shape[:2]
+  if hueTable is None:
+    hueTable = HueTable()
+  if order == "row":
+    for top in range(0, imageHeigth, chunkRows):
+      yield hueTable.convert(imageObject[top:top + chunkRows]).ravel()
+  elif order == "column":
+    for left in range(0, imageWidth, tileWidth):
+      yield hueTable.convert(imageObject[:, left:left + tileWidth]).ravel(order="F")
+  elif order == "hilbert":
+    yield from iterateHilbert(imageObject, hueTable)
+  else:
+    raise ValueError("Scan order has to be one of {}".format(", ".join(scanOrders)))
+
+def iterateHilbert(imageObject, hueTable):
+  imageHeigth, imageWidth = imageObject.shape[:2]
+  if imageHeigth == 0 or imageWidth == 0:
+    return
+  side = 1 << (min(imageHeigth, imageWidth) - 1).bit_length()
+  tile = min(hilbertTile, side)
+  (tileX, tileY) = hilbertTileCorners(side, tile)
+
+  # square blocks along the longer side
+  for blockStart in range(0, max(imageHeigth, imageWidth), side):
+    (blockTop, blockLeft) = (blockStart, 0) if imageHeigth > imageWidth else (0, blockStart)
+    for corners in range(len(tileX)):
+      (x0, x1, x2) = tileX[corners]
+      (y0, y1, y2) = tileY[corners]
+      top = blockTop + y0 // tile * tile
+      left = blockLeft + x0 // tile * tile
+      if top >= imageHeigth or left >= imageWidth:
+        continue
+
+      hue = hueTable.convert(imageObject[top:top + tile, left:left + tile])
+      # where the curve enters the tile and where its x and y axes point
+      indices = tileOrder(tile, x0 % tile, y0 % tile, x1 - x0, y1 - y0, x2 - x0, y2 - y0)
+      if hue.shape == (tile, tile):
+        yield hue.ravel()[indices]
+      else:
+        (rows, columns) = np.divmod(indices, tile)
+        inside = (rows < hue.shape[0]) & (columns < hue.shape[1])
+        yield hue[rows[inside], columns[inside]]
+
+# the levels start to size of the hilbert curve (d2xy) for the steps t, the
+# points (x, y) are what the levels below made of them
+def hilbertLevels(t, x, y, start, size):
+  level = start
+  while level < size:
+    rx = 1 & (t // 2)
+    ry = 1 & (t ^ rx)
+    flip = (ry == 0) & (rx == 1)
+    swap = ry == 0
+    x = np.where(flip, level - 1 - x, x)
+    y = np.where(flip, level - 1 - y, y)
+    (x, y) = (np.where(swap, y, x) + level * rx, np.where(swap, x, y) + level * ry)
+    t = t // 4
+    level = level * 2
+  return (x, y)
+
+# (x, y) of the points (0, 0), (1, 0) and (0, 1) of the first tile, moved to
+# every tile of the block in the order the curve passes them
+@functools.lru_cache(maxsize=8)
+def hilbertTileCorners(side, tile):
+  tiles = (side // tile) ** 2
+  x = np.tile(np.array([0, 1, 0], dtype=np.int64), (tiles, 1))
+  y = np.tile(np.array([0, 0, 1], dtype=np.int64), (tiles, 1))
+  return hilbertLevels(np.arange(tiles, dtype=np.int64)[:, None], x, y, tile, side)
+
+# indices (row * tile + column) of a tile in curve order, the first tile is
+# moved to the corner (originX, originY) with the axes (ax, ay) and (bx, by)
+@functools.lru_cache(maxsize=16)
+def tileOrder(tile, originX, originY, ax, ay, bx, by):
+  steps = np.arange(tile * tile, dtype=np.int64)
+  (x, y) = hilbertLevels(steps, np.zeros_like(steps), np.zeros_like(steps), 1, tile)
+  (x, y) = (originX + x * ax + y * bx, originY + x * ay + y * by)
+  indices = y * tile + x
+  indices.flags.writeable = False
+  return indices
@@ -0,0 +1,417 @@
+# NAME
+#   tonal.service - render jobs over http
+#
+# SYNOPSIS
+#   from tonal.service import RenderService
+#   service = RenderService(workers=4, queueSize=16)
+#   asyncio.run(service.serve("127.0.0.1", 8000))
+#   asyncio.run(service.serve(socketPath="/tmp/tonal.sock"))
+#
+# DESCRIPTION
+#   A small asyncio http server around the converters. An image is posted to
+#   /render/<tool> (wave, midi, pf, pp, chord, noise), the parameters of the
+#   converter are query parameters, and the response is the wave or midi file:
+#
+#     POST   /render/wave?mode=bank&stream=1  render an image
+#     GET    /jobs                            the jobs in the queue and running
+#     DELETE /jobs/<id>                       cancel a job
+#     GET    /metrics                         queue depth, counts and latencies
+#
+#   Jobs wait in a bounded queue. When it is full a request is answered with
+#   503 and Retry-After right away instead of piling up. One dispatcher per
+#   worker takes the jobs from the queue and renders them in a process pool,
+#   whose workers keep their converters (and tables) between jobs.
+#
+#   With stream=1 a wave job is answered with raw 16 bit pcm (little endian,
+#   mono, 44100 Hz) as it is rendered: the rows are handed to the pool in
+#   batches and every batch is sent as soon as it is done. Only a few batches
+#   are in flight, so a slow client slows the rendering down instead of
+#   filling the memory.
+#
+#   A job gets the id of the X-Job-Id request header or a generated one, the
+#   response carries it in X-Job-Id. A job is cancelled by DELETE /jobs/<id>
+#   or when its client goes away. Queued jobs are dropped, streaming jobs stop
+#   after the current batch, a file job already running in a worker finishes
+#   there and its result is dropped.
+#
+#   Every request is answered with Connection: close. SIGINT and SIGTERM stop
+#   the server, jobs still running are cancelled.
+#
+# LEGAL NOTE
+#   Written and maintained by Laura Herzog (laura-herzog@outlook.com)
+#   Permission to copy and modify is granted under the AGPL license
+#   Project Information: https://github.com/lauraherzog/universum-tonal/
+
+import asyncio, itertools, json, os, signal, time
+import urllib.parse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+import cv2
+import numpy as np
+from tonal import synthesis
+from tonal.converters import ConversionError, ImageToWave, ImageToMidi, PixelFrequency, PixelByPixel, Chord, Noise, columnsPerTask, frameRate, prepareBatches
+from tonal.imagefile import reducedFlags
+from tonal.metrics import Metrics
+from tonal.parallel import backlogPerWorker
+
+defaultQueueSize = 16
+
+# biggest image accepted, 64 MiB
+maxImageBytes = 64 << 20
+
+# latencies kept for the percentiles
+latencyWindow = 1000
+
+def parseFlag(value):
+  return value.lower() in ("1", "true", "yes")
+
+# query parameter -> type per tool, the names are the arguments of the converters
+toolParameters = {
+  "wave": {"sampleRate": int, "lowestFrequency": float, "mode": str, "preview": int},
+  "midi": {"ignoreBackground": parseFlag, "preview": int},
+  "pf": {"preview": int},
+  "pp": {"order": str},
+  "chord": {},
+  "noise": {"color": str, "seed": int}
+}
+
+# parameters of the job itself instead of the converter
+jobParameters = {"wave": ("reduce", "stream"), "midi": ("reduce",), "pf": ("reduce",), "pp": ("reduce",), "chord": (), "noise": ("duration",)}
+
+converterClasses = {"wave": ImageToWave, "midi": ImageToMidi, "pf": PixelFrequency, "pp": PixelByPixel, "chord": Chord, "noise": Noise}
+
+class HttpError(Exception):
+
+  def __init__(self, status, message):
+    super().__init__(message)
+    self.status = status
+
+class Job:
+
+  def __init__(self, jobId, tool, settings, image, reduce, duration, stream):
+    self.id = jobId
+    self.tool = tool
+    self.settings = settings
+    self.image = image
+    self.reduce = reduce
+    self.duration = duration
+    self.stream = stream
+    self.state = "queued"
+    self.created = time.perf_counter()
+    self.started = None
+    self.firstByte = None
+    self.writer = None
+    self.headersSent = False
+    self.task = None
+    self.finished = asyncio.Event()
+
+  def describe(self):
+    return {"id": self.id, "tool": self.tool, "state": self.state, "seconds": time.perf_counter() - self.created}
+
+class RenderService:
+
+  def __init__(self, workers=1, queueSize=defaultQueueSize):
+    self.workers = max(1, workers)
+    self.queueSize = queueSize
+    self.queue = None
+    self.pool = None
+    # the listening server while serve() runs, e.g. for its port
+    self.server = None
+    self.jobs = {}
+    self.jobIds = itertools.count(1)
+    self.metrics = Metrics(verbose=False)
+    self.latencies = {name: deque(maxlen=latencyWindow) for name in ("queued", "firstByte", "total")}
+
+  # serves on host and port or on a unix socket until cancelled
+  async def serve(self, host="127.0.0.1", port=8000, socketPath=None):
+    loop = asyncio.get_running_loop()
+    self.queue = asyncio.Queue(self.queueSize)
+    self.pool = ProcessPoolExecutor(self.workers)
+    # the workers are started before the first connection, forked later they
+    # would keep its socket open and the client would not see it closed
+    await loop.run_in_executor(self.pool, int)
+    dispatchers = [asyncio.create_task(self.dispatch()) for worker in range(self.workers)]
+    if socketPath is not None:
+      server = await asyncio.start_unix_server(self.handle, socketPath)
+    else:
+      server = await asyncio.start_server(self.handle, host, port)
+    self.server = server
+    stopped = asyncio.Event()
+    for signalNumber in (signal.SIGINT, signal.SIGTERM):
+      loop.add_signal_handler(signalNumber, stopped.set)
+    try:
+      async with server:
+        await stopped.wait()
+    finally:
+      for dispatcher in dispatchers:
+        dispatcher.cancel()
+      for job in list(self.jobs.values()):
+        self.cancel(job)
+      self.pool.shutdown(wait=False, cancel_futures=True)
+      if socketPath is not None and os.path.exists(socketPath):
+        os.remove(socketPath)
+      self.server = None
+
+  # one connection, one request
+  async def handle(self, reader, writer):
+    try:
+      (method, path, query, headers, body) = await readRequest(reader, writer)
+      if method == "POST" and path.startswith("/render/"):
+        await self.submit(path[len("/render/"):], query, headers, body, reader, writer)
+      elif method == "GET" and path == "/jobs":
+        await sendResponse(writer, 200, "application/json", json.dumps([job.describe() for job in self.jobs.values()]).encode())
+      elif method == "DELETE" and path.startswith("/jobs/"):
+        job = self.jobs.get(path[len("/jobs/"):])
+        if job is None:
+          raise HttpError(404, "No such job")
+        self.cancel(job)
+        await sendResponse(writer, 204)
+      elif method == "GET" and path == "/metrics":
+        await sendResponse(writer, 200, "application/json", json.dumps(self.report(), indent=2).encode())
+      else:
+        raise HttpError(404, "Not found")
+    except HttpError as error:
+      await sendError(writer, error.status, str(error))
+    except (ConnectionError, asyncio.IncompleteReadError):
+      pass
+    finally:
+      # a cancelled handler is closed as well and stays cancelled
+      writer.close()
+
+  # queues a render job and waits for it, the job writes the response
+  async def submit(self, tool, query, headers, body, reader, writer):
+    job = self.createJob(tool, query, headers, body)
+    try:
+      self.queue.put_nowait(job)
+    except asyncio.QueueFull:
+      self.metrics.count("rejected")
+      await sendError(writer, 503, "Queue is full", {"Retry-After": 1})
+      return
+    job.writer = writer
+    self.jobs[job.id] = job
+    self.metrics.count("accepted")
+
+    # the client closing its side cancels the job
+    finished = asyncio.create_task(job.finished.wait())
+    while finished.done() == False:
+      watcher = asyncio.create_task(reader.read(1024))
+      await asyncio.wait([watcher, finished], return_when=asyncio.FIRST_COMPLETED)
+      if finished.done() == False and (watcher.exception() is not None or watcher.result() == b""):
+        self.cancel(job)
+        await finished
+      watcher.cancel()
+
+    # cancelled before it ran, the dispatcher answers the others
+    if job.state == "cancelled" and job.started is None:
+      await sendError(writer, 410, "Job cancelled")
+
+  def createJob(self, tool, query, headers, body):
+    if tool not in toolParameters:
+      raise HttpError(404, "Tool not supported. Use {}".format(", ".join(toolParameters)))
+    jobId = headers.get("x-job-id") or str(next(self.jobIds))
+    if jobId in self.jobs:
+      raise HttpError(409, "Job {} exists already".format(jobId))
+
+    parameters = dict(toolParameters[tool], reduce=int, duration=float, stream=parseFlag)
+    values = {}
+    for name, value in query.items():
+      if name not in toolParameters[tool] and name not in jobParameters[tool]:
+        raise HttpError(400, "Unknown parameter {}".format(name))
+      try:
+        values[name] = parameters[name](value)
+      except ValueError:
+        raise HttpError(400, "Parameter {} not usable: {}".format(name, value))
+    settings = {name: value for name, value in values.items() if name in toolParameters[tool]}
+
+    if "reduce" in jobParameters[tool] and len(body) == 0:
+      raise HttpError(400, "The image is missing")
+    return Job(jobId, tool, settings, body, values.get("reduce", 1), values.get("duration", 5), values.get("stream", False))
+
+  def cancel(self, job):
+    if job.state == "queued":
+      # the dispatcher skips it
+      self.finish(job, "cancelled")
+    elif job.state == "running" and job.task is not None:
+      job.task.cancel()
+
+  def finish(self, job, state):
+    if job.finished.is_set():
+      return
+    job.state = state
+    self.metrics.count(state)
+    self.jobs.pop(job.id, None)
+    if state == "completed":
+      self.latencies["total"].append(time.perf_counter() - job.created)
+    job.finished.set()
+
+  async def dispatch(self):
+    while True:
+      job = await self.queue.get()
+      if job.state != "queued":
+        continue
+      job.state = "running"
+      job.started = time.perf_counter()
+      self.latencies["queued"].append(job.started - job.created)
+
+      job.task = asyncio.create_task(self.run(job))
+      await asyncio.wait([job.task])
+      # a client that went away cancelled its job as well
+      if job.task.cancelled() or isinstance(job.task.exception(), ConnectionError):
+        if job.headersSent == False:
+          await sendError(job.writer, 410, "Job cancelled")
+        self.finish(job, "cancelled")
+      elif job.task.exception() is not None:
+        error = job.task.exception()
+        if job.headersSent == False:
+          await sendError(job.writer, 400 if isinstance(error, ConversionError) else 500, str(error))
+        self.finish(job, "failed")
+      else:
+        self.finish(job, "completed")
+
+  async def run(self, job):
+    loop = asyncio.get_running_loop()
+    if job.stream:
+      await self.stream(job)
+      return
+
+    data = await loop.run_in_executor(self.pool, renderFile, job.tool, job.settings, job.image, job.reduce, job.duration)
+    self.send(job, 200, {"Content-Type": "audio/midi" if job.tool == "midi" else "audio/wav", "Content-Length": len(data)})
+    await self.write(job, data)
+
+  # renders a wave job batch by batch and sends the pcm as it comes
+  async def stream(self, job):
+    loop = asyncio.get_running_loop()
+    converter = ImageToWave(**job.settings)
+    imageObject = await loop.run_in_executor(None, decodeImage, job.image, job.reduce)
+    batches = prepareBatches(converter.columns(imageObject), columnsPerTask, converter.sampleRate, converter.lowestFrequency, converter.mode)
+
+    self.send(job, 200, {"Content-Type": "application/octet-stream", "X-Sample-Format": "s16le", "X-Sample-Rate": frameRate, "Transfer-Encoding": "chunked"})
+    pending = deque()
+    try:
+      while True:
+        # the rows are converted in a thread, the loop keeps serving
+        while len(pending) < self.workers * backlogPerWorker:
+          batch = await loop.run_in_executor(None, next, batches, None)
+          if batch is None:
+            break
+          pending.append(loop.run_in_executor(self.pool, synthesis.renderColumns, *batch))
+        if len(pending) == 0:
+          break
+
+        (blocks, clipped, notes, oscillators) = await pending.popleft()
+        data = b"".join(np.asarray(block, dtype="<i2").tobytes() for block in blocks)
+        # an empty chunk would end the response
+        if len(data) == 0:
+          continue
+        await self.write(job, b"%x\r\n%s\r\n" % (len(data), data))
+        self.metrics.count("samples", len(data) // 2)
+      await self.write(job, b"0\r\n\r\n")
+    finally:
+      for future in pending:
+        future.cancel()
+
+  def send(self, job, status, headers):
+    headers = dict(headers, **{"X-Job-Id": job.id})
+    job.writer.write(statusLine(status, headers))
+    job.headersSent = True
+
+  async def write(self, job, data):
+    if job.firstByte is None:
+      job.firstByte = time.perf_counter()
+      self.latencies["firstByte"].append(job.firstByte - job.created)
+    job.writer.write(data)
+    await job.writer.drain()
+
+  def report(self):
+    return {
+      "queueDepth": self.queue.qsize() if self.queue is not None else 0,
+      "queueSize": self.queueSize,
+      "running": sum(1 for job in self.jobs.values() if job.state == "running"),
+      "workers": self.workers,
+      "jobs": self.metrics.counters,
+      "latency": {name: summarize(window) for name, window in self.latencies.items()},
+      "seconds": time.perf_counter() - self.metrics.started
+    }
+
+# count, mean, median, 95th percentile and maximum in seconds
+def summarize(window):
+  if len(window) == 0:
+    return {"count": 0}
+  values = np.array(window)
+  return {"count": len(values), "mean": float(values.mean()), "p50": float(np.percentile(values, 50)), "p95": float(np.percentile(values, 95)), "max": float(values.max())}
+
+# converters of this worker process, they stay warm between jobs
+converters = {}
+
+# renders a whole file in a worker process
+def renderFile(tool, settings, image, reduce, duration):
+  key = (tool,) + tuple(sorted(settings.items()))
+  if key not in converters:
+    converters[key] = converterClasses[tool](**settings)
+  converter = converters[key]
+
+  if tool == "chord":
+    return converter.render()
+  elif tool == "noise":
+    return converter.render(int(duration * frameRate))
+  return converter.render(decodeImage(image, reduce))
+
+def decodeImage(image, reduce=1):
+  if reduce not in reducedFlags:
+    raise ConversionError("reduce has to be 1, 2, 4 or 8")
+  try:
+    imageObject = cv2.imdecode(np.frombuffer(image, dtype=np.uint8), reducedFlags[reduce])
+  except cv2.error as error:
+    raise ConversionError("Image not usable: {}".format(error))
+  if imageObject is None:
+    raise ConversionError("Image not usable: could not be decoded")
+  return imageObject
+
+# (method, path, query, headers, body) of a request
+async def readRequest(reader, writer):
+  line = await reader.readline()
+  try:
+    (method, target, version) = line.decode("latin-1").split()
+  except ValueError:
+    raise HttpError(400, "Bad request")
+
+  headers = {}
+  while True:
+    line = await reader.readline()
+    if line in (b"\r\n", b"\n", b""):
+      break
+    (name, separator, value) = line.decode("latin-1").partition(":")
+    headers[name.strip().lower()] = value.strip()
+
+  try:
+    length = int(headers.get("content-length", 0))
+  except ValueError:
+    raise HttpError(400, "Bad content length")
+  if length > maxImageBytes:
+    raise HttpError(413, "Images up to {} MiB are accepted".format(maxImageBytes >> 20))
+  # curl waits for this before it sends a larger image
+  if headers.get("expect", "").lower() == "100-continue":
+    writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+  body = await reader.readexactly(length)
+
+  url = urllib.parse.urlsplit(target)
+  return (method, urllib.parse.unquote(url.path), dict(urllib.parse.parse_qsl(url.query)), headers, body)
+
+def statusLine(status, headers):
+  lines = ["HTTP/1.1 {} {}".format(status, HTTPStatus(status).phrase)]
+  lines = lines + ["{}: {}".format(name, value) for name, value in headers.items()] + ["Connection: close", "", ""]
+  return "\r\n".join(lines).encode("latin-1")
+
+async def sendResponse(writer, status, contentType=None, body=b"", headers={}):
+  headers = dict(headers, **{"Content-Length": len(body)})
+  if contentType is not None:
+    headers["Content-Type"] = contentType
+  writer.write(statusLine(status, headers) + body)
+  await writer.drain()
+
+async def sendError(writer, status, message, headers={}):
+  try:
+    await sendResponse(writer, status, "application/json", json.dumps({"error": message}).encode(), headers)
+  except ConnectionError:
+    pass
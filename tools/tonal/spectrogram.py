@@ -0,0 +1,80 @@
+# NAME
+#   tonal.spectrogram - inverse STFT renderer
+#
+# SYNOPSIS
+#   from tonal.spectrogram import SpectrogramRenderer
+#   renderer = SpectrogramRenderer(sampleRate, lowestFrequency)
+#   sineList = renderer.render(frequencies, amplitudes)
+#
+# DESCRIPTION
+#   Treats the image as a spectrogram, one column per hop of sampleRate
+#   ticks. The notes of a column (frequency and amplitude, out of the usual
+#   octave and hue mapping) are added up into the bins of a magnitude
+#   spectrum with 2 * sampleRate points. The inverse FFT of that spectrum is
+#   windowed with a periodic Hann window and overlap-added with the frame of
+#   the column before; with half a frame of overlap the windows add up to
+#   one, so a steady note keeps its amplitude.
+#
+#   Every bin gets the phase a sine at the bin frequency would have at the
+#   start of the frame, so notes carry on from frame to frame. A column costs
+#   O(N log N) for the FFT plus one pass over its notes, independent of how
+#   many notes there are per bin.
+#
+#   The frequency resolution is frameRate / (2 * sampleRate), about 11 Hz
+#   with the default sample rate, so the lowest octaves share a few bins.
+#
+# LEGAL NOTE
+#   Written and maintained by Laura Herzog (laura-herzog@outlook.com)
+#   Permission to copy and modify is granted under the AGPL license
+#   Project Information: https://github.com/lauraherzog/universum-tonal/
+
+import math
+import numpy as np
+
+class SpectrogramRenderer:
+
+  def __init__(self, sampleRate, lowestFrequency, frameRate=44100):
+    self.hop = sampleRate
+    self.frameSize = 2 * sampleRate
+    self.lowestFrequency = lowestFrequency
+    self.frameRate = frameRate
+
+    # periodic hann, shifted copies half a frame apart add up to one
+    self.window = 0.5 - 0.5 * np.cos(2 * math.pi * np.arange(self.frameSize) / max(self.frameSize, 1))
+    self.bins = np.arange(self.frameSize // 2 + 1)
+
+    # second half of the previous frame, waiting for the next column
+    self.tail = np.zeros(self.hop)
+    self.column = 0
+
+  # continues at the given column, previous are the bucketed notes of the
+  # column before it (None for silence)
+  def seek(self, column, previous=None):
+    self.tail = np.zeros(self.hop)
+    self.column = column
+    if previous is not None and column > 0:
+      self.column = column - 1
+      self.render(*previous)
+
+  # renders the next column, the notes do not need to be bucketed
+  def render(self, frequencies, amplitudes):
+    frame = self.synthesizeFrame(np.asarray(frequencies), np.asarray(amplitudes, dtype=np.float64))
+    sineList = self.tail + frame[:self.hop]
+    self.tail = frame[self.hop:]
+    self.column = self.column + 1
+    return sineList
+
+  def synthesizeFrame(self, frequencies, amplitudes):
+    if self.hop <= 0:
+      return np.zeros(0)
+
+    # nearest bin per note, the bins at 0 Hz and nyquist stay silent
+    bins = np.rint(frequencies * self.frameSize / self.frameRate).astype(np.int64)
+    audible = (frequencies >= self.lowestFrequency) & (bins > 0) & (bins < self.frameSize // 2)
+    magnitude = np.bincount(bins[audible], weights=amplitudes[audible], minlength=len(self.bins))
+
+    # a sine at bin k has the phase 2*pi*k*start/frameSize at the frame start,
+    # with start = column * hop that is pi*k*column
+    phase = math.pi * ((self.bins * (self.column % 2)) % 2)
+    spectrum = magnitude * (self.frameSize / 2) * np.exp(1j * (phase - math.pi / 2))
+    return np.fft.irfft(spectrum, self.frameSize) * self.window
@@ -0,0 +1,187 @@
+# NAME
+#   tonal.stream - live pcm output
+#
+# SYNOPSIS
+#   from tonal.stream import PcmStreamer
+#   with PcmStreamer("-", latency=0.2) as streamer:
+#     streamer.write(sineList, 250/2)
+#
+# DESCRIPTION
+#   Works like FrameWriter, but instead of a wave file the samples go out as
+#   raw pcm (signed 16 bit, little endian, mono) while they are rendered:
+#
+#     ./image-to-wave.py -i sample.jpg --stream - | aplay -f S16_LE -r 44100
+#
+#   Written samples land in a ring buffer. A sender thread takes them out in
+#   chunks of a fixed length and hands them to the target at the pace they
+#   are played, staying ahead of the listener by the latency budget. It waits
+#   for a full budget before it starts. If the renderer does not keep up and
+#   the listener runs out of samples, that is counted as an underrun and the
+#   budget is buffered again. A full ring buffer blocks the renderer. If the
+#   target fails, the next write or the close raises the error.
+#
+#   Targets are "-" for stdout, "unix:<path>" to connect to a listening unix
+#   socket, or the path of a named pipe (or any file).
+#
+# LEGAL NOTE
+#   Written and maintained by Laura Herzog (laura-herzog@outlook.com)
+#   Permission to copy and modify is granted under the AGPL license
+#   Project Information: https://github.com/lauraherzog/universum-tonal/
+
+import socket, sys, threading, time
+import numpy as np
+from tonal.wavewriter import saturate
+
+# seconds buffered ahead of the listener
+defaultLatency = 0.2
+# seconds per chunk handed to the target
+chunkLength = 0.02
+
+class RingBuffer:
+
+  def __init__(self, capacity):
+    self.buffer = np.zeros(max(1, capacity), dtype=np.int16)
+    self.start = 0
+    self.available = 0
+
+  def free(self):
+    return len(self.buffer) - self.available
+
+  # copies as many samples as fit, returns how many that were
+  def put(self, samples):
+    count = min(len(samples), self.free())
+    end = (self.start + self.available) % len(self.buffer)
+    first = min(count, len(self.buffer) - end)
+    self.buffer[end:end + first] = samples[:first]
+    self.buffer[:count - first] = samples[first:count]
+    self.available = self.available + count
+    return count
+
+  # removes up to count samples from the front
+  def take(self, count):
+    count = min(count, self.available)
+    first = min(count, len(self.buffer) - self.start)
+    samples = np.concatenate((self.buffer[self.start:self.start + first], self.buffer[:count - first]))
+    self.start = (self.start + count) % len(self.buffer)
+    self.available = self.available - count
+    return samples
+
+class PcmStreamer:
+
+  def __init__(self, target, frameRate=44100, latency=defaultLatency):
+    (self.sink, self.ownsSink) = openSink(target)
+    self.frameRate = frameRate
+    self.latency = latency
+    self.chunkSize = max(1, int(frameRate * chunkLength))
+    self.budget = max(self.chunkSize, int(frameRate * latency))
+    self.ring = RingBuffer(2 * self.budget)
+    self.condition = threading.Condition()
+    self.finished = False
+    # what went wrong in the sender thread and if write or close raised it
+    self.error = None
+    self.raised = False
+
+    self.framesWritten = 0
+    self.clipped = 0
+    self.underruns = 0
+    self.maxLatency = 0.0
+
+    self.sender = threading.Thread(target=self.send, daemon=True)
+    self.sender.start()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, excType, excValue, traceback):
+    self.close()
+
+  # adds a block of samples, blocks while the ring buffer is full
+  def write(self, samples, scale=None):
+    if scale is not None:
+      (samples, clipped) = saturate(samples, scale)
+      self.clipped = self.clipped + clipped
+    else:
+      samples = np.asarray(samples, dtype=np.int16)
+
+    samples = samples.ravel()
+    while len(samples) > 0:
+      with self.condition:
+        while self.ring.free() == 0 and self.error is None:
+          self.condition.wait()
+        if self.error is not None:
+          self.raised = True
+          raise self.error
+        count = self.ring.put(samples)
+        self.condition.notify_all()
+      self.framesWritten = self.framesWritten + count
+      samples = samples[count:]
+
+  # runs in the sender thread
+  def send(self):
+    # when the listener will have played everything sent so far
+    clock = None
+    try:
+      while True:
+        with self.condition:
+          # a full budget before the clock starts, one chunk after that
+          needed = self.budget if clock is None else self.chunkSize
+          while self.ring.available < needed and not self.finished:
+            timeout = None
+            if clock is not None:
+              timeout = clock - time.monotonic()
+              if timeout <= 0:
+                self.underruns = self.underruns + 1
+                clock = None
+                needed = self.budget
+                continue
+            self.condition.wait(timeout)
+          if self.ring.available == 0 and self.finished:
+            break
+          self.maxLatency = max(self.maxLatency, self.ring.available / self.frameRate)
+          chunk = self.ring.take(self.chunkSize)
+          self.condition.notify_all()
+
+        if clock is None:
+          clock = time.monotonic()
+        # stay ahead of the listener by the budget, not more
+        delay = clock - self.latency - time.monotonic()
+        if delay > 0:
+          time.sleep(delay)
+        self.sink.write(chunk.astype("<i2").tobytes())
+        self.sink.flush()
+        clock = clock + len(chunk) / self.frameRate
+    except Exception as error:
+      with self.condition:
+        self.error = error
+        self.condition.notify_all()
+
+  # sends what is left and waits for it, raises what went wrong in the
+  # sender thread unless write already did
+  def close(self):
+    if self.sink is not None:
+      with self.condition:
+        self.finished = True
+        self.condition.notify_all()
+      self.sender.join()
+      if self.ownsSink:
+        try:
+          self.sink.close()
+        except OSError:
+          pass
+      self.sink = None
+      if self.error is not None and self.raised == False:
+        self.raised = True
+        raise self.error
+
+# returns a binary file object for the target and if it has to be closed
+def openSink(target):
+  if target == "-":
+    return (sys.stdout.buffer, False)
+  if target.startswith("unix:"):
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    connection.connect(target[len("unix:"):])
+    sink = connection.makefile("wb")
+    # the file object keeps the socket open until it is closed itself
+    connection.close()
+    return (sink, True)
+  return (open(target, "wb"), True)
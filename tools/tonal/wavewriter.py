@@ -0,0 +1,94 @@
+# NAME
+#   tonal.wavewriter - buffered int16 frame writer
+#
+# SYNOPSIS
+#   from tonal.wavewriter import FrameWriter
+#   with FrameWriter(outputFile) as writer:
+#     writer.write(sineList, 250/2)
+#
+# DESCRIPTION
+#   Collects whole blocks of samples and hands them to the wave module in
+#   bulk instead of packing and writing every sample on its own. Blocks can
+#   be int16 arrays, array('h') or floats together with a scale factor.
+#   Floats are scaled and truncated like int(sine*scale) did, but values
+#   outside of int16 saturate at -32768/32767 instead of overflowing. The
+#   number of saturated samples is kept in the clipped attribute.
+#
+# LEGAL NOTE
+#   Written and maintained by Laura Herzog (laura-herzog@outlook.com)
+#   Permission to copy and modify is granted under the AGPL license
+#   Project Information: https://github.com/lauraherzog/universum-tonal/
+
+import wave
+import numpy as np
+
+# samples held back before they are written, 64k samples are 128 KiB
+flushSize = 65536
+
+class FrameWriter:
+
+  def __init__(self, outputFile, frameRate=44100, flushSize=flushSize):
+    self.waveFile = wave.open(outputFile, 'wb')
+    self.waveFile.setnchannels(1) # mono
+    self.waveFile.setsampwidth(2)
+    self.waveFile.setframerate(frameRate)
+
+    self.buffer = np.empty(max(1, flushSize), dtype=np.int16)
+    self.buffered = 0
+    self.framesWritten = 0
+    self.clipped = 0
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, excType, excValue, traceback):
+    self.close()
+
+  # adds a block of samples, floats are scaled and saturated to int16
+  def write(self, samples, scale=None):
+    if scale is not None:
+      (samples, clipped) = saturate(samples, scale)
+      self.clipped = self.clipped + clipped
+    else:
+      samples = np.asarray(samples, dtype=np.int16)
+
+    samples = samples.ravel()
+    # blocks bigger than the buffer skip it
+    if self.buffered == 0 and len(samples) >= len(self.buffer):
+      self.writeBlock(samples)
+      return
+
+    while len(samples) > 0:
+      count = min(len(samples), len(self.buffer) - self.buffered)
+      self.buffer[self.buffered:self.buffered + count] = samples[:count]
+      self.buffered = self.buffered + count
+      samples = samples[count:]
+      if self.buffered == len(self.buffer):
+        self.flush()
+
+  def flush(self):
+    if self.buffered > 0:
+      self.writeBlock(self.buffer[:self.buffered])
+      self.buffered = 0
+
+  def writeBlock(self, samples):
+    # the wave module expects native byte order and swaps on big endian hosts
+    self.waveFile.writeframes(samples.tobytes())
+    self.framesWritten = self.framesWritten + len(samples)
+
+  # finished writing
+  def close(self):
+    if self.waveFile is not None:
+      self.flush()
+      self.waveFile.close()
+      self.waveFile = None
+
+# scales floats to int16 and counts the samples that had to be clipped
+def saturate(samples, scale):
+  samples = np.trunc(np.asarray(samples, dtype=np.float64) * scale)
+  clipped = np.count_nonzero((samples < -32768) | (samples > 32767))
+  return (np.clip(samples, -32768, 32767).astype(np.int16), int(clipped))
+
+# scales samples to int16, like int(sine*scale) but clipped instead of overflowing
+def convertToInt16(samples, scale):
+  return saturate(samples, scale)[0]